@@ -1 +1,2 @@
+from . import scene
 from .utility import _vendor
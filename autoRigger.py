@@ -3,57 +3,117 @@ AutoRigger provides procedural approach for maya rigging
 """
 
 import os
+from timeit import default_timer
 
-import maya.cmds as cmds
 from Qt import QtCore, QtGui, QtWidgets
-from Qt import _loadUi
-
-from . import util, constant
-from .base import base
-from .chain import finger, tail, chainFK, chainIK, chainEP, chainFKIK
-from .chain.limb import limbFKIK
-from .chain.limb.arm import arm
-from .chain.limb.leg import leg, legBack, legFront
-from .chain.spine import spine, spineQuad
+
+from . import util, constant, registry
+from .base import plan
 from .constant import RigType
-from .module import foot, hand
-from .template import biped, quadruped
+from .scene import cmds
+from .uicache import load_ui
 from .utility.common import setup
 
 
-TAB_RIG_MAPPING = {
-    RigType.BIPED: [
-        biped.BipedItem,
-        arm.ArmItem,
-        lambda: base.BaseItem('biped-head'),
-        leg.LegItem,
-        spine.SpineItem
-    ],
-
-    RigType.QUADRUPED: [
-        quadruped.QuadrupedItem,
-        legFront.LegFrontItem,
-        legBack.LegBackItem,
-        spineQuad.SpineQuadItem,
-        tail.TailItem
-    ],
-
-    RigType.CHAIN: [
-        chainEP.ChainEPItem,
-        chainFK.ChainFKItem,
-        chainFKIK.ChainFKIKItem,
-        chainIK.ChainIKItem
-    ],
-
-    RigType.CUSTOM: [
-        base.BaseItem,
-        finger.FingerItem,
-        hand.HandItem,
-        foot.FootItem,
-        limbFKIK.LimbFKIKItem
-    ]
-
-}
+# seconds of build steps run between two UI refreshes
+CHUNK_TIME = 0.05
+
+BUILD_CHUNK = 'autoRigger_build'
+
+
+class BuildRunner(QtCore.QObject):
+    """
+    Run a rig build step by step from the Qt event loop, keeping the
+    window responsive, with a progress dialog that can cancel and roll
+    back the build
+
+    Each pass of the event loop runs its steps in an undo chunk of its own,
+    so no chunk stays open while Maya handles other events; the dialog is
+    application modal so no other edit gets between the build chunks
+    """
+
+    finished = QtCore.Signal(bool)
+
+    def __init__(self, rig, parent=None):
+        """
+        Initialization
+
+        :param rig: Bone. rig component with its guide built
+        :param parent: QWidget. parent of the progress dialog
+        """
+        super(BuildRunner, self).__init__(parent)
+        self.rig = rig
+        self.steps = plan.build_plan(rig).order()
+        self.comps = dict(plan.walk(rig))
+        self.index = 0
+        # undo chunks run so far
+        self.chunks = 0
+
+        self.dialog = QtWidgets.QProgressDialog(
+            'Building rig', 'Cancel', 0, len(self.steps), parent)
+        self.dialog.setWindowTitle('AutoRigger')
+        self.dialog.setWindowModality(QtCore.Qt.ApplicationModal)
+        self.dialog.setMinimumDuration(0)
+        self.dialog.canceled.connect(self.cancel)
+
+        self.timer = QtCore.QTimer(self)
+        self.timer.timeout.connect(self.run_chunk)
+
+    def start(self):
+        """
+        Start building
+        """
+        self.chunks = 0
+        self.dialog.setValue(0)
+        self.timer.start(0)
+
+    def run_chunk(self):
+        """
+        Run steps in an undo chunk until the chunk time is used up
+        """
+        cmds.undoInfo(openChunk=1, chunkName=BUILD_CHUNK)
+        self.chunks += 1
+        start = default_timer()
+        try:
+            try:
+                while self.index < len(self.steps) and \
+                        default_timer() - start < CHUNK_TIME:
+                    step = self.steps[self.index]
+                    plan.run_step(self.comps[step.path], step.stage)
+                    self.index += 1
+            finally:
+                cmds.undoInfo(closeChunk=1)
+        except Exception:
+            self.stop(rollback=True)
+            raise
+
+        if self.index < len(self.steps):
+            step = self.steps[self.index]
+            self.dialog.setLabelText('{} {}'.format(step.stage, step.path))
+            self.dialog.setValue(self.index)
+        else:
+            self.stop()
+
+    def cancel(self):
+        """
+        Stop building and undo the steps already run
+        """
+        if self.timer.isActive():
+            self.stop(rollback=True)
+
+    def stop(self, rollback=False):
+        """
+        :param rollback: bool. undo everything built so far
+        """
+        self.timer.stop()
+        if rollback:
+            for _ in range(self.chunks):
+                cmds.undo()
+        self.chunks = 0
+
+        self.dialog.canceled.disconnect(self.cancel)
+        self.dialog.reset()
+        self.finished.emit(not rollback)
 
 
 class AutoRiggerWindow(QtWidgets.QMainWindow):
@@ -66,10 +126,13 @@ class AutoRiggerWindow(QtWidgets.QMainWindow):
         Initialization
         """
         super(AutoRiggerWindow, self).__init__(parent)
-        _loadUi(os.path.join(constant.UI_DIR, 'autoRigger.ui'), self)
+        load_ui(os.path.join(constant.UI_DIR, 'autoRigger.ui'), self)
         self.setWindowFlags(QtCore.Qt.Window)
 
         self.item = None
+        self.runner = None
+        # list items of each tab, created on the first visit
+        self.tab_items = dict()
         # reset tab position and populate list
         self.connect_signals()
         self.refresh_tab(0)
@@ -90,20 +153,23 @@ class AutoRiggerWindow(QtWidgets.QMainWindow):
         :param item: QListWidgetItem. current selected item
         :return:
         """
-        self.item = item
+        self.item = item.resolve()
+        self.item.load_widgets()
         self.initialize_field()
 
     def refresh_tab(self, index):
         """
-        Clear and Re-generate Rig comp items in the list widget
+        Swap the Rig comp items in the list widget for the ones of a tab,
+        creating them on the first visit of the tab
         """
+        # taken items stay alive in the tab cache
         while self.ui_list_widget.item(0):
-            item = self.ui_list_widget.takeItem(0)
-            del item
+            self.ui_list_widget.takeItem(0)
 
-        comps = TAB_RIG_MAPPING[index]
-        for func in comps:
-            item = func()
+        if index not in self.tab_items:
+            self.tab_items[index] = [registry.LazyItem(entry) for entry
+                                     in registry.entries(RigType(index))]
+        for item in self.tab_items[index]:
             self.ui_list_widget.addItem(item)
 
         # clear item
@@ -137,9 +203,36 @@ class AutoRiggerWindow(QtWidgets.QMainWindow):
 
     def create_rig(self):
         """
-        Build the Rig based on the to_build list and guide
+        Build the Rig based on the to_build list and guide, in chunks
+        so the window stays responsive
+        """
+        if not self.item or not self.item.rig or self.runner:
+            return
+
+        self.runner = BuildRunner(self.item.rig, self)
+        self.runner.finished.connect(self.finish_rig)
+        self.ui_build_btn.setEnabled(False)
+        self.ui_guide_btn.setEnabled(False)
+        self.runner.start()
+
+    def finish_rig(self, success):
+        """
+        Clean up after a chunked build completed or got cancelled
+
+        :param success: bool. whether the build completed
+        """
+        self.runner.deleteLater()
+        self.runner = None
+        self.ui_build_btn.setEnabled(True)
+        self.ui_guide_btn.setEnabled(True)
+
+    def closeEvent(self, event):
+        """
+        Override: cancel and roll back a build still running
         """
-        self.item.build_rig()
+        if self.runner:
+            self.runner.cancel()
+        super(AutoRiggerWindow, self).closeEvent(event)
 
     def empty_scene(self):
         """
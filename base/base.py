@@ -1,11 +1,12 @@
 import os
 
-import maya.cmds as cmds
-from Qt import QtWidgets, QtGui, _loadUi
+from Qt import QtWidgets, QtGui
 
 from .. import util, shape
+from ..uicache import load_ui
 from ..base import bone
 from ..constant import Side, UI_DIR
+from ..scene import cmds
 from ..utility.rigging import transform
 
 
@@ -14,7 +15,6 @@ class BaseItem(bone.RigItem):
         """Override"""
         super(BaseItem, self).__init__(name)
         self.base_ui = 'base.ui'
-        self.init_base()
 
     def build_guide(self, side, base_name):
         """Override"""
@@ -28,7 +28,7 @@ class BaseItem(bone.RigItem):
     def init_base(self):
         """Override"""
         self.base_widget = QtWidgets.QWidget()
-        _loadUi(os.path.join(UI_DIR, self.base_ui), self.base_widget)
+        load_ui(os.path.join(UI_DIR, self.base_ui), self.base_widget)
 
         for side in Side:
             self.base_widget.ui_side_cbox.addItem(side.value)
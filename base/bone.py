@@ -1,17 +1,32 @@
 import os
 from functools import wraps
 
-import maya.cmds as cmds
 from Qt import QtWidgets, QtGui
 
-from .. import util
+from . import profiler
+from .. import shape, util
 from ..constant import Side, ICON_DIR
+from ..scene import cmds
 from ..utility.useful import strGenerator
 from ..utility.datatype import color
 from ..utility.rigging import transform
 
 
-TMP_PREFIX = 'tmp_'
+TMP_PREFIX = util.TMP_PREFIX
+
+# stages of build_guide and build_rig, each runs over the whole rig tree
+GUIDE_STAGES = ('create_namespace', 'create_locator', 'color_locator')
+RIG_STAGES = (
+    'create_joint',
+    'set_shape',
+    'place_controller',
+    'delete_guide',
+    'delete_shape',
+    'color_controller',
+    'add_constraint',
+    'lock_controller'
+)
+
 Yellow = color.ColorRGB.yellow()
 Blue = color.ColorRGB.blue()
 Red = color.ColorRGB.red()
@@ -62,6 +77,20 @@ class RigItem(QtWidgets.QListWidgetItem):
         # rig component object
         self._obj = None
 
+    @property
+    def rig(self):
+        return self._obj
+
+    def load_widgets(self):
+        """
+        Create the property widgets on first use, they are kept and reused
+        afterwards
+        """
+        if self.base_widget is None and self.base_ui:
+            self.init_base()
+        if self.extra_widget is None and self.extra_ui:
+            self.init_extra()
+
     def init_base(self):
         """
         Initializing the base_widget attribute which is a QWidget object
@@ -303,7 +332,8 @@ class Bone(object):
         """
         Delete controller temp shape to de-clutter the scene
         """
-        cmds.delete(cmds.ls('{}*'.format(TMP_PREFIX)))
+        util.TEMP.flush()
+        shape.CACHE.clear()
 
     def lock_controller(self):
         """
@@ -315,19 +345,14 @@ class Bone(object):
         """
         Create the entire rig guide setup
         """
-        self.create_namespace()
-        self.create_locator()
-        self.color_locator()
+        with profiler.auto(self, 'build_guide'):
+            for stage in GUIDE_STAGES:
+                getattr(self, stage)()
 
     def build_rig(self):
         """
         Build the full rig system based on the guide
         """
-        self.create_joint()
-        self.set_shape()
-        self.place_controller()
-        self.delete_guide()
-        self.delete_shape()
-        self.color_controller()
-        self.add_constraint()
-        self.lock_controller()
+        with profiler.auto(self, 'build_rig'):
+            for stage in RIG_STAGES:
+                getattr(self, stage)()
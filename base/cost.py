@@ -0,0 +1,378 @@
+"""
+Estimate how expensive a built rig is to evaluate, per rig component
+
+The analysis walks the scene graph a rig tree built: every component
+claims the nodes it named (joints, controllers, offsets, IK handles,
+clusters...), then the nodes hanging off them (shapes, constraints,
+driven-key curves, utility nodes) go to the closest claiming component.
+Each component gets its node counts by type, connection fan-out,
+dependency depth and a per-frame cost score weighing every node by its
+type and every outgoing connection:
+
+    rig.build_rig()
+    analysis = cost.analyze(rig)
+    print(analysis.report())
+    analysis.save('biped_cost.json')
+    cost.assert_budget(analysis, {'score': 2000, 'animCurveUU': 0})
+
+The score is a relative estimate to compare build modes (e.g. constraints
+against matrix networks) and to set budgets, not a timing.
+"""
+
+import json
+from collections import OrderedDict, deque
+
+from . import plan
+from .bone import Bone
+from ..scene import cmds
+
+
+# relative per-frame cost of a node by type, a transform being 1.0
+COSTS = {
+    'transform': 1.0,
+    'joint': 1.5,
+    'locator': 0.2,
+    'nurbsCurve': 0.5,
+    'parentConstraint': 4.0,
+    'pointConstraint': 2.0,
+    'orientConstraint': 2.5,
+    'aimConstraint': 3.0,
+    'scaleConstraint': 2.0,
+    'poleVectorConstraint': 2.0,
+    'animCurveUU': 1.5,
+    'animCurveUA': 1.5,
+    'animCurveUL': 1.5,
+    'cluster': 6.0,
+    'clusterHandle': 0.5,
+    'ikHandle': 10.0,
+    'ikEffector': 1.0,
+    'multMatrix': 1.0,
+    'wtAddMatrix': 1.5,
+    'decomposeMatrix': 1.5,
+    'pointMatrixMult': 1.0,
+    'blendColors': 0.5,
+    'reverse': 0.5,
+    'plusMinusAverage': 0.5,
+    'multiplyDivide': 0.5,
+    'condition': 0.5,
+    'distanceBetween': 1.0,
+    'curveInfo': 3.0,
+}
+DEFAULT_COST = 1.0
+
+# cost of every outgoing connection, i.e. a plug to propagate dirty to
+CONNECTION_COST = 0.1
+
+# shared scene nodes the graph walk never crosses into
+SKIPPED_TYPES = (
+    'time', 'defaultRenderUtilityList', 'objectSet', 'shadingEngine',
+    'displayLayer', 'renderLayer', 'dagPose', 'hyperLayout',
+    'nodeGraphEditorInfo',
+)
+
+# inputs a node doesn't evaluate its source node for: static or
+# structural plugs, e.g. constraints reading the constrained node's
+# parentInverseMatrix or IK handles holding their joints by message
+STATIC_ATTRS = (
+    'message', 'msg', 'parentInverseMatrix', 'pim', 'rotateOrder', 'ro',
+    'jointOrient', 'jo', 'rotatePivot', 'rp', 'rotatePivotTranslate',
+    'rpt',
+)
+
+
+class Analysis(object):
+    """
+    Evaluation cost of the nodes built by a rig tree
+    """
+
+    def __init__(self, rig):
+        """
+        Initialization
+
+        :param rig: Bone. root rig component with its rig built
+        """
+        self.rig = rig
+        # node name to its type, owner path, fan-out, depth and cost
+        self.nodes = OrderedDict()
+        # node name to the nodes evaluated after it
+        self.edges = dict()
+        # nodes on or behind a dependency cycle
+        self.cycles = list()
+
+    def collect(self):
+        """
+        Walk the scene graph from the nodes each component named,
+        attributing every reached node to the closest component
+        """
+        guides = set()
+        for _, comp in plan.walk(self.rig):
+            guides.update(plan.resources(comp)['locs'])
+
+        # children come first, so sub-components claim shared names
+        owners = OrderedDict()
+        queue = deque()
+        for path, comp in plan.walk(self.rig):
+            for node in _seeds(comp):
+                if node not in owners and node not in guides and \
+                        cmds.objExists(node):
+                    owners[node] = path
+                    queue.append(node)
+
+        inputs = dict()
+        children = dict()
+        custom = dict()
+        while queue:
+            node = queue.popleft()
+            targets = cmds.listConnections(node, s=0, d=1, p=1, sh=1) or []
+            sources = cmds.listConnections(node, s=1, d=0, p=1, sh=1) or []
+            inputs[node] = [plug.partition('.')[::2] for plug in sources]
+            children[node] = cmds.listRelatives(node, c=1) or []
+            custom[node] = set(cmds.listAttr(node, ud=1) or [])
+            self.nodes[node] = {
+                'type': cmds.nodeType(node),
+                'owner': owners[node],
+                'fanout': len(targets),
+            }
+
+            neighbours = [plug.partition('.')[0] for plug in targets]
+            neighbours.extend(source for source, _ in inputs[node])
+            neighbours.extend(children[node])
+            for other in neighbours:
+                if other in owners or other in guides:
+                    continue
+                if cmds.nodeType(other) in SKIPPED_TYPES:
+                    continue
+                owners[other] = owners[node]
+                queue.append(other)
+
+        # dependencies: connections, and parents before their children
+        # (constraints only read their parent's static plugs); user
+        # defined attributes (e.g. the FK/IK switch) don't depend on the
+        # rest of their node
+        self.edges = dict((node, set()) for node in self.nodes)
+        for node in self.nodes:
+            for source, attr in inputs[node]:
+                attr = attr.partition('[')[0]
+                if source in self.nodes and source != node and \
+                        attr not in STATIC_ATTRS and \
+                        attr not in custom[source]:
+                    self.edges[source].add(node)
+            for child in children[node]:
+                if child in self.nodes and not \
+                        self.nodes[child]['type'].endswith('Constraint'):
+                    self.edges[node].add(child)
+
+    def measure(self):
+        """
+        Compute each node's dependency depth, the longest chain of nodes
+        evaluated before it, and its cost; nodes on or behind a dependency
+        cycle get no depth
+        """
+        inputs = dict((node, 0) for node in self.nodes)
+        for edges in self.edges.values():
+            for other in edges:
+                inputs[other] += 1
+
+        level = dict((node, 0) for node in self.nodes)
+        queue = deque(node for node, count in inputs.items() if not count)
+        done = set()
+        while queue:
+            node = queue.popleft()
+            done.add(node)
+            for other in self.edges[node]:
+                level[other] = max(level[other], level[node] + 1)
+                inputs[other] -= 1
+                if not inputs[other]:
+                    queue.append(other)
+
+        self.cycles = [node for node in self.nodes if node not in done]
+        for node, info in self.nodes.items():
+            info['depth'] = level[node] if node in done else None
+            info['cost'] = COSTS.get(info['type'], DEFAULT_COST) + \
+                CONNECTION_COST * info['fanout']
+
+    def components(self):
+        """
+        :return: OrderedDict. component path to its summary, in build
+                 order
+        """
+        owned = OrderedDict((path, list()) for path, _ in
+                            plan.walk(self.rig))
+        for node, info in self.nodes.items():
+            owned[info['owner']].append(node)
+
+        return OrderedDict((path, self.summarize(nodes))
+                           for path, nodes in owned.items())
+
+    def summarize(self, nodes):
+        """
+        :param nodes: list. node names
+        :return: dict. node counts by type, fan-out, depth and score
+        """
+        types = dict()
+        for node in nodes:
+            node_type = self.nodes[node]['type']
+            types[node_type] = types.get(node_type, 0) + 1
+
+        cycles = set(self.cycles)
+        fanouts = [self.nodes[node]['fanout'] for node in nodes]
+        depths = [self.nodes[node]['depth'] for node in nodes
+                  if self.nodes[node]['depth'] is not None]
+        return {
+            'nodes': len(nodes),
+            'types': types,
+            'connections': sum(fanouts),
+            'fanout': max(fanouts) if fanouts else 0,
+            'depth': max(depths) if depths else 0,
+            'cycles': len([node for node in nodes if node in cycles]),
+            'score': round(sum(self.nodes[node]['cost'] for node in nodes),
+                           3),
+        }
+
+    def total(self):
+        """
+        :return: dict. summary of every analysed node
+        """
+        return self.summarize(list(self.nodes))
+
+    def count(self, path=None, node_type=None):
+        """
+        :param path: str. component path to count, any when None
+        :param node_type: str. node type to count, any when None
+        :return: int. number of matching nodes
+        """
+        return len([info for info in self.nodes.values()
+                    if (path is None or info['owner'] == path)
+                    and (node_type is None or info['type'] == node_type)])
+
+    def report(self, top=3):
+        """
+        Format the per-component summaries as a table
+
+        :param top: int. most frequent node types listed per component
+        :return: str.
+        """
+        lines = ['{:<40} {:>6} {:>6} {:>6} {:>9}  {}'.format(
+            'component', 'nodes', 'fanout', 'depth', 'score', 'top types')]
+        rows = list(self.components().items()) + [('total', self.total())]
+        for path, summary in rows:
+            types = sorted(summary['types'].items(),
+                           key=lambda item: (-item[1], item[0]))[:top]
+            lines.append('{:<40} {:>6} {:>6} {:>6} {:>9.1f}  {}'.format(
+                path[-40:], summary['nodes'], summary['fanout'],
+                summary['depth'], summary['score'],
+                ', '.join('{} {}'.format(k, v) for k, v in types)))
+        if self.cycles:
+            lines.append('{} nodes on or behind dependency cycles'.format(
+                len(self.cycles)))
+        return '\n'.join(lines)
+
+    def to_dict(self):
+        return {
+            'total': self.total(),
+            'components': self.components(),
+            'cycles': self.cycles,
+            'nodes': self.nodes,
+        }
+
+    def save(self, path):
+        """
+        :param path: str. output JSON file path
+        """
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=1)
+
+
+def analyze(rig):
+    """
+    Analyse the evaluation cost of a built rig tree
+
+    :param rig: Bone. root rig component with its rig built
+    :return: Analysis.
+    """
+    analysis = Analysis(rig)
+    analysis.collect()
+    analysis.measure()
+    return analysis
+
+
+def compare(before, after):
+    """
+    Compare the totals of two analyses, e.g. of two build modes
+
+    :param before: Analysis or dict. analysis or its saved JSON data
+    :param after: Analysis or dict. analysis or its saved JSON data
+    :return: dict. metric or node type to (before, after), changed only
+    """
+    totals = [item.total() if isinstance(item, Analysis) else item['total']
+              for item in (before, after)]
+    changes = dict()
+    for key in ('nodes', 'connections', 'fanout', 'depth', 'cycles',
+                'score'):
+        if totals[0][key] != totals[1][key]:
+            changes[key] = (totals[0][key], totals[1][key])
+    for key in set(totals[0]['types']) | set(totals[1]['types']):
+        counts = [total['types'].get(key, 0) for total in totals]
+        if counts[0] != counts[1]:
+            changes[key] = tuple(counts)
+    return changes
+
+
+def check_budget(analysis, budget):
+    """
+    Compare an analysis with a budget
+
+    :param analysis: Analysis.
+    :param budget: dict. maximum values keyed by metric ('score',
+                   'nodes', 'connections', 'fanout', 'depth', 'cycles')
+                   or node type ('animCurveUU'), optionally prefixed by a
+                   component path ('biped/arm_l_arm:score')
+    :return: list. (key, limit, value) of every exceeded budget entry
+    """
+    components = analysis.components()
+    over = list()
+    for key, limit in sorted(budget.items()):
+        path, _, metric = key.rpartition(':')
+        summary = components.get(path) if path else analysis.total()
+        if summary is None:
+            raise KeyError('{} is not part of the rig tree'.format(path))
+        value = summary[metric] if metric in summary else \
+            summary['types'].get(metric, 0)
+        if value > limit:
+            over.append((key, limit, value))
+    return over
+
+
+def assert_budget(analysis, budget):
+    """
+    Raise when any evaluation cost budget is exceeded
+
+    :param analysis: Analysis.
+    :param budget: dict. see check_budget()
+    """
+    over = check_budget(analysis, budget)
+    if over:
+        raise AssertionError('Evaluation cost budget exceeded: {}'.format(
+            ', '.join('{} {} > {}'.format(k, v, l) for k, l, v in over)))
+
+
+def _seeds(comp):
+    """
+    :return: list. names a component and the sub-rigs it builds itself
+             (e.g. the FK and IK chain) hold, in plain or list attributes
+    """
+    names = list()
+    stack = [comp]
+    while stack:
+        item = stack.pop()
+        for key, value in vars(item).items():
+            if key.startswith('_'):
+                continue
+            if isinstance(value, Bone):
+                if value not in item.components:
+                    stack.append(value)
+            elif isinstance(value, str):
+                names.append(value)
+            elif isinstance(value, list):
+                names.extend(v for v in value if isinstance(v, str))
+    return names
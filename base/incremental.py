@@ -0,0 +1,273 @@
+"""
+Incremental rig rebuild, regenerating only components whose guide changed
+
+An incremental build keeps the guides in the scene, records the scene
+operations of every build step and hashes each component's guide world
+matrices and parameters. On rebuild, components whose hash changed are torn
+down and rebuilt along with their subtree (e.g. the Hand under an Arm),
+then the stitching their ancestors did (e.g. Biped parenting the arm under
+the spine) is replayed for the rebuilt nodes only:
+
+    build = incremental.IncrementalBuild(rig)
+    build.build()
+    # ... move some guide locators
+    build.rebuild()
+"""
+
+import hashlib
+import json
+
+from . import plan
+from .. import util
+from ..scene import cmds, record
+
+
+# stages not run by an incremental build, guides are kept for editing
+SKIPPED_STAGES = ('delete_guide',)
+
+# digits kept of guide matrices when hashing
+PRECISION = 5
+
+
+class IncrementalBuild(object):
+    """
+    Build a rig step by step, keeping enough state to rebuild parts of it
+    """
+
+    def __init__(self, rig):
+        """
+        Initialization
+
+        :param rig: Bone. root rig component with its guide built
+        """
+        self.rig = rig
+        self.plan = None
+        self.hashes = dict()
+        self.logs = dict()
+
+    def build(self):
+        """
+        Build the full rig, keeping the guides
+        """
+        self.plan = plan.build_plan(self.rig)
+        self.logs = dict()
+        self._run(self.plan.order())
+        self.hashes = self.hash()
+
+    def hash(self):
+        """
+        :return: dict. component path to hash of its guide and parameters
+        """
+        return dict((path, component_hash(comp))
+                    for path, comp in plan.walk(self.rig))
+
+    def dirty(self):
+        """
+        :return: list. paths of the components whose hash changed
+        """
+        current = self.hash()
+        return [path for path, value in current.items()
+                if self.hashes.get(path) != value]
+
+    def rebuild(self):
+        """
+        Tear down and rebuild the components whose guide or parameters
+        changed since the last build
+
+        :return: list. paths of the rebuilt subtree roots
+        """
+        if self.plan is None:
+            raise RuntimeError('Build the rig before rebuilding it')
+
+        roots = _subtree_roots(self.dirty())
+        if not roots:
+            return roots
+
+        cmds.undoInfo(openChunk=1, chunkName='autoRigger_rebuild')
+        try:
+            for root in roots:
+                self._rebuild(root)
+        finally:
+            cmds.undoInfo(closeChunk=1)
+
+        self.hashes = self.hash()
+        return roots
+
+    def _rebuild(self, root):
+        steps = self.plan.order()
+        inside = [s for s in steps if _within(s.path, root)]
+        # global steps (e.g. deleting the temporary shapes) aren't stitching
+        stitches = [s for s in steps if _above(s.path, root) and
+                    s.stage not in plan.GLOBAL_STAGES + SKIPPED_STAGES]
+
+        nodes = set()
+        for step in inside:
+            nodes.update(_created(self.logs.get(step.key, ())))
+        _, comp = _find(self.rig, root)
+        owned = plan.resources(comp)
+        for name in ('jnts', 'ctrls', 'offsets'):
+            nodes.update(owned[name])
+
+        # ancestor operations touching the subtree get redone afterwards
+        replay = list()
+        for step in stitches:
+            for op in self.logs.get(step.key, ()):
+                if _references(op, nodes):
+                    replay.append(op)
+                    nodes.update(_created([op]))
+
+        self._teardown(nodes, set(owned['locs']))
+        self._run(inside)
+
+        # replay within the rebuild undo chunk, skipping operations on nodes
+        # gone since they were recorded
+        created = set()
+        replay = [op for op in replay if _resolvable(op, created)]
+        record.replay(replay, chunk=None)
+
+    def _teardown(self, nodes, guides):
+        """
+        Delete the nodes built for a subtree, moving foreign children
+        (e.g. other components' joints) out of the way first
+        """
+        existing = cmds.ls(list(nodes)) if nodes else []
+        existing = [n for n in existing if n not in guides]
+        doomed = set(existing)
+        for node in existing:
+            children = cmds.listRelatives(
+                node, c=1, type=['transform', 'joint']) or []
+            for child in children:
+                if child not in doomed and child not in guides:
+                    cmds.parent(child, w=1)
+
+        # driven key curves of the subtree would be left disconnected
+        sources = set()
+        if existing:
+            sources.update(cmds.listConnections(existing, s=1, d=0) or [])
+        for node in sources - doomed:
+            if cmds.nodeType(node).startswith('animCurve') and set(
+                    cmds.listConnections(node, s=0, d=1) or []) <= doomed:
+                existing.append(node)
+        if existing:
+            cmds.delete(existing)
+
+    def _run(self, steps):
+        comps = dict(plan.walk(self.rig))
+        for step in steps:
+            if step.stage in SKIPPED_STAGES:
+                continue
+            with record.recording() as log:
+                if step.stage in plan.GLOBAL_STAGES:
+                    getattr(self.rig, step.stage)()
+                else:
+                    plan.run_step(comps[step.path], step.stage)
+            self.logs[step.key] = log
+
+        # steps of a partial rebuild don't include the global shape cleanup
+        util.TEMP.flush()
+
+
+def component_hash(comp):
+    """
+    Hash a component's guide locator world matrices and parameters
+
+    :param comp: Bone. rig component
+    :return: str.
+    """
+    data = {'params': plan.params(comp), 'guides': list()}
+    for loc in plan.resources(comp)['locs']:
+        if cmds.objExists(loc):
+            matrix = cmds.xform(loc, q=1, m=1, ws=1)
+            data['guides'].append(
+                [loc, [round(v, PRECISION) for v in matrix]])
+
+    text = json.dumps(data, sort_keys=True, default=str)
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+def _within(path, root):
+    return path == root or path.startswith(root + '/')
+
+
+def _above(path, root):
+    return root.startswith(path + '/')
+
+
+def _subtree_roots(paths):
+    """
+    :return: list. the given paths without those inside another one
+    """
+    paths = sorted(paths)
+    return [p for p in paths
+            if not any(_within(p, other) for other in paths if other != p)]
+
+
+def _find(rig, path):
+    for item in plan.walk(rig):
+        if item[0] == path:
+            return item
+    raise KeyError('{} is not part of the rig tree'.format(path))
+
+
+def _created(ops):
+    """
+    :return: set. names of the nodes created by recorded operations
+    """
+    names = set()
+    for op in ops:
+        # created nodes keep belonging to the log under their new name
+        if op.command == 'rename' and op.args and op.args[0] in names:
+            names.add(op.result)
+        if op.kind not in ('create', 'constraint'):
+            continue
+        result = op.result if isinstance(op.result, list) else [op.result]
+        names.update(r for r in result if isinstance(r, str))
+    return names
+
+
+def _node_args(op):
+    """
+    :return: list. node names an operation's positional arguments refer to
+    """
+    args = op.args[:1] if op.command in ('setAttr', 'addAttr') else op.args
+    names = list()
+    stack = list(args)
+    while stack:
+        value = stack.pop()
+        if isinstance(value, (list, tuple)):
+            stack.extend(value)
+        elif isinstance(value, str):
+            names.append(value.partition('.')[0])
+    return names
+
+
+def _resolvable(op, created):
+    """
+    Check the nodes an operation works on exist, either in the scene or
+    created by earlier accepted operations
+
+    :param op: Operation. recorded operation
+    :param created: set. names created by the accepted operations, updated
+    :return: bool.
+    """
+    if not all(name in created or cmds.objExists(name)
+               for name in _node_args(op)):
+        return False
+    created.update(_created([op]))
+    return True
+
+
+def _references(op, nodes):
+    """
+    :return: bool. whether a recorded operation mentions any of the nodes
+    """
+    stack = [op.args, op.kwargs]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, dict):
+            stack.extend(value.values())
+        elif isinstance(value, (list, tuple)):
+            stack.extend(value)
+        elif isinstance(value, str) and value.partition('.')[0] in nodes:
+            return True
+    return False
@@ -0,0 +1,389 @@
+"""
+Plan a rig build as a graph of steps and apply it in dependency order
+
+A step is one build_rig stage of one rig component, run without recursing
+into the component's children. Each step declares the scene nodes it reads,
+writes and deletes, and the planner derives the dependency edges from those
+declarations plus the component hierarchy (a parent stitches its children
+together only after they are built).
+
+Planning only looks at the component tree and never touches the scene, so
+it can run off the main thread and a plan can be cached as JSON; apply()
+is the half that issues scene commands:
+
+    rig.build_guide()
+    steps = plan.build_plan(rig)
+    plan.apply(steps, rig)
+"""
+
+import hashlib
+import json
+from collections import OrderedDict
+from enum import Enum
+
+from .bone import Bone, RIG_STAGES
+
+
+# naming lists of a component each stage reads, writes and deletes
+STAGE_IO = {
+    'create_joint': (('locs',), ('jnts',), ()),
+    'set_shape': ((), ('shape',), ()),
+    'place_controller': (('locs', 'jnts', 'shape'), ('ctrls', 'offsets'), ()),
+    'delete_guide': (('locs',), (), ('locs',)),
+    'delete_shape': (('shape',), (), ('shape',)),
+    'color_controller': (('ctrls',), (), ()),
+    'add_constraint': (('jnts', 'ctrls', 'offsets'), (), ()),
+    'lock_controller': (('ctrls',), (), ()),
+}
+
+# guide locators get re-parented across components (e.g. hand under arm),
+# so deleting any guide has to wait for every step reading one
+GUIDE = '#guide'
+
+# controller templates are deleted together by a single root step
+GLOBAL_STAGES = ('delete_shape',)
+
+# attributes set by the build itself rather than describing the component
+BUILD_ATTRS = ('_shape',)
+
+
+class Step(object):
+    """
+    A single build stage of a single rig component
+    """
+
+    def __init__(self, path, stage, reads=(), writes=(), deletes=(),
+                 depends=()):
+        """
+        Initialization
+
+        :param path: str. component path in the rig tree
+        :param stage: str. Bone method name of the stage
+        :param reads: iterable. scene resources the step reads
+        :param writes: iterable. scene resources the step creates
+        :param deletes: iterable. scene resources the step deletes
+        :param depends: iterable. keys of steps to run beforehand
+        """
+        self.path = path
+        self.stage = stage
+        self.reads = sorted(set(reads))
+        self.writes = sorted(set(writes))
+        self.deletes = sorted(set(deletes))
+        self.depends = sorted(set(depends))
+
+    @property
+    def key(self):
+        return '{}:{}'.format(self.path, self.stage)
+
+    def to_dict(self):
+        return {
+            'path': self.path,
+            'stage': self.stage,
+            'reads': self.reads,
+            'writes': self.writes,
+            'deletes': self.deletes,
+            'depends': self.depends,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
+
+    def __repr__(self):
+        return '<Step {}>'.format(self.key)
+
+
+class Plan(object):
+    """
+    Build steps of a rig tree and their dependencies, kept in the order
+    the recursive build_rig would run them
+    """
+
+    def __init__(self, steps=()):
+        """
+        Initialization
+
+        :param steps: iterable. Step objects
+        """
+        self.steps = OrderedDict((step.key, step) for step in steps)
+
+    def __len__(self):
+        return len(self.steps)
+
+    def __iter__(self):
+        return iter(self.order())
+
+    def order(self):
+        """
+        Sort the steps topologically, ties broken by planning order
+
+        :return: list. Step objects
+        """
+        rank = dict((key, index) for index, key in enumerate(self.steps))
+        pending = dict((key, len(step.depends))
+                       for key, step in self.steps.items())
+        users = self._users()
+
+        ready = [key for key, count in pending.items() if not count]
+        ordered = list()
+        while ready:
+            ready.sort(key=rank.get, reverse=True)
+            key = ready.pop()
+            ordered.append(self.steps[key])
+            for user in users[key]:
+                pending[user] -= 1
+                if not pending[user]:
+                    ready.append(user)
+
+        if len(ordered) != len(self.steps):
+            raise RuntimeError('Build plan has a dependency cycle')
+        return ordered
+
+    def levels(self):
+        """
+        Group the steps into waves whose members don't depend on each other
+
+        :return: list. lists of Step objects
+        """
+        depth = dict()
+        for step in self.order():
+            depth[step.key] = 1 + max(
+                [depth[key] for key in step.depends] or [-1])
+
+        waves = [list() for _ in range(max(depth.values() or [-1]) + 1)]
+        for key, step in self.steps.items():
+            waves[depth[key]].append(step)
+        return waves
+
+    def dependents(self, keys):
+        """
+        :param keys: iterable. step keys
+        :return: set. keys of the given steps and every step relying on them
+        """
+        users = self._users()
+        found = set()
+        stack = [key for key in keys if key in self.steps]
+        while stack:
+            key = stack.pop()
+            if key not in found:
+                found.add(key)
+                stack.extend(users[key])
+        return found
+
+    def digest(self):
+        """
+        :return: str. hash of the plan content, usable as a cache key
+        """
+        data = json.dumps(self.to_dict(), sort_keys=True)
+        return hashlib.sha1(data.encode('utf-8')).hexdigest()
+
+    def to_dict(self):
+        return {'steps': [step.to_dict() for step in self.steps.values()]}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls([Step.from_dict(step) for step in data['steps']])
+
+    def save(self, path):
+        """
+        :param path: str. output JSON file path
+        """
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=1)
+
+    @classmethod
+    def load(cls, path):
+        """
+        :param path: str. JSON file written by save()
+        :return: Plan.
+        """
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+    def _users(self):
+        users = dict((key, list()) for key in self.steps)
+        for key, step in self.steps.items():
+            for dep in step.depends:
+                users[dep].append(key)
+        return users
+
+
+def walk(root, path=None):
+    """
+    Iterate through a rig tree children first, the order build_rig
+    visits components in
+
+    :param root: Bone. rig component with its namespace created
+    :param path: str. path of the parent component
+    :return: generator. (path, component) pairs
+    """
+    if not root.base:
+        raise RuntimeError(
+            '{} has no namespace, build the guide first'.format(root.name))
+
+    path = '{}/{}'.format(path, root.base) if path else root.base
+    for comp in root.components:
+        for item in walk(comp, path):
+            yield item
+    yield path, root
+
+
+def resources(comp):
+    """
+    Collect the scene nodes created under a component's own naming,
+    including sub-rigs it builds itself (e.g. the FK and IK chain)
+
+    :param comp: Bone. rig component
+    :return: dict. naming list name to node names
+    """
+    found = dict(locs=list(), jnts=list(), ctrls=list(), offsets=list())
+    stack = [comp]
+    while stack:
+        item = stack.pop()
+        for name in found:
+            found[name].extend(getattr(item, name))
+        stack.extend(value for value in vars(item).values()
+                     if isinstance(value, Bone)
+                     and value not in item.components)
+    return found
+
+
+def params(comp):
+    """
+    Collect the plain-valued parameters of a component (e.g. segment,
+    length, side), leaving out sub-rigs and naming lists
+
+    :param comp: Bone. rig component
+    :return: dict. attribute name to value
+    """
+    found = dict()
+    for key, value in vars(comp).items():
+        if key in BUILD_ATTRS:
+            continue
+        if isinstance(value, Enum):
+            value = value.value
+        if isinstance(value, (bool, int, float, str)):
+            found[key] = value
+        elif hasattr(value, 'as_list'):
+            found[key] = list(value.as_list)
+    return found
+
+
+def build_plan(root, stages=RIG_STAGES):
+    """
+    Plan the build_rig stages of a rig tree
+
+    :param root: Bone. rig component with its guide built
+    :param stages: iterable. stage names, in build order
+    :return: Plan.
+    """
+    comps = list(walk(root))
+    steps = list()
+    last = dict()
+    writers = dict()
+    readers = dict()
+    for stage in stages:
+        if stage in GLOBAL_STAGES:
+            targets = [comps[-1]]
+        else:
+            targets = comps
+
+        for path, comp in targets:
+            reads, writes, deletes = _stage_io(stage, path, comp, comps)
+            depends = set()
+
+            # previous stage of the same component
+            if path in last:
+                depends.add(last[path])
+
+            # children are built before their parent stitches them
+            for child in comp.components:
+                key = '{}/{}:{}'.format(path, child.base, stage)
+                if stage not in GLOBAL_STAGES:
+                    depends.add(key)
+
+            for res in reads:
+                depends.update(writers.get(res, ()))
+            for res in deletes:
+                depends.update(writers.get(res, ()))
+                depends.update(readers.get(res, ()))
+
+            step = Step(path, stage, reads, writes, deletes, depends)
+            step.depends = [key for key in step.depends if key != step.key]
+            steps.append(step)
+            last[path] = step.key
+
+            for res in writes:
+                writers.setdefault(res, set()).add(step.key)
+            for res in reads:
+                readers.setdefault(res, set()).add(step.key)
+
+    return Plan(steps)
+
+
+def _stage_io(stage, path, comp, comps):
+    """
+    :return: tuple. (reads, writes, deletes) resource names of a step
+    """
+    if stage in GLOBAL_STAGES:
+        items = comps
+    else:
+        items = [(path, comp)]
+
+    io = list()
+    for names in STAGE_IO.get(stage, ((), (), ())):
+        out = list()
+        for item_path, item in items:
+            owned = resources(item)
+            for name in names:
+                if name == 'shape':
+                    out.append('{}#shape'.format(item_path))
+                else:
+                    out.extend(owned[name])
+        io.append(out)
+
+    reads, writes, deletes = io
+    if 'locs' in STAGE_IO.get(stage, ((),))[0]:
+        reads.append(GUIDE)
+    if stage == 'delete_guide':
+        deletes.append(GUIDE)
+    return reads, writes, deletes
+
+
+def run_step(comp, stage):
+    """
+    Run one build stage on a component without recursing into its children
+
+    :param comp: Bone. rig component
+    :param stage: str. Bone method name of the stage
+    """
+    comps = comp.components[:]
+    del comp.components[:]
+    try:
+        getattr(comp, stage)()
+    finally:
+        comp.components[:] = comps
+
+
+def apply(plan, root, skip=()):
+    """
+    Apply a build plan to the scene
+
+    :param plan: Plan. steps planned from the same rig tree
+    :param root: Bone. rig component the plan was made for
+    :param skip: iterable. component paths whose subtrees are left as is
+    :return: list. keys of the steps run
+    """
+    comps = dict(walk(root))
+    skip = tuple(skip)
+
+    done = list()
+    for step in plan.order():
+        if any(step.path == p or step.path.startswith(p + '/') for p in skip):
+            continue
+        if step.path not in comps:
+            raise KeyError('{} is not part of the rig tree'.format(step.path))
+
+        run_step(comps[step.path], step.stage)
+        done.append(step.key)
+    return done
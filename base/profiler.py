@@ -0,0 +1,265 @@
+"""
+Opt-in build profiler recording wall time, scene command counts and
+memory deltas per stage and per rig component
+
+Wrap a build in profile() to get a hierarchical report:
+
+    with profiler.profile(rig, 'build_rig') as prof:
+        rig.build_rig()
+    print(prof.report())
+    prof.save('build_rig.json')
+
+Setting the AUTORIGGER_PROFILE env var profiles every build_guide and
+build_rig, logging the report; when the value is a directory the JSON
+report is saved there as well
+"""
+
+import json
+import logging
+import os
+from contextlib import contextmanager
+from timeit import default_timer
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+from ..scene import Layer, use
+
+
+PROFILE_ENV = 'AUTORIGGER_PROFILE'
+
+LOG = logging.getLogger(__name__)
+
+# last profile recorded through the env var
+LAST = [None]
+
+
+class Frame(object):
+    """
+    Measurements of one stage run on one component, nested calls
+    (e.g. the same stage on child components) are kept as children
+    """
+
+    def __init__(self, name, stage=None):
+        """
+        Initialization
+
+        :param name: str. component name
+        :param stage: str. stage (Bone method) name
+        """
+        self.name = name
+        self.stage = stage
+        self.time = 0.0
+        self.memory = None
+        self.calls = dict()
+        self.children = list()
+
+    @property
+    def self_time(self):
+        return self.time - sum(child.time for child in self.children)
+
+    @property
+    def total_calls(self):
+        return sum(self.calls.values()) + sum(
+            child.total_calls for child in self.children)
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'stage': self.stage,
+            'time': self.time,
+            'self_time': self.self_time,
+            'memory': self.memory,
+            'calls': self.calls,
+            'total_calls': self.total_calls,
+            'children': [child.to_dict() for child in self.children],
+        }
+
+
+class Profile(Layer):
+    """
+    Scene layer counting the commands issued by each profiled frame
+    """
+
+    def __init__(self, name='build', memory=True):
+        """
+        Initialization
+
+        :param name: str. name of the root frame
+        :param memory: bool. record tracemalloc deltas when available
+        """
+        super(Profile, self).__init__()
+        self.root = Frame(name)
+        self.memory = memory and tracemalloc is not None
+        self._stack = [self.root]
+
+    def call(self, name, func, args, kwargs):
+        """Override"""
+        calls = self._stack[-1].calls
+        calls[name] = calls.get(name, 0) + 1
+        return func(*args, **kwargs)
+
+    @contextmanager
+    def measure(self, frame):
+        """
+        Time a frame and attribute the scene commands run meanwhile to it
+
+        :param frame: Frame.
+        """
+        if frame is not self.root:
+            self._stack[-1].children.append(frame)
+            self._stack.append(frame)
+
+        memory = tracemalloc.get_traced_memory()[0] if self.memory else None
+        start = default_timer()
+        try:
+            yield frame
+        finally:
+            frame.time += default_timer() - start
+            if self.memory:
+                frame.memory = tracemalloc.get_traced_memory()[0] - memory
+            if frame is not self.root:
+                self._stack.pop()
+
+    def instrument(self, rig, stages):
+        """
+        Wrap the stage methods of every component in a rig tree
+
+        :param rig: Bone. root rig component
+        :param stages: iterable. stage (Bone method) names
+        :return: function. restores the original methods
+        """
+        patched = list()
+        for comp in _iter_bones(rig):
+            for stage in stages:
+                if stage in vars(comp):
+                    continue
+                setattr(comp, stage, self._wrap(comp, stage))
+                patched.append((comp, stage))
+
+        def restore():
+            for item, name in patched:
+                delattr(item, name)
+        return restore
+
+    def _wrap(self, comp, stage):
+        method = getattr(comp, stage)
+
+        def wrapper(*args, **kwargs):
+            frame = Frame(comp.name, stage)
+            try:
+                with self.measure(frame):
+                    return method(*args, **kwargs)
+            finally:
+                # the base name only exists once the namespace is created
+                frame.name = comp.base or comp.name
+        return wrapper
+
+    def report(self, threshold=0.0):
+        """
+        Format the profile as an indented tree
+
+        :param threshold: float. hide frames faster than this, in seconds
+        :return: str.
+        """
+        lines = ['{:<56} {:>9} {:>9} {:>7} {:>10}'.format(
+            'stage / component', 'total(s)', 'self(s)', 'cmds', 'mem(KiB)')]
+
+        def add(frame, depth):
+            label = '  ' * depth + ' '.join(
+                item for item in (frame.stage, frame.name) if item)
+            memory = '-' if frame.memory is None else \
+                '{:.1f}'.format(frame.memory / 1024.0)
+            lines.append('{:<56} {:>9.4f} {:>9.4f} {:>7} {:>10}'.format(
+                label[:56], frame.time, frame.self_time,
+                frame.total_calls, memory))
+            for child in frame.children:
+                if child.time >= threshold:
+                    add(child, depth + 1)
+
+        add(self.root, 0)
+        return '\n'.join(lines)
+
+    def to_dict(self):
+        return self.root.to_dict()
+
+    def save(self, path):
+        """
+        :param path: str. output JSON file path
+        """
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=1)
+
+
+@contextmanager
+def profile(rig, name='build', stages=None, memory=True):
+    """
+    Profile the stages of a rig tree run inside the block
+
+    :param rig: Bone. root rig component
+    :param name: str. name of the root frame
+    :param stages: iterable. stage names, defaults to guide and rig stages
+    :param memory: bool. record tracemalloc deltas when available
+    :return: Profile.
+    """
+    from .bone import GUIDE_STAGES, RIG_STAGES
+
+    prof = Profile(name, memory)
+    restore = prof.instrument(rig, stages or GUIDE_STAGES + RIG_STAGES)
+
+    started = prof.memory and not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    try:
+        with use(prof), prof.measure(prof.root):
+            yield prof
+    finally:
+        restore()
+        if started:
+            tracemalloc.stop()
+
+
+@contextmanager
+def auto(rig, name):
+    """
+    Profile a build when enabled through the AUTORIGGER_PROFILE env var,
+    logging the report afterwards
+
+    :param rig: Bone. root rig component
+    :param name: str. build name (e.g. 'build_rig')
+    """
+    setting = os.environ.get(PROFILE_ENV)
+    if not setting:
+        yield None
+        return
+
+    with profile(rig, name) as prof:
+        yield prof
+
+    LAST[0] = prof
+    LOG.info('%s profile:\n%s', name, prof.report())
+    if os.path.isdir(setting):
+        prof.save(os.path.join(setting, '{}_{}.json'.format(
+            rig.base or rig.name, name)))
+
+
+def _iter_bones(rig):
+    """
+    Iterate through all components of a rig tree, including sub-rigs
+    held as attributes (e.g. the FK and IK chain of a FK/IK chain)
+    """
+    from .bone import Bone
+
+    seen = set()
+    stack = [rig]
+    while stack:
+        comp = stack.pop()
+        if id(comp) in seen:
+            continue
+        seen.add(id(comp))
+        yield comp
+        stack.extend(comp.components)
+        stack.extend(value for value in vars(comp).values()
+                     if isinstance(value, Bone))
@@ -0,0 +1,165 @@
+"""
+Save and restore rig guide placement as snapshots
+
+A snapshot holds the world matrix and parent of every guide locator in a
+rig tree plus each component's parameters. Small snapshots are saved as
+JSON, large ones (or any path ending in .npz) as a zip archive with the
+matrices in a float64 .npy entry and the rest in a JSON entry:
+
+    snapshot.save(rig, 'hero_guide.json')
+    # later, on a freshly created guide of the same rig
+    snapshot.restore(rig, 'hero_guide.json')
+"""
+
+import json
+import zipfile
+
+from . import plan
+from ..scene import cmds
+from ..shapeLib import read_npy, write_npy
+
+
+VERSION = 1
+
+# locator count above which snapshots are saved in the binary format
+BINARY_THRESHOLD = 500
+
+META_ENTRY = 'meta.json'
+MATRIX_ENTRY = 'matrices.npy'
+
+
+def capture(rig):
+    """
+    Capture the guide of a rig tree
+
+    :param rig: Bone. root rig component with its guide built
+    :return: dict. snapshot data
+    """
+    components = dict()
+    locators = list()
+    for path, comp in plan.walk(rig):
+        components[path] = {
+            'type': type(comp).__name__,
+            'params': plan.params(comp),
+        }
+        locators.extend(loc for loc in plan.resources(comp)['locs']
+                        if cmds.objExists(loc))
+
+    parent_of = dict()
+    for loc in locators:
+        parent = cmds.listRelatives(loc, p=1)
+        parent_of[loc] = parent[0] if parent else None
+
+    locators = _parents_first(locators, parent_of)
+    parents = [parent_of[loc] for loc in locators]
+    matrices = [cmds.xform(loc, q=1, m=1, ws=1) for loc in locators]
+
+    return {
+        'version': VERSION,
+        'components': components,
+        'locators': locators,
+        'parents': parents,
+        'matrices': matrices,
+    }
+
+
+def save(rig, path, binary=None):
+    """
+    Save a guide snapshot to file
+
+    :param rig: Bone. root rig component with its guide built
+    :param path: str. output file path
+    :param binary: bool. use the binary format, by default chosen from
+                   the extension and the locator count
+    :return: dict. snapshot data
+    """
+    data = capture(rig)
+    if binary is None:
+        binary = path.endswith('.npz') or \
+            len(data['locators']) > BINARY_THRESHOLD
+
+    if not binary:
+        with open(path, 'w') as f:
+            json.dump(data, f)
+        return data
+
+    meta = dict((k, v) for k, v in data.items() if k != 'matrices')
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr(META_ENTRY, json.dumps(meta))
+        archive.writestr(MATRIX_ENTRY, write_npy(data['matrices']))
+    return data
+
+
+def load(path):
+    """
+    :param path: str. file written by save()
+    :return: dict. snapshot data
+    """
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as archive:
+            data = json.loads(archive.read(META_ENTRY).decode('utf-8'))
+            data['matrices'] = read_npy(archive.read(MATRIX_ENTRY))
+        return data
+
+    with open(path) as f:
+        return json.load(f)
+
+
+def restore(rig, snapshot, strict=True):
+    """
+    Restore a guide snapshot onto a rig tree, writing each locator's world
+    matrix once, parents first
+
+    :param rig: Bone. root rig component with its guide built
+    :param snapshot: str or dict. snapshot file path or data
+    :param strict: bool. raise when the component parameters don't match
+    :return: list. snapshot locators missing from the scene
+    """
+    data = load(snapshot) if isinstance(snapshot, str) else snapshot
+    if data.get('version') != VERSION:
+        raise ValueError('Unsupported guide snapshot version: {}'.format(
+            data.get('version')))
+
+    if strict:
+        current = dict((path, plan.params(comp))
+                       for path, comp in plan.walk(rig))
+        changed = [path for path, comp in data['components'].items()
+                   if current.get(path) != comp['params']]
+        if changed:
+            raise ValueError(
+                'Guide snapshot does not match the rig: {}'.format(
+                    ', '.join(sorted(changed))))
+
+    missing = list()
+    for loc, parent, matrix in zip(
+            data['locators'], data['parents'], data['matrices']):
+        if not cmds.objExists(loc):
+            missing.append(loc)
+            continue
+
+        current = cmds.listRelatives(loc, p=1)
+        if parent and (not current or current[0] != parent) and \
+                cmds.objExists(parent):
+            cmds.parent(loc, parent)
+        cmds.xform(loc, m=matrix, ws=1)
+    return missing
+
+
+def _parents_first(locators, parent_of):
+    """
+    Order locators so each one comes after its parent locator
+
+    :param locators: list. locator names
+    :param parent_of: dict. locator name to parent name
+    :return: list. ordered locator names
+    """
+    ordered = list()
+    done = set()
+    for loc in locators:
+        chain = list()
+        while loc in parent_of and loc not in done:
+            chain.append(loc)
+            done.add(loc)
+            loc = parent_of[loc]
+        ordered.extend(reversed(chain))
+    return ordered
@@ -0,0 +1,195 @@
+"""
+Trace scene commands back to the rig component and method issuing them
+
+Every command going through the tracer is attributed to the innermost Bone
+method on the call stack (helpers like util or transform functions count
+towards the Bone method calling them), resolved to the class defining the
+method so super() calls are told apart:
+
+    with trace.tracing() as tracer:
+        rig.build_rig()
+    tracer.histogram('method')    # {'ChainIK.build_ik': {'xform': 40, ..}}
+    tracer.save('trace.json')
+    trace.assert_budget(tracer, {'ChainIK.build_ik:xform': 40})
+"""
+
+import csv
+import json
+import sys
+from collections import namedtuple
+from contextlib import contextmanager
+
+from .bone import Bone
+from ..scene import Layer, use
+
+
+# key of commands issued outside any rig component
+UNKNOWN = '<none>'
+
+
+class Call(namedtuple(
+        'Call', ['index', 'command', 'owner', 'method', 'component'])):
+    """
+    A single traced scene command
+
+    owner is the class defining the method, component the base name of the
+    rig component it ran on
+    """
+
+    @property
+    def site(self):
+        return '{}.{}'.format(self.owner, self.method)
+
+
+class Tracer(Layer):
+    """
+    Scene layer attributing each command to the Bone method issuing it
+    """
+
+    def __init__(self, inner=None):
+        super(Tracer, self).__init__(inner)
+        self.calls = list()
+        self._owners = dict()
+
+    def call(self, name, func, args, kwargs):
+        """Override"""
+        owner, method, component = self.locate()
+        self.calls.append(
+            Call(len(self.calls), name, owner, method, component))
+        return func(*args, **kwargs)
+
+    def locate(self):
+        """
+        Find the innermost Bone method on the current call stack
+
+        :return: tuple. (owner class name, method name, component name)
+        """
+        frame = sys._getframe(2)
+        while frame is not None:
+            code = frame.f_code
+            comp = frame.f_locals.get(code.co_varnames[0]) \
+                if code.co_argcount else None
+            if isinstance(comp, Bone):
+                owner = self._owners.get(code)
+                if owner is None:
+                    owner = self._owners[code] = _owner(comp, code)
+                return owner, code.co_name, comp.base or comp.name
+            frame = frame.f_back
+        return UNKNOWN, UNKNOWN, UNKNOWN
+
+    def histogram(self, by='command'):
+        """
+        Count the traced commands
+
+        :param by: str. 'command' for a flat count per command, or one of
+                   'method', 'owner', 'component' for per-command counts
+                   grouped by that key
+        :return: dict.
+        """
+        counts = dict()
+        for call in self.calls:
+            if by == 'command':
+                counts[call.command] = counts.get(call.command, 0) + 1
+                continue
+            key = call.site if by == 'method' else getattr(call, by)
+            group = counts.setdefault(key, dict())
+            group[call.command] = group.get(call.command, 0) + 1
+        return counts
+
+    def count(self, site=None, command=None):
+        """
+        :param site: str. 'Class.method' to count, any when None
+        :param command: str. command to count, any when None
+        :return: int. number of matching calls
+        """
+        return len([c for c in self.calls
+                    if (site is None or c.site == site)
+                    and (command is None or c.command == command)])
+
+    def save(self, path):
+        """
+        Export the flat trace and the histograms as JSON
+
+        :param path: str. output JSON file path
+        """
+        data = {
+            'calls': [call._asdict() for call in self.calls],
+            'commands': self.histogram('command'),
+            'methods': self.histogram('method'),
+            'components': self.histogram('component'),
+        }
+        with open(path, 'w') as f:
+            json.dump(data, f, indent=1)
+
+    def save_csv(self, path):
+        """
+        Export the flat trace as CSV, one row per command
+
+        :param path: str. output CSV file path
+        """
+        with open(path, 'w') as f:
+            writer = csv.writer(f)
+            writer.writerow(Call._fields)
+            writer.writerows(self.calls)
+
+
+@contextmanager
+def tracing(backend=None):
+    """
+    Trace every scene command issued inside the block
+
+    :param backend: object. backend to execute on, defaults to the active one
+    :return: Tracer.
+    """
+    tracer = Tracer(backend)
+    with use(tracer):
+        yield tracer
+
+
+def check_budget(tracer, budget):
+    """
+    Compare the traced calls with a call-count budget
+
+    :param tracer: Tracer.
+    :param budget: dict. maximum counts keyed by command ('xform'),
+                   method ('ChainIK.build_ik') or both
+                   ('ChainIK.build_ik:xform')
+    :return: list. (key, limit, count) of every exceeded budget entry
+    """
+    over = list()
+    for key, limit in sorted(budget.items()):
+        site, _, command = key.rpartition(':')
+        if not site and '.' in command:
+            site, command = command, None
+        count = tracer.count(site or None, command)
+        if count > limit:
+            over.append((key, limit, count))
+    return over
+
+
+def assert_budget(tracer, budget):
+    """
+    Raise when any call-count budget is exceeded
+
+    :param tracer: Tracer.
+    :param budget: dict. see check_budget()
+    """
+    over = check_budget(tracer, budget)
+    if over:
+        raise AssertionError('Scene command budget exceeded: {}'.format(
+            ', '.join('{} {} > {}'.format(k, c, l) for k, l, c in over)))
+
+
+def _owner(comp, code):
+    """
+    :return: str. name of the class in the component's MRO defining code
+    """
+    for cls in type(comp).__mro__:
+        func = vars(cls).get(code.co_name)
+        func = getattr(func, '__func__', func)
+        # unwrap decorated methods (e.g. update_base_name)
+        while func is not None and getattr(func, '__code__', None) is not code:
+            func = getattr(func, '__wrapped__', None)
+        if func is not None:
+            return cls.__name__
+    return type(comp).__name__
@@ -0,0 +1,369 @@
+"""
+Batch build rigs from descriptions across a pool of headless processes
+
+Each job builds one rig description (see template.description), optionally
+restores a guide snapshot (see base.snapshot) before building the rig, and
+saves the resulting scene. Jobs are spread over a process pool, failed
+jobs are retried in the pool and a summary report is written at the end:
+
+    python -m autoRigger.batch wolf.json fox.json --output-dir builds
+    python -m autoRigger.batch --jobs overnight.json --processes 16
+
+A jobs file is a list of objects with a 'description' path and optional
+'snapshot', 'output' and 'name' entries. Run it with mayapy to build in
+Maya standalone, or with any interpreter to build in the in-memory scene,
+saved as JSON. A job running past the timeout has its worker terminated,
+and a job whose worker dies counts as failed.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+import traceback
+from timeit import default_timer
+
+
+# seconds between checks of the running jobs
+POLL = 0.05
+
+# default seconds a job may run before its worker gets terminated
+TIMEOUT = 600.0
+
+# extension of saved scenes to Maya file type
+FILE_TYPES = {
+    '.ma': 'mayaAscii',
+    '.mb': 'mayaBinary',
+}
+DEFAULT_EXT = '.ma'
+
+# extension of saved in-memory scenes
+MEMORY_EXT = '.json'
+
+# queue the pool workers report the jobs they start on, see init_worker()
+_STARTED = None
+
+
+def make_job(description, snapshot=None, output=None, name=None,
+             output_dir=None):
+    """
+    :param description: str. rig description file path
+    :param snapshot: str. guide snapshot file path
+    :param output: str. saved scene path, defaults to the description
+                   name in output_dir
+    :param name: str. job name, defaults to the description file name
+    :param output_dir: str. directory of the default output path
+    :return: dict. job
+    """
+    stem = os.path.splitext(os.path.basename(description))[0]
+    if output is None:
+        output = os.path.join(output_dir or os.getcwd(), stem + DEFAULT_EXT)
+    return {
+        'name': name or stem,
+        'description': os.path.abspath(description),
+        'snapshot': os.path.abspath(snapshot) if snapshot else None,
+        'output': os.path.abspath(output),
+    }
+
+
+def output_path(path):
+    """
+    :param path: str. job output path
+    :return: str. path the active backend saves the scene to, in-memory
+             scenes being saved as JSON
+    """
+    from .scene import is_headless
+
+    root, ext = os.path.splitext(path)
+    if is_headless() and ext.lower() in FILE_TYPES:
+        return root + MEMORY_EXT
+    return path
+
+
+def check_outputs(jobs):
+    """
+    Raise when several jobs would save to the same scene file
+
+    :param jobs: list. jobs, see make_job()
+    """
+    names = dict()
+    for job in jobs:
+        path = os.path.normcase(output_path(job['output']))
+        if path in names:
+            raise ValueError('Jobs {} and {} both save to {}, give them '
+                             'distinct outputs'.format(
+                                 names[path], job['name'], path))
+        names[path] = job['name']
+
+
+def build_job(job):
+    """
+    Build a single job in a fresh scene, never raising
+
+    :param job: dict. see make_job()
+    :return: dict. job result with its status, timings and error
+    """
+    from .base import snapshot
+    from .scene import cmds, get_backend, is_headless, memory, use
+    from .template import description
+
+    result = {'name': job['name'], 'output': output_path(job['output']),
+              'pid': os.getpid(), 'status': 'ok', 'error': None}
+    start = default_timer()
+    try:
+        if is_headless():
+            scene = memory.Scene()
+        else:
+            cmds.file(new=1, force=1)
+            scene = get_backend()
+
+        with use(scene):
+            rig = description.load(job['description'])
+            rig.build_guide()
+            if job.get('snapshot'):
+                snapshot.restore(rig, job['snapshot'])
+            result['guide'] = default_timer() - start
+            rig.build_rig()
+            result['rig'] = default_timer() - start - result['guide']
+
+            directory = os.path.dirname(result['output'])
+            if directory and not os.path.isdir(directory):
+                os.makedirs(directory)
+            ext = os.path.splitext(result['output'])[1].lower()
+            cmds.file(rename=result['output'])
+            cmds.file(save=1, force=1,
+                      type=FILE_TYPES.get(ext, FILE_TYPES[DEFAULT_EXT]))
+    except Exception:
+        result['status'] = 'failed'
+        result['error'] = traceback.format_exc()
+    result['time'] = default_timer() - start
+    return result
+
+
+def init_worker(started=None):
+    """
+    Pool initializer: start Maya standalone when running under mayapy
+
+    :param started: SimpleQueue. receives (job index, attempt, pid) of
+                    the jobs the worker starts
+    """
+    global _STARTED
+    _STARTED = started
+    try:
+        import maya.standalone
+    except ImportError:
+        return
+    maya.standalone.initialize(name='python')
+
+
+def _run_job(index, attempt, job):
+    """
+    Pool task: report the job start, then build it
+    """
+    if _STARTED is not None:
+        _STARTED.put((index, attempt, os.getpid()))
+    return build_job(job)
+
+
+def _result(job, status, error, elapsed=0.0):
+    return {'name': job['name'], 'output': job['output'], 'pid': None,
+            'status': status, 'error': error, 'time': elapsed}
+
+
+def run(jobs, processes=None, retries=1, log=None, timeout=TIMEOUT):
+    """
+    Build jobs across a process pool
+
+    :param jobs: list. jobs, see make_job()
+    :param processes: int. worker count, defaults to the CPU count
+    :param retries: int. extra attempts given to a failed job
+    :param log: file. stream receiving progress lines
+    :param timeout: float. seconds a job may run, no limit when 0 or None
+    :return: dict. summary report
+    """
+    from .template import description
+
+    check_outputs(jobs)
+    start = default_timer()
+    results = [None] * len(jobs)
+
+    # resolve every description once up front: invalid ones fail here
+    # without a retry and forked workers inherit the resolved cache
+    runnable = list()
+    for index, job in enumerate(jobs):
+        try:
+            description.load_compiled(job['description'])
+        except Exception as e:
+            results[index] = _result(job, 'invalid', str(e))
+            results[index]['attempts'] = 0
+        else:
+            runnable.append(index)
+
+    processes = processes or multiprocessing.cpu_count()
+    started = multiprocessing.SimpleQueue()
+    pool = multiprocessing.Pool(min(processes, len(runnable)) or 1,
+                                initializer=init_worker,
+                                initargs=(started,))
+
+    def submit(index, attempt):
+        return pool.apply_async(_run_job, (index, attempt, jobs[index]))
+
+    try:
+        pending = dict((index, (submit(index, 1), 1)) for index in runnable)
+        # job index to the worker pid and start time of its attempt
+        running = dict()
+        # tasks of dead or terminated workers never complete
+        abandoned = False
+        done = len(jobs) - len(runnable)
+        while pending:
+            while not started.empty():
+                index, attempt, pid = started.get()
+                if index in pending and pending[index][1] == attempt:
+                    running[index] = (pid, default_timer())
+            workers = dict((process.pid, process) for process in
+                           multiprocessing.active_children())
+
+            for index, (async_result, attempt) in list(pending.items()):
+                if async_result.ready():
+                    result = async_result.get()
+                elif index in running:
+                    pid, since = running[index]
+                    elapsed = default_timer() - since
+                    if pid not in workers:
+                        result = _result(
+                            jobs[index], 'failed',
+                            'Worker process {} died'.format(pid), elapsed)
+                    elif timeout and elapsed > timeout:
+                        workers[pid].terminate()
+                        result = _result(
+                            jobs[index], 'timeout',
+                            'Timed out after {:.1f}s'.format(elapsed),
+                            elapsed)
+                    else:
+                        continue
+                    abandoned = True
+                else:
+                    continue
+
+                del pending[index]
+                running.pop(index, None)
+                if result['status'] == 'failed' and attempt <= retries:
+                    pending[index] = (submit(index, attempt + 1),
+                                      attempt + 1)
+                    continue
+
+                result['attempts'] = attempt
+                results[index] = result
+                done += 1
+                if log:
+                    log.write('[{}/{}] {:<24} {:<6} {:8.3f}s attempt {}\n'
+                              .format(done, len(jobs), result['name'],
+                                      result['status'], result['time'],
+                                      attempt))
+            time.sleep(POLL)
+    finally:
+        # a closed pool waits for its abandoned tasks forever
+        if abandoned:
+            pool.terminate()
+        else:
+            pool.close()
+        pool.join()
+
+    return summarize(results, default_timer() - start, processes)
+
+
+def summarize(results, wall, processes):
+    """
+    :param results: list. job results
+    :param wall: float. elapsed time of the whole batch
+    :param processes: int. worker count
+    :return: dict. summary report
+    """
+    busy = sum(r['time'] for r in results)
+    counts = dict()
+    for result in results:
+        counts[result['status']] = counts.get(result['status'], 0) + 1
+    return {
+        'jobs': len(results),
+        'counts': counts,
+        'processes': processes,
+        'wall': wall,
+        'busy': busy,
+        'speedup': busy / wall if wall else 0.0,
+        'results': results,
+    }
+
+
+def load_jobs(path, output_dir=None):
+    """
+    :param path: str. jobs JSON file path
+    :param output_dir: str. directory of the default output paths
+    :return: list. jobs
+    """
+    with open(path) as f:
+        data = json.load(f)
+
+    # relative paths in the jobs file are relative to the file itself
+    root = os.path.dirname(os.path.abspath(path))
+    jobs = list()
+    for item in data:
+        paths = dict((key, os.path.join(root, item[key]))
+                     for key in ('description', 'snapshot', 'output')
+                     if item.get(key))
+        jobs.append(make_job(paths['description'], paths.get('snapshot'),
+                             paths.get('output'), item.get('name'),
+                             output_dir))
+    return jobs
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Build rig descriptions across a process pool')
+    parser.add_argument('descriptions', nargs='*',
+                        help='rig description files to build')
+    parser.add_argument('--jobs', help='JSON list of jobs to build')
+    parser.add_argument('--output-dir', default=os.getcwd(),
+                        help='directory of the saved scenes')
+    parser.add_argument('--processes', type=int,
+                        help='worker processes, defaults to the CPU count')
+    parser.add_argument('--retries', type=int, default=1,
+                        help='extra attempts given to a failed job')
+    parser.add_argument('--timeout', type=float, default=TIMEOUT,
+                        help='seconds a job may run, 0 for no limit')
+    parser.add_argument('--report', help='save the summary to a JSON file')
+    args = parser.parse_args(argv)
+
+    jobs = [make_job(path, output_dir=args.output_dir)
+            for path in args.descriptions]
+    if args.jobs:
+        jobs.extend(load_jobs(args.jobs, args.output_dir))
+    if not jobs:
+        parser.error('no description or jobs file given')
+    try:
+        check_outputs(jobs)
+    except ValueError as e:
+        parser.error(str(e))
+
+    report = run(jobs, args.processes, args.retries, sys.stdout,
+                 args.timeout)
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(report, f, indent=1)
+
+    sys.stdout.write('{} jobs in {:.2f}s on {} processes ({:.1f}x): {}\n'
+                     .format(report['jobs'], report['wall'],
+                             report['processes'], report['speedup'],
+                             ', '.join('{} {}'.format(count, status)
+                                       for status, count in
+                                       sorted(report['counts'].items()))))
+    for result in report['results']:
+        if result['status'] != 'ok':
+            sys.stdout.write('{} {}:\n{}\n'.format(
+                result['name'], result['status'], result['error']))
+    return int(any(r['status'] != 'ok' for r in report['results']))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,289 @@
+"""
+Benchmark suite building templates and chains against the in-memory scene
+
+Every case is built in a fresh in-memory scene while recording wall time,
+scene command counts and created node counts per build phase; chains are
+built at increasing segment counts and flagged when a stage scales
+super-linearly (log-log slope of time against segments above a threshold).
+
+Run from the command line, optionally saving and comparing results:
+
+    python -m autoRigger.benchmark --output new.json --compare old.json
+"""
+
+import argparse
+import json
+import math
+import platform
+import sys
+import traceback
+from collections import OrderedDict
+from timeit import default_timer
+
+from .base import profiler
+from .chain import chain, chainEP, chainFK, chainFKIK, chainIK
+from .chain.limb.leg import legQuad
+from .constant import Side
+from .module import foot, hand
+from .scene import memory, use
+from .template import biped, quadruped
+from .utility.datatype import vector
+
+
+SEGMENTS = (4, 16, 64, 250, 1000)
+
+# slope of log(time) over log(segments) above which scaling is flagged
+SLOPE_THRESHOLD = 1.3
+
+# a stage needs at least this share of the build time to get flagged
+STAGE_SHARE = 0.05
+
+# relative slow-down against a compared run that counts as a regression
+TOLERANCE = 0.2
+
+
+def build_ep_guide(rig):
+    """
+    Guide an EP chain without a guide curve: the locators are laid out on
+    a straight line, the same way as a regular chain
+    """
+    rig.create_namespace()
+    rig.interval = 10.0 / (rig.segment - 1)
+    rig.dir = vector.Vector([0, 1, 0])
+    chain.Chain.create_locator(rig)
+    rig.color_locator()
+
+
+# case name to (factory taking a segment count, whether it scales)
+CASES = OrderedDict([
+    ('biped', (lambda seg: biped.Biped(Side.MIDDLE, 'bench'), 0)),
+    ('quadruped', (lambda seg: quadruped.Quadruped(Side.MIDDLE, 'bench'), 0)),
+    ('hand', (lambda seg: hand.Hand(Side.LEFT, 'bench'), 0)),
+    ('foot', (lambda seg: foot.Foot(Side.LEFT, 'bench'), 0)),
+    ('legQuad', (lambda seg: legQuad.LegQuad(
+        Side.LEFT, 'bench', 1.5, 0.2), 0)),
+    ('chainFK', (lambda seg: chainFK.ChainFK(
+        Side.LEFT, 'bench', seg, 10.0, [0, 1, 0]), 1)),
+    ('chainIK', (lambda seg: chainIK.ChainIK(
+        Side.LEFT, 'bench', seg, 10.0, [0, 1, 0]), 1)),
+    ('chainFKIK', (lambda seg: chainFKIK.ChainFKIK(
+        Side.LEFT, 'bench', seg, 10.0, [0, 1, 0]), 1)),
+    ('chainEP', (lambda seg: chainEP.ChainEP(
+        Side.LEFT, 'bench', seg, None, max(2, seg // 4)), 1)),
+    ('chainEPMatrix', (lambda seg: chainEP.ChainEP(
+        Side.LEFT, 'bench', seg, None, max(2, seg // 4), is_matrix=1), 1)),
+])
+
+
+def run_case(name, segment=None):
+    """
+    Build one case in a fresh in-memory scene
+
+    :param name: str. case name in CASES
+    :param segment: int. segment count of scaling cases
+    :return: dict. measurements of the guide and rig builds
+    """
+    factory, _ = CASES[name]
+    scene = memory.Scene()
+    result = OrderedDict([('case', name), ('segment', segment)])
+
+    with use(scene):
+        rig = factory(segment)
+        for phase in ('build_guide', 'build_rig'):
+            before = len(scene.nodes)
+            with profiler.profile(rig, phase, memory=False) as prof:
+                start = default_timer()
+                if phase == 'build_guide' and name.startswith('chainEP'):
+                    build_ep_guide(rig)
+                else:
+                    getattr(rig, phase)()
+                elapsed = default_timer() - start
+
+            result[phase] = OrderedDict([
+                ('time', elapsed),
+                ('commands', prof.root.total_calls),
+                ('nodes', len(scene.nodes) - before),
+                ('stages', stage_times(prof.root)),
+            ])
+    return result
+
+
+def stage_times(frame):
+    """
+    Sum the time spent in each stage across all components
+
+    :param frame: profiler.Frame. root frame of a build
+    :return: dict. stage name to seconds (self time)
+    """
+    times = dict()
+    stack = list(frame.children)
+    while stack:
+        item = stack.pop()
+        times[item.stage] = times.get(item.stage, 0.0) + item.self_time
+        stack.extend(item.children)
+    return times
+
+
+def run(cases=None, segments=SEGMENTS, repeat=1, log=None):
+    """
+    Run the benchmark suite
+
+    :param cases: list. case names, defaults to all
+    :param segments: list. segment counts for the scaling cases
+    :param repeat: int. builds per measurement, the fastest one is kept
+    :param log: file. stream receiving progress lines
+    :return: dict. results and environment info, a case failing to build
+             gets an error instead of measurements
+    """
+    results = list()
+    for name in cases or list(CASES):
+        for segment in (segments if CASES[name][1] else [None]):
+            try:
+                runs = [run_case(name, segment)
+                        for _ in range(max(1, repeat))]
+            except Exception:
+                results.append(OrderedDict([
+                    ('case', name), ('segment', segment),
+                    ('error', traceback.format_exc())]))
+                if log:
+                    log.write('{:<10} {:>5} failed\n'.format(
+                        name, segment or '-'))
+                continue
+
+            best = min(runs, key=lambda r: r['build_rig']['time'])
+            results.append(best)
+            if log:
+                log.write('{:<10} {:>5} guide {:8.3f}s rig {:8.3f}s '
+                          '{:>7} cmds {:>7} nodes\n'.format(
+                              name, segment or '-',
+                              best['build_guide']['time'],
+                              best['build_rig']['time'],
+                              best['build_rig']['commands'],
+                              best['build_rig']['nodes']))
+
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': results,
+    }
+
+
+def slope(xs, ys):
+    """
+    :return: float. least-squares slope of log(ys) over log(xs)
+    """
+    points = [(math.log(x), math.log(y)) for x, y in zip(xs, ys)
+              if x > 0 and y > 0]
+    if len(points) < 2:
+        return 0.0
+    mx = sum(p[0] for p in points) / len(points)
+    my = sum(p[1] for p in points) / len(points)
+    var = sum((p[0] - mx) ** 2 for p in points)
+    if not var:
+        return 0.0
+    return sum((p[0] - mx) * (p[1] - my) for p in points) / var
+
+
+def scaling(data, threshold=SLOPE_THRESHOLD):
+    """
+    Find builds and stages scaling super-linearly with the segment count
+
+    :param data: dict. output of run()
+    :param threshold: float. log-log slope above which scaling is flagged
+    :return: list. (case, phase, stage, slope) of the flagged items
+    """
+    series = OrderedDict()
+    for result in data['results']:
+        if result['segment'] and 'error' not in result:
+            series.setdefault(result['case'], list()).append(result)
+
+    flagged = list()
+    for case, results in series.items():
+        results.sort(key=lambda r: r['segment'])
+        segments = [r['segment'] for r in results]
+        for phase in ('build_guide', 'build_rig'):
+            totals = [r[phase]['time'] for r in results]
+            value = slope(segments, totals)
+            if value > threshold:
+                flagged.append((case, phase, None, value))
+
+            for stage in results[-1][phase]['stages']:
+                times = [r[phase]['stages'].get(stage, 0.0) for r in results]
+                if times[-1] < STAGE_SHARE * totals[-1]:
+                    continue
+                value = slope(segments, times)
+                if value > threshold:
+                    flagged.append((case, phase, stage, value))
+    return flagged
+
+
+def compare(data, baseline, tolerance=TOLERANCE):
+    """
+    Compare results against a previous run
+
+    :param data: dict. output of run()
+    :param baseline: dict. output of a previous run()
+    :param tolerance: float. relative increase counting as a regression
+    :return: list. (case, segment, phase, metric, old, new) regressions
+    """
+    old = dict(((r['case'], r['segment']), r) for r in baseline['results']
+               if 'error' not in r)
+    regressions = list()
+    for result in data['results']:
+        key = (result['case'], result['segment'])
+        if key not in old or 'error' in result:
+            continue
+        for phase in ('build_guide', 'build_rig'):
+            for metric in ('time', 'commands', 'nodes'):
+                before = old[key][phase][metric]
+                after = result[phase][metric]
+                if before and (after - before) / float(before) > tolerance:
+                    regressions.append(key + (phase, metric, before, after))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Benchmark rig builds against the in-memory scene')
+    parser.add_argument('--cases', nargs='+', choices=list(CASES),
+                        help='cases to run, defaults to all')
+    parser.add_argument('--segments', nargs='+', type=int,
+                        default=list(SEGMENTS),
+                        help='segment counts of the chain cases')
+    parser.add_argument('--repeat', type=int, default=1,
+                        help='builds per measurement, fastest one is kept')
+    parser.add_argument('--output', help='save results to a JSON file')
+    parser.add_argument('--compare', help='JSON results to compare against')
+    parser.add_argument('--threshold', type=float, default=SLOPE_THRESHOLD,
+                        help='log-log slope flagged as super-linear')
+    args = parser.parse_args(argv)
+
+    data = run(args.cases, args.segments, args.repeat, sys.stdout)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(data, f, indent=1)
+
+    status = 0
+    for result in data['results']:
+        if 'error' in result:
+            sys.stdout.write('failed: {} {}\n{}\n'.format(
+                result['case'], result['segment'] or '-', result['error']))
+            status = 1
+
+    for case, phase, stage, value in scaling(data, args.threshold):
+        sys.stdout.write('super-linear: {} {} {} (slope {:.2f})\n'.format(
+            case, phase, stage or 'total', value))
+        status = 1
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        for item in compare(data, baseline):
+            sys.stdout.write(
+                'regression: {} {} {} {}: {} -> {}\n'.format(*item))
+            status = 1
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,12 +1,13 @@
 import ast
 import os
 
-import maya.cmds as cmds
-from Qt import QtWidgets, QtGui, _loadUi
+from Qt import QtWidgets, QtGui
 
 from .. import util
 from ..base import base
 from ..constant import UI_DIR, Direction
+from ..scene import cmds
+from ..uicache import load_ui
 from ..utility.rigging import joint, transform
 
 
@@ -15,12 +16,11 @@ class ChainItem(base.BaseItem):
         """Override"""
         super(ChainItem, self).__init__(name)
         self.extra_ui = 'chain.ui'
-        self.init_extra()
 
     def init_extra(self):
         """Override"""
         self.extra_widget = QtWidgets.QWidget()
-        _loadUi(os.path.join(UI_DIR, self.extra_ui), self.extra_widget)
+        load_ui(os.path.join(UI_DIR, self.extra_ui), self.extra_widget)
 
         for direction in Direction:
             self.extra_widget.ui_dir_cbox.addItem(str(direction.value))
@@ -58,16 +58,21 @@ class Chain(base.Base):
         """
         Override: create a single chain-like locator
         parented in hierarchical order
+
+        The locators are created directly under their parent and placed at
+        their final world position, no re-parenting or relative moves
         """
-        for index in range(self.segment):
-            cmds.spaceLocator(n=self.locs[index])
+        positions = util.get_chain_positions(
+            self.segment, self.interval, self.dir.as_list)
+
+        parent = util.G_LOC_GRP
+        for index, loc in enumerate(self.locs[:self.segment]):
+            cmds.createNode('transform', n=loc, p=parent)
+            cmds.createNode('locator', n='{}Shape'.format(loc), p=loc)
             if not index:
-                util.uniform_scale(self.locs[index], self._scale)
-            else:
-                cmds.parent(self.locs[index], self.locs[index-1], r=1)
-                distance = (self.interval * self.dir).as_list
-                util.move(self.locs[index], distance)
-        cmds.parent(self.locs[0], util.G_LOC_GRP)
+                util.uniform_scale(loc, self._scale)
+            cmds.xform(loc, t=positions[index], ws=1)
+            parent = loc
 
     def place_controller(self):
         """
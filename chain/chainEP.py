@@ -1,12 +1,13 @@
 import os
 
-import maya.cmds as cmds
-from Qt import QtWidgets, _loadUi
+from Qt import QtWidgets
 
 from . import chain
 from .. import util, shape
 from ..base import bone, base
 from ..constant import UI_DIR
+from ..scene import cmds
+from ..uicache import load_ui
 from ..utility.rigging import transform
 from ..utility.useful import algorithm
 
@@ -16,7 +17,6 @@ class ChainEPItem(base.BaseItem):
         """Override"""
         super(ChainEPItem, self).__init__(name)
         self.extra_ui = 'chainEP.ui'
-        self.init_extra()
 
     def build_guide(self, *args, **kwargs):
         """Override"""
@@ -26,7 +26,7 @@ class ChainEPItem(base.BaseItem):
     def init_extra(self):
         """Override"""
         self.extra_widget = QtWidgets.QWidget()
-        _loadUi(os.path.join(UI_DIR, self.extra_ui), self.extra_widget)
+        load_ui(os.path.join(UI_DIR, self.extra_ui), self.extra_widget)
 
         # PySide2 bug:https://stackoverflow.com/questions/68927598/
         self.extra_widget.ui_set_btn.clicked.connect(lambda: self.set_selection())
@@ -51,7 +51,7 @@ class ChainEP(chain.Chain):
     The EP serves as controllers like in a EP-curve with fall-off influence
     """
 
-    def __init__(self, side, name, segment, curve, cv=0):
+    def __init__(self, side, name, segment, curve, cv=0, is_matrix=0):
         """
         Extend: specify the guide curve and the number of control vertices
         which affects the fall-off influences;
@@ -59,6 +59,8 @@ class ChainEP(chain.Chain):
 
         :param curve: str. curve transform name used for guide
         :param cv: int. number of control vertices
+        :param is_matrix: bool. drive the joints through a matrix blending
+                          network instead of weighted constraints
         """
         super(ChainEP, self).__init__(side, name, segment)
 
@@ -71,6 +73,8 @@ class ChainEP(chain.Chain):
         self.guide_curve = None
         self.curve = curve
         self.cvs = list()
+        self.is_matrix = is_matrix
+        self.weights = list()
 
         percents = algorithm.get_percentages(cv)
         for p in percents:
@@ -127,6 +131,10 @@ class ChainEP(chain.Chain):
         """
         Override: add smooth fall-off constraint between joints and controller
         """
+        if self.is_matrix:
+            self.add_matrix_blend()
+            return
+
         # smooth fall-off constraint along the chain
         for i in range(len(self.cvs)-1):
             head = self.cvs[i]
@@ -143,3 +151,55 @@ class ChainEP(chain.Chain):
                                       w=1 - ((j-head) * gap), mo=1)
                 cmds.orientConstraint(self.ctrls[tail], self.jnts[j],
                                       w=(j-head) * gap, mo=1)
+
+    def add_matrix_blend(self):
+        """
+        Drive the joints by blending their controllers' world matrices
+        with the fall-off weights, instead of weighted constraints
+
+        Each controller gets one node computing its motion since the build,
+        each joint a weighted sum of those applied to its own build matrix
+        """
+        self.weights = util.get_falloff_weights(self.cvs, self.segment)
+
+        deltas = list()
+        for index in self.cvs:
+            ctrl = self.ctrls[index]
+            delta = cmds.createNode(
+                'multMatrix', n='{}{}_delta'.format(self.base, index))
+            cmds.setAttr('{}.matrixIn[0]'.format(delta), util.inverse_matrix(
+                cmds.xform(ctrl, q=1, m=1, ws=1)), type='matrix')
+            cmds.connectAttr('{}.worldMatrix[0]'.format(ctrl),
+                             '{}.matrixIn[1]'.format(delta))
+            deltas.append(delta)
+
+        for index, influences in enumerate(self.weights):
+            jnt = self.jnts[index]
+            name = '{}{}'.format(self.base, index)
+            blend = cmds.createNode('wtAddMatrix', n='{}_blend'.format(name))
+            for slot, (cv, weight) in enumerate(influences):
+                cmds.connectAttr(
+                    '{}.matrixSum'.format(deltas[cv]),
+                    '{}.wtMatrix[{}].matrixIn'.format(blend, slot))
+                cmds.setAttr(
+                    '{}.wtMatrix[{}].weightIn'.format(blend, slot), weight)
+
+            local = cmds.createNode('multMatrix', n='{}_local'.format(name))
+            cmds.setAttr('{}.matrixIn[0]'.format(local),
+                         cmds.xform(jnt, q=1, m=1, ws=1), type='matrix')
+            cmds.connectAttr('{}.matrixSum'.format(blend),
+                             '{}.matrixIn[1]'.format(local))
+            cmds.connectAttr('{}.parentInverseMatrix[0]'.format(jnt),
+                             '{}.matrixIn[2]'.format(local))
+
+            decompose = cmds.createNode(
+                'decomposeMatrix', n='{}_decompose'.format(name))
+            cmds.connectAttr('{}.matrixSum'.format(local),
+                             '{}.inputMatrix'.format(decompose))
+
+            # the decomposed rotation already holds the joint orientation
+            cmds.setAttr('{}.jointOrient'.format(jnt), 0, 0, 0)
+            cmds.connectAttr('{}.outputTranslate'.format(decompose),
+                             '{}.translate'.format(jnt))
+            cmds.connectAttr('{}.outputRotate'.format(decompose),
+                             '{}.rotate'.format(jnt))
@@ -1,7 +1,6 @@
-import maya.cmds as cmds
-
 from . import chain
 from ..base import bone
+from ..scene import cmds
 from ..utility.datatype import vector
 
 
@@ -1,9 +1,8 @@
-import maya.cmds as cmds
-
 from . import chain, chainFK, chainIK
 from .. import util, shape
 from ..base import bone
 from ..constant import ATTRS
+from ..scene import cmds
 from ..utility.datatype import vector
 from ..utility.rigging import joint, transform
 
@@ -27,7 +26,8 @@ class ChainFKIK(chain.Chain):
     in which, the result joint chain is driven by both FK and IK chain
     """
 
-    def __init__(self, side, name, segment, length, direction, is_stretch=1):
+    def __init__(self, side, name, segment, length, direction, is_stretch=1,
+                 is_matrix=0, fit=0, tolerance=0.0, is_blend=0):
         """
         Extend: create FK/IK and result three-chain system
         specify length and direction of the chain
@@ -36,10 +36,18 @@ class ChainFKIK(chain.Chain):
         :param length: float. total length of rig chain
         :param direction: vector.Vector. world direction from root to top node
         :param is_stretch: bool. allow stretching for the rig
+        :param is_matrix: bool. drive the IK curve without clusters
+        :param fit: int. number of fitted IK curve control vertices
+        :param tolerance: float. largest joint distance to the fitted curve
+        :param is_blend: bool. connect the FK/IK switch through a reverse
+                         node instead of driven keys
         """
         super(ChainFKIK, self).__init__(side, name, segment)
+        self.is_blend = is_blend
 
-        self.ik_chain = chainIK.ChainIK(side, name, segment, length, direction, is_stretch)
+        self.ik_chain = chainIK.ChainIK(
+            side, name, segment, length, direction, is_stretch, is_matrix,
+            fit, tolerance)
         self.fk_chain = chainFK.ChainFK(side, name, segment, length, direction)
 
         # master controller location
@@ -121,6 +129,10 @@ class ChainFKIK(chain.Chain):
         self.ik_chain.add_constraint()
         self.fk_chain.add_constraint()
 
+        if self.is_blend:
+            self.connect_switch()
+            return
+
         # IK, FK to result jnt
         for index in range(self.segment):
             cons = cmds.parentConstraint(
@@ -137,11 +149,34 @@ class ChainFKIK(chain.Chain):
             cmds.setDrivenKeyframe(
                 '{}.w1'.format(cons), cd=self.ctrls[0]+'.sw', dv=0, v=1)
 
-            cmds.setDrivenKeyframe(self.ik_chain.ctrls[index]+'.v',
-                                   cd=self.ctrls[0]+'.sw', dv=1, v=1)
-            cmds.setDrivenKeyframe(self.ik_chain.ctrls[index]+'.v',
-                                   cd=self.ctrls[0]+'.sw', dv=0, v=0)
             cmds.setDrivenKeyframe(self.fk_chain.ctrls[index]+'.v',
                                    cd=self.ctrls[0]+'.sw', dv=0, v=1)
             cmds.setDrivenKeyframe(self.fk_chain.ctrls[index]+'.v',
                                    cd=self.ctrls[0]+'.sw', dv=1, v=0)
+
+        # a fitted IK chain may have fewer controllers than joints
+        for ctrl in self.ik_chain.ctrls:
+            cmds.setDrivenKeyframe(ctrl+'.v', cd=self.ctrls[0]+'.sw',
+                                   dv=1, v=1)
+            cmds.setDrivenKeyframe(ctrl+'.v', cd=self.ctrls[0]+'.sw',
+                                   dv=0, v=0)
+
+    def connect_switch(self):
+        """
+        Constraint the result joints to the FK and IK chain, with weights
+        and controller visibility connected to the switch and a shared
+        reverse node
+        """
+        on = ['{}.v'.format(ctrl) for ctrl in self.ik_chain.ctrls]
+        off = ['{}.v'.format(ctrl) for ctrl in self.fk_chain.ctrls]
+        for index in range(self.segment):
+            cons = cmds.parentConstraint(
+                self.ik_chain.jnts[index],
+                self.fk_chain.jnts[index],
+                self.jnts[index])[0]
+            on.append('{}.w0'.format(cons))
+            off.append('{}.w1'.format(cons))
+
+        util.connect_switch(
+            self.ctrls[0]+'.sw', '{}switch_reverse'.format(self.base),
+            on, off)
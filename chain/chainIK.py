@@ -1,9 +1,14 @@
-import maya.cmds as cmds
+import logging
 
 from . import chain
 from .. import util, shape
 from ..base import bone
+from ..scene import cmds
 from ..utility.datatype import vector
+from ..utility.rigging import transform
+
+
+LOG = logging.getLogger(__name__)
 
 
 class ChainIKItem(chain.ChainItem):
@@ -21,7 +26,8 @@ class ChainIK(chain.Chain):
     Create a IK control rig system for a chain-like joints
     """
 
-    def __init__(self, side, name, segment, length, direction, is_stretch=0):
+    def __init__(self, side, name, segment, length, direction, is_stretch=0,
+                 is_matrix=0, fit=0, tolerance=0.0):
         """
         Extend: specify length and direction of the chain
         and whether it allows for stretching
@@ -29,17 +35,32 @@ class ChainIK(chain.Chain):
         :param length: float. total length of rig chain
         :param direction: vector.Vector. world direction from root to top node
         :param is_stretch: bool. allow stretching for the rig
+        :param is_matrix: bool. drive the IK curve points with the
+                          controllers' world matrices instead of clusters
+        :param fit: int. fit the IK curve to the joints with this many
+                    control vertices, each with a controller
+        :param tolerance: float. fit the IK curve with as few control
+                          vertices as keep the joints within this distance
         """
         super(ChainIK, self).__init__(side, name, segment)
 
         self.interval = length / (self.segment-1)
         self.dir = vector.Vector(direction).normalize()
         self.is_stretch = is_stretch
+        self.is_matrix = is_matrix
+        self.fit = fit
+        self.tolerance = tolerance
 
         self.clusters = list()
+        self.points = list()
         self.ik_curve = None
         self.ik = None
 
+        # fitted IK curve
+        self.fit_cvs = list()
+        self.fit_knots = list()
+        self.fit_error = None
+
     @bone.update_base_name
     def create_namespace(self):
         """
@@ -48,40 +69,106 @@ class ChainIK(chain.Chain):
         for index in range(self.segment):
             self.locs.append('{}{}_loc'.format(self.base, index))
             self.jnts.append('{}{}ik_jnt'.format(self.base, index))
-            self.ctrls.append('{}{}ik_ctrl'.format(self.base, index))
-            self.offsets.append(
-                '{}{}ik_offset'.format(self.base, index))
-            self.clusters.append('{}{}_cluster'.format(self.base, index))
+        self.name_controllers(self.segment)
 
         self.ik_curve = '{}ik_curve'.format(self.base)
         self.ik = '{}_ik'.format(self.base)
 
+    def name_controllers(self, count):
+        """
+        Name the controllers, offsets, clusters and curve points, one per
+        IK curve control vertex
+
+        :param count: int. number of control vertices
+        """
+        indices = range(count)
+        self.ctrls[:] = ['{}{}ik_ctrl'.format(self.base, index)
+                         for index in indices]
+        self.offsets[:] = ['{}{}ik_offset'.format(self.base, index)
+                           for index in indices]
+        self.clusters[:] = ['{}{}_cluster'.format(self.base, index)
+                            for index in indices]
+        self.points[:] = ['{}{}ik_point'.format(self.base, index)
+                          for index in indices]
+
     def set_shape(self):
         """
         Override: set controller shape as sphere
         """
         self._shape = shape.make_sphere(self._scale)
 
+    def place_controller(self):
+        """
+        Extend: when fitting the IK curve, create controllers only at the
+        fitted control vertices
+        """
+        if not (self.fit or self.tolerance):
+            super(ChainIK, self).place_controller()
+            return
+
+        self.fit_curve()
+        positions = [cmds.xform(jnt, q=1, t=1, ws=1) for jnt in self.jnts]
+        for index, pos in enumerate(self.fit_cvs):
+            # orient like the closest joint
+            nearest = min(range(self.segment), key=lambda i: sum(
+                (a - b) ** 2 for a, b in zip(positions[i], pos)))
+
+            cmds.duplicate(self._shape, n=self.ctrls[index])
+            cmds.rotate(0, 0, 90, self.ctrls[index])
+            cmds.group(em=1, n=self.offsets[index])
+            transform.clear_xform(
+                self.ctrls[index],
+                self.offsets[index],
+                self.jnts[nearest]
+            )
+            cmds.xform(self.offsets[index], t=pos, ws=1)
+            if index:
+                cmds.parent(self.offsets[index], self.ctrls[index-1])
+
+        cmds.parent(self.offsets[0], util.G_CTRL_GRP)
+
+    def fit_curve(self):
+        """
+        Fit the IK curve control vertices to the joint positions, naming
+        a controller per fitted control vertex
+        """
+        positions = [cmds.xform(jnt, q=1, t=1, ws=1) for jnt in self.jnts]
+        self.fit_cvs, self.fit_knots, self.fit_error = util.fit_curve(
+            positions, self.fit, self.tolerance)
+
+        count = len(self.fit_cvs)
+        self.name_controllers(count)
+
+        LOG.info('%s IK curve fitted with %d control vertices for %d joints,'
+                 ' max error %.4f, rms %.4f', self.base, count, self.segment,
+                 self.fit_error['max'], self.fit_error['rms'])
+
     def build_ik(self):
         """
         Build the IK controller
         """
-        curve_points = list()
-        for index, jnt in enumerate(self.jnts):
-            pos = cmds.xform(jnt, q=1, t=1, ws=1)
-            curve_points.append(pos)
+        if self.fit_cvs:
+            degree = len(self.fit_knots) - len(self.fit_cvs) + 1
+            cmds.curve(p=self.fit_cvs, k=self.fit_knots, d=degree,
+                       n=self.ik_curve)
+        else:
+            curve_points = list()
+            for index, jnt in enumerate(self.jnts):
+                pos = cmds.xform(jnt, q=1, t=1, ws=1)
+                curve_points.append(pos)
 
-        cmds.curve(p=curve_points, n=self.ik_curve)
+            cmds.curve(p=curve_points, n=self.ik_curve)
         cmds.setAttr(self.ik_curve+'.v', 0)
 
         # inherit transform will cause curve move/scale twice as much
         cmds.inheritTransform(self.ik_curve, off=1)
         cmds.parent(self.ik_curve, util.G_CTRL_GRP)
 
-        cvs = cmds.ls(self.ik_curve+'.cv[0:]', fl=1)
-        for index, cv in enumerate(cvs):
-            cluster = cmds.cluster(cv, n=self.clusters[index])[-1]
-            cmds.setAttr(cluster+'.v', 0)
+        if not self.is_matrix:
+            cvs = cmds.ls(self.ik_curve+'.cv[0:]', fl=1)
+            for index, cv in enumerate(cvs):
+                cluster = cmds.cluster(cv, n=self.clusters[index])[-1]
+                cmds.setAttr(cluster+'.v', 0)
 
         cmds.ikHandle(sj=self.jnts[0],
                       ee=self.jnts[self.segment-1],
@@ -98,8 +185,11 @@ class ChainIK(chain.Chain):
         """
         self.build_ik()
 
-        for index, cluster in enumerate(self.clusters):
-            cmds.parent(cluster+'Handle', self.ctrls[index])
+        if self.is_matrix:
+            self.drive_curve()
+        else:
+            for index, cluster in enumerate(self.clusters):
+                cmds.parent(cluster+'Handle', self.ctrls[index])
 
         # enable advance twist control
         cmds.setAttr(self.ik+'.dTwistControlEnable', 1)
@@ -121,14 +211,18 @@ class ChainIK(chain.Chain):
         Add node network for joint stretch ability
         :return:
         """
-        # FIXME: cycle evaluation when stretching
-
         # mid cluster weighting
-        for index, offset in enumerate(self.offsets):
-            if self.ctrls[index] not in [self.ctrls[0], self.ctrls[-1]]:
-                weight = (1.00 / (self.segment-1)) * index
-                cmds.pointConstraint(self.ctrls[-1], offset, w=weight, mo=1)
-                cmds.pointConstraint(self.ctrls[0], offset, w=1-weight, mo=1)
+        if self.is_matrix:
+            self.blend_offsets()
+        else:
+            # FIXME: cycle evaluation when stretching
+            for index, offset in enumerate(self.offsets):
+                if self.ctrls[index] not in [self.ctrls[0], self.ctrls[-1]]:
+                    weight = (1.00 / (len(self.ctrls)-1)) * index
+                    cmds.pointConstraint(
+                        self.ctrls[-1], offset, w=weight, mo=1)
+                    cmds.pointConstraint(
+                        self.ctrls[0], offset, w=1-weight, mo=1)
 
         # scaling of the spine
         arc_len = cmds.arclen(self.ik_curve, constructionHistory=1)
@@ -149,3 +243,97 @@ class ChainIK(chain.Chain):
 
         for i in range(self.segment):
             cmds.connectAttr(stretch_node+'.ox', self.jnts[i]+'.sx')
+
+    def drive_curve(self):
+        """
+        Connect each controller's world position to its IK curve point
+        """
+        curve_shape = cmds.listRelatives(self.ik_curve, s=1)[0]
+        for index, ctrl in enumerate(self.ctrls):
+            point = cmds.createNode('decomposeMatrix', n=self.points[index])
+            cmds.connectAttr('{}.worldMatrix[0]'.format(ctrl),
+                             '{}.inputMatrix'.format(point))
+            cmds.connectAttr(
+                '{}.outputTranslate'.format(point),
+                '{}.controlPoints[{}]'.format(curve_shape, index))
+
+    def blend_offsets(self):
+        """
+        Make the mid offsets follow the end controllers by their fall-off
+        weights
+
+        The mid offsets move under the root controller and read the top
+        controller through local matrices only, so they stay out of the top
+        controller's ancestry and nothing reads a world matrix they drive
+        """
+        count = len(self.ctrls)
+        if count < 3:
+            return
+
+        root, top = self.ctrls[0], self.ctrls[-1]
+        mids = self.offsets[1:-1]
+        parent = cmds.listRelatives(self.offsets[-1], p=1)
+        if parent and parent[0] in self.ctrls[1:-1]:
+            cmds.parent(self.offsets[-1], root)
+        for offset in mids:
+            cmds.parent(offset, root)
+
+        # top controller position in the root controller space: up from
+        # the top offset to the closest common parent, then down to the root
+        up = _lineage(self.offsets[-1])
+        down = _lineage(root)
+        common = [node for node in up if node in down]
+        if common:
+            up = up[:up.index(common[0])]
+            down = down[:down.index(common[0])]
+        matrices = ['{}.matrix'.format(node) for node in up]
+        matrices.extend('{}.inverseMatrix'.format(node)
+                        for node in reversed(down))
+        position = cmds.createNode('pointMatrixMult',
+                                   n='{}_position'.format(top))
+        cmds.connectAttr('{}.translate'.format(top),
+                         '{}.inPoint'.format(position))
+        if len(matrices) == 1:
+            cmds.connectAttr(matrices[0], '{}.inMatrix'.format(position))
+        else:
+            space = cmds.createNode('multMatrix', n='{}_space'.format(top))
+            for index, matrix in enumerate(matrices):
+                cmds.connectAttr(matrix, '{}.matrixIn[{}]'.format(
+                    space, index))
+            cmds.connectAttr('{}.matrixSum'.format(space),
+                             '{}.inMatrix'.format(position))
+
+        inverse = util.inverse_matrix(cmds.xform(root, q=1, m=1, ws=1))
+        point = cmds.xform(top, q=1, t=1, ws=1) + [1]
+        rest = [sum(point[row] * inverse[row*4+col] for row in range(4))
+                for col in range(3)]
+
+        # the root controller sits at the origin of its own space, so the
+        # offset is its weighted share of the top position plus a constant
+        weights = util.get_falloff_weights([0, count-1], count)
+        for index, offset in enumerate(mids, 1):
+            weight = dict(weights[index]).get(1, 0.0)
+            pos = cmds.getAttr('{}.translate'.format(offset))[0]
+            constant = [(pos[axis] - weight*rest[axis]) / (1-weight)
+                        for axis in range(3)]
+
+            blend = cmds.createNode(
+                'blendColors', n='{}_blend'.format(offset))
+            cmds.connectAttr('{}.output'.format(position),
+                             '{}.color1'.format(blend))
+            cmds.setAttr('{}.color2'.format(blend), *constant)
+            cmds.setAttr('{}.blender'.format(blend), weight)
+            cmds.connectAttr('{}.output'.format(blend),
+                             '{}.translate'.format(offset))
+
+
+def _lineage(node):
+    """
+    :return: list. the node and its parents, up to the world
+    """
+    nodes = list()
+    while node:
+        nodes.append(node)
+        parent = cmds.listRelatives(node, p=1)
+        node = parent[0] if parent else None
+    return nodes
@@ -1,10 +1,9 @@
-import maya.cmds as cmds
-
 from .... import util
 from ....base import base, bone
 from ....chain.limb import limbFKIK
 from ....constant import Side
 from ....module import hand
+from ....scene import cmds
 
 
 class ArmItem(base.BaseItem):
@@ -23,13 +22,16 @@ class Arm(bone.Bone):
     Uses the combination of LimbFKIK and Hand modules
     """
 
-    def __init__(self, side, name, distance=6, interval=0.5, gap=2):
+    def __init__(self, side, name, distance=6, interval=0.5, gap=2,
+                 is_blend=0):
         """
         Extend: specify distance, interval and gap for connection
 
         :param distance: float. length of the limb
         :param interval: float. interval for Hand module
         :param gap: float. gap for Hand module
+        :param is_blend: bool. connect the FK/IK switch through a reverse
+                         node instead of driven keys
         """
         super(Arm, self).__init__(side, name)
         self._rtype = 'arm'
@@ -39,7 +41,8 @@ class Arm(bone.Bone):
         self.gap = gap
 
         self.limb = limbFKIK.LimbFKIK(
-            self._side, name, ltype='arm', length=self.distance)
+            self._side, name, ltype='arm', length=self.distance,
+            is_blend=is_blend)
 
         self.hand = None
         if self._side == Side.LEFT:
@@ -1,9 +1,8 @@
-import maya.cmds as cmds
-
 from .... import util
 from ....base import base, bone
 from ....chain.limb import limbFKIK
 from ....module import foot
+from ....scene import cmds
 
 
 class LegItem(base.BaseItem):
@@ -22,13 +21,16 @@ class Leg(bone.Bone):
     Uses the combination of LimbFKIK and Foot modules
     """
 
-    def __init__(self, side, name, distance=8, interval=0.5, height=0.4):
+    def __init__(self, side, name, distance=8, interval=0.5, height=0.4,
+                 is_blend=0):
         """
         Extend: specify distance, interval and height for connection
 
         :param distance: float. length of the limb
         :param interval: float. interval for Foot module
         :param height: float. gap for Foot module
+        :param is_blend: bool. connect the FK/IK switch through a reverse
+                         node instead of driven keys
         """
         super(Leg, self).__init__(side, name)
         self._rtype = 'leg'
@@ -36,11 +38,14 @@ class Leg(bone.Bone):
         self.distance = distance
         self.interval = interval
         self.height = height
+        self.is_blend = is_blend
 
         self.limb = limbFKIK.LimbFKIK(
-            self._side, name, ltype='leg', length=self.distance)
+            self._side, name, ltype='leg', length=self.distance,
+            is_blend=is_blend)
         self.foot = foot.Foot(
-            self._side, name, interval=self.interval, height=self.height)
+            self._side, name, interval=self.interval, height=self.height,
+            is_blend=is_blend)
 
         self._comps = [self.limb, self.foot]
 
@@ -62,12 +67,22 @@ class Leg(bone.Bone):
         # IK constraint #
         cmds.parentConstraint(
             self.foot.rev_jnts[0], self.limb.ik_chain.ctrls[-1], mo=1)
+        if self.is_blend:
+            # the foot controller stands in for the limb IK controller
+            cmds.disconnectAttr(self.limb.ctrls[0]+'.sw',
+                                self.limb.ik_chain.ctrls[-1]+'.v')
         cmds.setAttr(self.limb.ik_chain.ctrls[-1]+'.v', 0)
 
         # FK constraint #
         cmds.parentConstraint(self.limb.jnts[-1], self.foot.fk_jnts[0], mo=1)
         cmds.parent(self.foot.ctrls[1], self.limb.fk_chain.ctrls[-1])
 
+        if self.is_blend:
+            cmds.connectAttr(self.foot.ctrls[2]+'.sw',
+                             self.limb.ctrls[0]+'.sw')
+            cmds.setAttr(self.limb.ctrls[0]+'.FK_IK', l=1, k=0)
+            return
+
         # IK/FK switch #
         cmds.setDrivenKeyframe(
             self.limb.ctrls[0]+'.FK_IK',
@@ -1,8 +1,7 @@
-import maya.cmds as cmds
-
 from .... import util, shape
 from ....base import bone
 from ....constant import ATTRS
+from ....scene import cmds
 from ....utility.common import hierarchy
 from ....utility.datatype import vector
 from ....utility.rigging import joint, transform
@@ -19,11 +19,13 @@ class LimbFKIK(chainFKIK.ChainFKIK):
     Create a FK/IK control rig system for limb
     """
 
-    def __init__(self, side, name, length=5, ltype='arm'):
+    def __init__(self, side, name, length=5, ltype='arm', is_blend=0):
         """
         Extend: specify limb type and side determines direction
 
         :param ltype: str. type of the limb: 'arm' or 'leg'
+        :param is_blend: bool. connect the FK/IK switch through a reverse
+                         node instead of driven keys
         """
         self._rtype = ltype
 
@@ -33,7 +35,8 @@ class LimbFKIK(chainFKIK.ChainFKIK):
         elif ltype == 'arm' and side == Side.RIGHT:
             self.direction = [-1, 0, 0]
 
-        super(LimbFKIK, self).__init__(side, name, 3, length, self.direction, 0)
+        super(LimbFKIK, self).__init__(
+            side, name, 3, length, self.direction, 0, is_blend=is_blend)
         self.ik_chain = limbIK.LimbIK(side, name, length)
         self.fk_chain = limbFK.LimbFK(side, name, length)
 
@@ -1,8 +1,7 @@
-import maya.cmds as cmds
-
 from ... import util
 from ...chain import chainIK
 from ...constant import Side
+from ...scene import cmds
 from ...utility.rigging import joint
 from ...utility.rigging import transform
 
@@ -16,9 +16,12 @@ class Spine(chainIK.ChainIK):
     Create a IK control rig system for biped spine
     """
 
-    def __init__(self, side, name, length=6.0, segment=6):
+    def __init__(self, side, name, length=6.0, segment=6, is_matrix=0,
+                 fit=0, tolerance=0.0):
         """
         Override: specify the direction to be world Y-up
         """
-        super(Spine, self).__init__(side, name, segment, length, [0, 1, 0], 0)
+        super(Spine, self).__init__(
+            side, name, segment, length, [0, 1, 0], 0, is_matrix, fit,
+            tolerance)
         self._rtype = 'spine'
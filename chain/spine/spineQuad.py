@@ -16,10 +16,13 @@ class SpineQuad(chainIK.ChainIK):
     Create a IK control rig system for quadruped spine
     """
 
-    def __init__(self, side, name, length=6.0, segment=6):
+    def __init__(self, side, name, length=6.0, segment=6, is_matrix=0,
+                 fit=0, tolerance=0.0):
         """
         Override: specify the direction to be world Z-forward
         """
-        super(SpineQuad, self).__init__(side, name, segment, length, [0, 0, 1], 0)
+        super(SpineQuad, self).__init__(
+            side, name, segment, length, [0, 0, 1], 0, is_matrix, fit,
+            tolerance)
 
         self._rtype = 'qspine'
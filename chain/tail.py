@@ -16,9 +16,12 @@ class Tail(chainFKIK.ChainFKIK):
     Create a Tail rig system with FK/IK controls
     """
 
-    def __init__(self, side, name, segment=6, length=4.0, direction=[0, -1, 0]):
+    def __init__(self, side, name, segment=6, length=4.0, direction=[0, -1, 0],
+                 is_matrix=0, fit=0, tolerance=0.0, is_blend=0):
         """
         Extend: specify rig type
         """
-        super(Tail, self).__init__(side, name, segment, length, direction)
+        super(Tail, self).__init__(
+            side, name, segment, length, direction, is_matrix=is_matrix,
+            fit=fit, tolerance=tolerance, is_blend=is_blend)
         # self._rtype = 'tail'
@@ -6,6 +6,11 @@ from enum import Enum, IntEnum, unique
 PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
 UI_DIR = os.path.join(PROJECT_ROOT, 'ui')
 ICON_DIR = os.path.join(UI_DIR, 'icon')
+DATA_DIR = os.path.join(PROJECT_ROOT, 'data')
+SHAPE_LIB = os.path.join(DATA_DIR, 'shapes.npz')
+CACHE_DIR = os.environ.get(
+    'AUTORIGGER_CACHE',
+    os.path.join(os.path.expanduser('~'), '.autoRigger', 'cache'))
 
 # custom attribute short name long name mapping to be added on controllers
 ATTRS = {
@@ -1,8 +1,7 @@
-import maya.cmds as cmds
-
 from .. import util, shape
 from ..base import bone, base
 from ..constant import Side, ATTRS
+from ..scene import cmds
 from ..utility.common import hierarchy
 
 
@@ -23,18 +22,21 @@ class Foot(bone.Bone):
     Create a reverse FK rig system for Foot
     """
     
-    def __init__(self, side, name, interval=0.5, height=0.4):
+    def __init__(self, side, name, interval=0.5, height=0.4, is_blend=0):
         """
         Extend: specify interval and height for foot creation
 
         :param interval: float. horizontal distance between segments of foot
         :param height: float. vertical height of ankle to the ground
+        :param is_blend: bool. connect the FK/IK switch through a reverse
+                         node instead of driven keys
         """
         super(Foot, self).__init__(side, name)
         self._rtype = 'foot'
 
         self.interval = interval
         self.height = height
+        self.is_blend = is_blend
         
         self.rev_jnts = list()
         self.fk_jnts = list()
@@ -223,7 +225,21 @@ class Foot(bone.Bone):
             cmds.sdk(self.jnts[3]+'.rz', cd=self.ctrls[0]+'.fb', dv=-20, v=30)
             cmds.sdk(self.jnts[4]+'.rz', cd=self.ctrls[0]+'.fb', dv=20, v=-30)
 
+        # IK/FK switch
+        # switch will follow ankle movement
+        cmds.parentConstraint(self.jnts[0], self.ctrls[2], mo=1)
+
         # result foot
+        if self.is_blend:
+            util.connect_switch(
+                self.ctrls[2]+'.sw', '{}switch_reverse'.format(self.base),
+                on=['{}.w1'.format(cons) for cons in
+                    [cons_o1, cons_p1, cons_o2]] + [self.ctrls[0]+'.v'],
+                off=['{}.w0'.format(cons) for cons in
+                     [cons_p1, cons_o1, cons_o2, cons_o3]] +
+                    [self.ctrls[1]+'.v'])
+            return
+
         cmds.sdk('{}.w1'.format(cons_o1), cd=self.ctrls[2]+'.sw', dv=1, v=1)
         cmds.sdk('{}.w1'.format(cons_o1), cd=self.ctrls[2]+'.sw', dv=0, v=0)
         cmds.sdk('{}.w1'.format(cons_p1), cd=self.ctrls[2]+'.sw', dv=1, v=1)
@@ -242,9 +258,6 @@ class Foot(bone.Bone):
         cmds.sdk('{}.w0'.format(cons_o3), cd=self.ctrls[2]+'.sw', dv=1, v=0)
         cmds.sdk('{}.w0'.format(cons_o3), cd=self.ctrls[2]+'.sw', dv=0, v=1)
 
-        # IK/FK switch
-        # switch will follow ankle movement
-        cmds.parentConstraint(self.jnts[0], self.ctrls[2], mo=1)
         cmds.sdk(self.ctrls[0]+'.v', cd=self.ctrls[2]+'.sw', dv=1, v=1)
         cmds.sdk(self.ctrls[0]+'.v', cd=self.ctrls[2]+'.sw', dv=0, v=0)
         cmds.sdk(self.ctrls[1]+'.v', cd=self.ctrls[2]+'.sw', dv=1, v=0)
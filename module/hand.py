@@ -1,9 +1,8 @@
-import maya.cmds as cmds
-
 from .. import util
 from ..base import bone, base
 from ..chain import finger
 from ..constant import Side
+from ..scene import cmds
 from ..utility.common import hierarchy
 
 
@@ -0,0 +1,173 @@
+"""
+Registry of the rig types listed in the UI tabs
+
+Rig types are declared by name, tab and import path, their modules are
+only imported once an item gets selected. Other packages add rig types
+through the 'autoRigger.rigs' entry point group, pointing at an Entry, a
+list of entries or a function returning them:
+
+    # setup.py of a studio package
+    entry_points={'autoRigger.rigs': ['studio = studio_rigs:ENTRIES']}
+
+    # studio_rigs/__init__.py, keep it free of heavy imports
+    from autoRigger.registry import Entry
+    ENTRIES = [Entry('wing', 'CUSTOM', 'studio_rigs.wing', 'WingItem',
+                     icon='/path/to/wing.png')]
+"""
+
+import importlib
+import logging
+import os
+from collections import namedtuple
+
+from Qt import QtGui, QtWidgets
+
+from .constant import ICON_DIR, RigType
+
+
+ENTRY_POINT_GROUP = 'autoRigger.rigs'
+
+LOG = logging.getLogger(__name__)
+
+
+class Entry(namedtuple('Entry', ['name', 'tab', 'module', 'item', 'icon'])):
+    """
+    A rig type listed in the UI
+
+    module is an absolute module path or one relative to this package
+    (e.g. '.chain.chainFK'), item the name of the RigItem class in it
+    """
+
+    def __new__(cls, name, tab, module, item, icon=None):
+        tab = RigType[tab] if isinstance(tab, str) else RigType(tab)
+        return super(Entry, cls).__new__(cls, name, tab, module, item, icon)
+
+    @property
+    def icon_path(self):
+        return self.icon or os.path.join(ICON_DIR, '{}.png'.format(self.name))
+
+    def load(self):
+        """
+        Import the rig type and create its item
+
+        :return: RigItem.
+        """
+        module = importlib.import_module(self.module, __package__)
+        return getattr(module, self.item)(self.name)
+
+
+ENTRIES = [
+    Entry('biped', RigType.BIPED, '.template.biped', 'BipedItem'),
+    Entry('biped-arm', RigType.BIPED, '.chain.limb.arm.arm', 'ArmItem'),
+    Entry('biped-head', RigType.BIPED, '.base.base', 'BaseItem'),
+    Entry('biped-leg', RigType.BIPED, '.chain.limb.leg.leg', 'LegItem'),
+    Entry('biped-spine', RigType.BIPED, '.chain.spine.spine', 'SpineItem'),
+
+    Entry('quad', RigType.QUADRUPED, '.template.quadruped', 'QuadrupedItem'),
+    Entry('quad-front', RigType.QUADRUPED, '.chain.limb.leg.legFront',
+          'LegFrontItem'),
+    Entry('quad-hind', RigType.QUADRUPED, '.chain.limb.leg.legBack',
+          'LegBackItem'),
+    Entry('quad-spine', RigType.QUADRUPED, '.chain.spine.spineQuad',
+          'SpineQuadItem'),
+    Entry('quad-tail', RigType.QUADRUPED, '.chain.tail', 'TailItem'),
+
+    Entry('chain-ep', RigType.CHAIN, '.chain.chainEP', 'ChainEPItem'),
+    Entry('chain-fk', RigType.CHAIN, '.chain.chainFK', 'ChainFKItem'),
+    Entry('chain-fkik', RigType.CHAIN, '.chain.chainFKIK', 'ChainFKIKItem'),
+    Entry('chain-ik', RigType.CHAIN, '.chain.chainIK', 'ChainIKItem'),
+
+    Entry('base', RigType.CUSTOM, '.base.base', 'BaseItem'),
+    Entry('biped-finger', RigType.CUSTOM, '.chain.finger', 'FingerItem'),
+    Entry('biped-hand', RigType.CUSTOM, '.module.hand', 'HandItem'),
+    Entry('biped-foot', RigType.CUSTOM, '.module.foot', 'FootItem'),
+    Entry('limb', RigType.CUSTOM, '.chain.limb.limbFKIK', 'LimbFKIKItem'),
+]
+
+# whether the entry point plugins got loaded
+_PLUGINS = [False]
+
+
+class LazyItem(QtWidgets.QListWidgetItem):
+    """
+    List item standing in for a rig item until it gets selected
+    """
+
+    def __init__(self, entry):
+        """
+        Initialization
+
+        :param entry: Entry. rig type to list
+        """
+        super(LazyItem, self).__init__()
+        self.entry = entry
+        self._item = None
+
+        self.setText(entry.name)
+        icon = QtGui.QIcon()
+        icon.addFile(entry.icon_path)
+        self.setIcon(icon)
+
+    def resolve(self):
+        """
+        :return: RigItem. the rig item, imported and created on first call
+        """
+        if self._item is None:
+            self._item = self.entry.load()
+        return self._item
+
+
+def register(entry):
+    """
+    Add a rig type, replacing any registered under the same name and tab
+
+    :param entry: Entry.
+    """
+    ENTRIES[:] = [e for e in ENTRIES
+                  if (e.name, e.tab) != (entry.name, entry.tab)]
+    ENTRIES.append(entry)
+
+
+def entries(tab):
+    """
+    :param tab: RigType. UI tab
+    :return: list. entries of the tab, in registration order
+    """
+    load_plugins()
+    return [e for e in ENTRIES if e.tab == tab]
+
+
+def load_plugins():
+    """
+    Register the rig types of the installed entry points, once
+    """
+    if _PLUGINS[0]:
+        return
+    _PLUGINS[0] = True
+
+    for point in _entry_points(ENTRY_POINT_GROUP):
+        try:
+            value = point.load()
+            if callable(value) and not isinstance(value, Entry):
+                value = value()
+            for entry in [value] if isinstance(value, Entry) else value:
+                register(entry)
+        except Exception:
+            LOG.warning('Failed to load rig types from %s', point.name,
+                        exc_info=True)
+
+
+def _entry_points(group):
+    try:
+        from importlib import metadata
+    except ImportError:
+        try:
+            import pkg_resources
+        except ImportError:
+            return []
+        return list(pkg_resources.iter_entry_points(group))
+
+    points = metadata.entry_points()
+    if hasattr(points, 'select'):
+        return list(points.select(group=group))
+    return list(points.get(group, []))
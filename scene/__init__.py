@@ -0,0 +1,185 @@
+"""
+Scene backend layer
+
+Every rig module talks to the scene through the ``cmds`` object exported here
+instead of importing maya.cmds directly, so the same build code can run
+inside Maya or against the pure-Python in-memory scene (scene.memory).
+
+The backend is selected at import time from the AUTORIGGER_BACKEND env var
+('maya', 'memory' or a dotted module path), defaulting to Maya when it can
+be imported and to the in-memory scene otherwise. Layers (see Layer) can be
+stacked on top of the active backend at runtime to record or trace calls.
+"""
+
+import importlib
+import os
+import sys
+import types
+from contextlib import contextmanager
+
+
+BACKEND_ENV = 'AUTORIGGER_BACKEND'
+BACKENDS = {
+    'maya': 'maya.cmds',
+    'memory': '{}.memory'.format(__name__),
+}
+
+# active backend, kept in a list so dispatchers always see the latest one
+_ACTIVE = [None]
+
+
+class Layer(object):
+    """
+    Wrap another backend and intercept every command going through it
+
+    Subclass and override call() to record, count or trace scene commands;
+    layers are stacked on the active backend through use()
+    """
+
+    def __init__(self, inner=None):
+        """
+        Initialization
+
+        :param inner: object. wrapped backend, defaults to the active one
+        """
+        self.inner = inner
+
+    def __getattr__(self, name):
+        if name.startswith('__') or self.inner is None:
+            raise AttributeError(name)
+
+        func = getattr(self.inner, name)
+
+        def command(*args, **kwargs):
+            return self.call(name, func, args, kwargs)
+        command.__name__ = name
+        return command
+
+    def call(self, name, func, args, kwargs):
+        """
+        Issue a single scene command
+
+        :param name: str. command name (e.g. 'parent')
+        :param func: function. command of the wrapped backend
+        :param args: tuple. positional arguments
+        :param kwargs: dict. flags
+        :return: command result
+        """
+        return func(*args, **kwargs)
+
+
+class _Commands(object):
+    """
+    Stand-in for the maya.cmds module which forwards every command
+    to the active backend at call time
+    """
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+
+        def command(*args, **kwargs):
+            return getattr(_ACTIVE[0], name)(*args, **kwargs)
+        command.__name__ = name
+
+        # cache the dispatcher, it resolves the backend on every call anyway
+        setattr(self, name, command)
+        return command
+
+    def __repr__(self):
+        return '<scene commands: {!r}>'.format(_ACTIVE[0])
+
+
+cmds = _Commands()
+
+
+def load(name):
+    """
+    Import a backend by name or dotted module path
+
+    :param name: str. 'maya', 'memory' or a module path
+    :return: object. backend providing the cmds subset
+    """
+    module = importlib.import_module(BACKENDS.get(name, name))
+    # the in-memory module holds its commands on a scene instance
+    return getattr(module, 'SCENE', module)
+
+
+def get_backend():
+    """
+    :return: object. the active backend (possibly wrapped by layers)
+    """
+    return _ACTIVE[0]
+
+
+def set_backend(backend):
+    """
+    Replace the active backend
+
+    :param backend: str or object. backend name, module path or object
+    :return: object. the previous backend
+    """
+    if isinstance(backend, str):
+        backend = load(backend)
+
+    previous = _ACTIVE[0]
+    _ACTIVE[0] = backend
+    return previous
+
+
+@contextmanager
+def use(backend):
+    """
+    Temporarily switch the active backend or stack a layer on top of it
+
+    :param backend: str, object or Layer.
+    """
+    if isinstance(backend, Layer) and backend.inner is None:
+        backend.inner = _ACTIVE[0]
+
+    previous = set_backend(backend)
+    try:
+        yield backend
+    finally:
+        _ACTIVE[0] = previous
+
+
+def is_headless():
+    """
+    :return: bool. whether the in-memory scene is the base backend
+    """
+    backend = _ACTIVE[0]
+    while isinstance(backend, Layer):
+        backend = backend.inner
+    return backend is load('memory')
+
+
+def install():
+    """
+    Register the command proxy as maya.cmds when Maya is not available,
+    so helpers outside this package (e.g. the utility submodule) resolve
+    to the same backend
+    """
+    try:
+        import maya.cmds
+    except ImportError:
+        maya = sys.modules.get('maya') or types.ModuleType('maya')
+        maya.cmds = cmds
+        sys.modules['maya'] = maya
+        sys.modules['maya.cmds'] = cmds
+
+
+def _default_backend():
+    name = os.environ.get(BACKEND_ENV)
+    if name:
+        return name
+
+    try:
+        import maya.cmds
+    except ImportError:
+        return 'memory'
+    return 'maya'
+
+
+set_backend(_default_backend())
+install()
@@ -0,0 +1,1609 @@
+"""
+Pure-Python in-memory scene covering the maya.cmds subset used by the rig
+modules
+
+Nodes live in a flat name table with DAG parenting, attributes and plug
+connections. Transforms compose their local matrix from translate, rotate
+(xyz order), jointOrient and scale so that world space queries and edits
+behave like Maya's; pivots, rotate order and constraints are stored but the
+dependency graph is never evaluated.
+"""
+
+import copy
+import fnmatch
+import json
+import logging
+import math
+import re
+
+
+DAG_TYPES = {
+    'transform', 'joint', 'ikHandle', 'ikEffector', 'clusterHandle',
+    'locator', 'nurbsCurve', 'distanceDimShape',
+    'pointConstraint', 'orientConstraint', 'parentConstraint',
+    'aimConstraint', 'scaleConstraint', 'poleVectorConstraint',
+}
+SHAPE_TYPES = {'locator', 'nurbsCurve', 'clusterHandle', 'distanceDimShape'}
+TRANSFORM_TYPES = DAG_TYPES - SHAPE_TYPES
+
+# constraint command: (output attribute, constrained attribute)
+CONSTRAINTS = {
+    'pointConstraint': [('constraintTranslate', 'translate')],
+    'orientConstraint': [('constraintRotate', 'rotate')],
+    'aimConstraint': [('constraintRotate', 'rotate')],
+    'scaleConstraint': [('constraintScale', 'scale')],
+    'parentConstraint': [('constraintTranslate', 'translate'),
+                         ('constraintRotate', 'rotate')],
+    'poleVectorConstraint': [('constraintTranslate', 'poleVector')],
+}
+
+VECTORS = {
+    'translate': 't', 'rotate': 'r', 'scale': 's', 'jointOrient': 'jo',
+    'rotatePivot': 'rp', 'scalePivot': 'sp', 'preferredAngle': 'pa',
+    'poleVector': 'pv',
+}
+ALIASES = {
+    'v': 'visibility', 'ro': 'rotateOrder', 'it': 'inheritsTransform',
+    'wm': 'worldMatrix', 'pm': 'parentMatrix', 'pim': 'parentInverseMatrix',
+}
+for _long, _short in VECTORS.items():
+    ALIASES[_short] = _long
+    for _axis in 'XYZ':
+        ALIASES[_short + _axis.lower()] = _long + _axis
+
+DEFAULTS = {
+    'translate': (0.0, 0.0, 0.0),
+    'rotate': (0.0, 0.0, 0.0),
+    'scale': (1.0, 1.0, 1.0),
+    'rotatePivot': (0.0, 0.0, 0.0),
+    'scalePivot': (0.0, 0.0, 0.0),
+    'visibility': True,
+    'inheritsTransform': True,
+    'rotateOrder': 0,
+    'overrideEnabled': False,
+    'overrideRGBColors': 0,
+    'overrideColor': 0,
+    'overrideColorRGB': (0.0, 0.0, 0.0),
+}
+JOINT_DEFAULTS = {
+    'jointOrient': (0.0, 0.0, 0.0),
+    'preferredAngle': (0.0, 0.0, 0.0),
+    'radius': 1.0,
+    'segmentScaleCompensate': True,
+}
+
+LOG = logging.getLogger(__name__)
+
+# attributes the local matrix of a transform is composed from
+MATRIX_ATTRS = {
+    'translate', 'rotate', 'scale', 'jointOrient', 'inheritsTransform',
+}
+
+PLUG_INDEX = re.compile(r'^(\w+)\[(\d*)(?::(\d*))?\]$')
+
+
+# -- matrix helpers, row vector convention as in Maya --
+
+def identity():
+    return [[1.0 if i == j else 0.0 for j in range(4)] for i in range(4)]
+
+
+def mult(a, b):
+    return [[sum(a[i][k] * b[k][j] for k in range(4)) for j in range(4)]
+            for i in range(4)]
+
+
+def inverse(m):
+    """
+    Invert an affine 4x4 matrix
+    """
+    r = [row[:3] for row in m[:3]]
+    det = (r[0][0] * (r[1][1] * r[2][2] - r[1][2] * r[2][1])
+           - r[0][1] * (r[1][0] * r[2][2] - r[1][2] * r[2][0])
+           + r[0][2] * (r[1][0] * r[2][1] - r[1][1] * r[2][0]))
+    if abs(det) < 1e-12:
+        raise ValueError('singular matrix')
+
+    inv = [[0.0] * 3 for _ in range(3)]
+    for i in range(3):
+        for j in range(3):
+            a, b = (i + 1) % 3, (i + 2) % 3
+            c, d = (j + 1) % 3, (j + 2) % 3
+            inv[j][i] = (r[a][c] * r[b][d] - r[a][d] * r[b][c]) / det
+
+    t = m[3][:3]
+    out = identity()
+    for i in range(3):
+        out[i][:3] = inv[i]
+    for j in range(3):
+        out[3][j] = -sum(t[k] * inv[k][j] for k in range(3))
+    return out
+
+
+def euler_matrix(rotation):
+    """
+    :param rotation: list. euler angles in degrees, xyz rotate order
+    :return: list. 4x4 rotation matrix
+    """
+    x, y, z = [math.radians(a) for a in rotation]
+    cx, sx, cy, sy, cz, sz = (math.cos(x), math.sin(x), math.cos(y),
+                              math.sin(y), math.cos(z), math.sin(z))
+    m = identity()
+    m[0][:3] = [cy * cz, cy * sz, -sy]
+    m[1][:3] = [sx * sy * cz - cx * sz, sx * sy * sz + cx * cz, sx * cy]
+    m[2][:3] = [cx * sy * cz + sx * sz, cx * sy * sz - sx * cz, cx * cy]
+    return m
+
+
+def matrix_euler(m):
+    """
+    :param m: list. 4x4 matrix with orthonormal rotation rows
+    :return: list. euler angles in degrees, xyz rotate order
+    """
+    sy = max(-1.0, min(1.0, -m[0][2]))
+    y = math.asin(sy)
+    if abs(sy) < 1 - 1e-9:
+        x = math.atan2(m[1][2], m[2][2])
+        z = math.atan2(m[0][1], m[0][0])
+    else:
+        x = math.atan2(-m[2][1], m[1][1])
+        z = 0.0
+    return [math.degrees(a) for a in (x, y, z)]
+
+
+def compose(t=None, r=None, s=None, jo=None):
+    m = identity()
+    if s:
+        for i in range(3):
+            m[i][i] = s[i]
+    if r:
+        m = mult(m, euler_matrix(r))
+    if jo:
+        m = mult(m, euler_matrix(jo))
+    if t:
+        m[3][:3] = list(t)
+    return m
+
+
+def decompose(m):
+    """
+    :param m: list. 4x4 matrix without shear
+    :return: tuple. translation, rotation (degrees) and scale
+    """
+    scale = [math.sqrt(sum(v * v for v in m[i][:3])) or 1.0
+             for i in range(3)]
+    rot = identity()
+    for i in range(3):
+        rot[i][:3] = [v / scale[i] for v in m[i][:3]]
+    return list(m[3][:3]), matrix_euler(rot), scale
+
+
+def flatten(m):
+    return [v for row in m for v in row]
+
+
+def unflatten(values):
+    values = list(values)
+    return [values[i*4:i*4+4] for i in range(4)]
+
+
+def transform_point(point, m):
+    return [sum([point[0] * m[0][j], point[1] * m[1][j],
+                 point[2] * m[2][j], m[3][j]]) for j in range(3)]
+
+
+def _flat_args(args):
+    out = list()
+    for arg in args:
+        if isinstance(arg, (list, tuple)):
+            out.extend(_flat_args(arg))
+        elif arg is not None:
+            out.append(arg)
+    return out
+
+
+def _flag(kwargs, *names, **default):
+    for name in names:
+        if name in kwargs:
+            return kwargs[name]
+    return default.get('default')
+
+
+class Attributes(dict):
+    """
+    Attribute values of a node, dropping the cached world matrices of the
+    node and its descendants when a local matrix attribute changes
+    """
+
+    def __init__(self, node, values=()):
+        super(Attributes, self).__init__()
+        self.node = node
+        self.update(values)
+
+    def __setitem__(self, key, value):
+        super(Attributes, self).__setitem__(key, value)
+        if key in MATRIX_ATTRS:
+            self.node.invalidate()
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def __reduce__(self):
+        # copies are plain dicts, they get bound when assigned to a node
+        return dict, (dict(self),)
+
+
+class Node(object):
+    """
+    A single dependency or DAG node
+    """
+
+    def __init__(self, name, ntype):
+        self.name = name
+        self.type = ntype
+        self.parent = None
+        self.children = list()
+        # cached world matrix, None when out of date
+        self._world = None
+        self.attrs = dict()
+        # dynamic attribute short name to long name
+        self.aliases = dict()
+        self.locked = set()
+        # destination attribute: (source node, source attribute)
+        self.inputs = dict()
+        # list of (source attribute, destination node, destination attribute)
+        self.outputs = list()
+
+        if ntype in TRANSFORM_TYPES:
+            self.attrs.update(DEFAULTS)
+        if ntype == 'joint':
+            self.attrs.update(JOINT_DEFAULTS)
+
+    def __repr__(self):
+        return '<Node {} ({})>'.format(self.name, self.type)
+
+    @property
+    def attrs(self):
+        return self._attrs
+
+    @attrs.setter
+    def attrs(self, values):
+        self._attrs = Attributes(self, values)
+        self.invalidate()
+
+    def invalidate(self):
+        """
+        Drop the cached world matrix of the node and its descendants
+        """
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            # descendants of a node without cache have none either
+            if node._world is None and node is not self:
+                continue
+            node._world = None
+            stack.extend(node.children)
+
+    @property
+    def is_dag(self):
+        return self.type in DAG_TYPES
+
+    @property
+    def is_transform(self):
+        return self.type in TRANSFORM_TYPES
+
+    @property
+    def local_matrix(self):
+        if not self.is_transform:
+            return identity()
+        jo = self.attrs.get('jointOrient') if self.type == 'joint' else None
+        return compose(self.attrs['translate'], self.attrs['rotate'],
+                       self.attrs['scale'], jo)
+
+    @property
+    def parent_matrix(self):
+        if not self.parent or not self.attrs.get('inheritsTransform', True):
+            return identity()
+        return self.parent.world_matrix
+
+    @property
+    def world_matrix(self):
+        # walk up to the closest cached ancestor, then back down
+        chain = list()
+        node = self
+        while node is not None and node._world is None:
+            chain.append(node)
+            inherits = node.attrs.get('inheritsTransform', True)
+            node = node.parent if inherits else None
+        world = node._world if node is not None else identity()
+        for node in reversed(chain):
+            world = mult(node.local_matrix, world)
+            node._world = world
+        return [row[:] for row in self._world]
+
+
+class Scene(object):
+    """
+    In-memory scene, each public method mirrors the maya.cmds command
+    of the same name
+    """
+
+    def __init__(self):
+        self.nodes = dict()
+        self.selection = list()
+        self.path = None
+        self._chunks = list()
+        self._undo = list()
+
+    def __repr__(self):
+        return '<memory scene: {} nodes>'.format(len(self.nodes))
+
+    # -- internals --
+
+    def reset(self):
+        self.nodes.clear()
+        self.selection = list()
+        self.path = None
+        self._chunks = list()
+        self._undo = list()
+
+    def _unique(self, name):
+        if name not in self.nodes:
+            return name
+
+        match = re.match(r'^(.*?)(\d*)$', name)
+        base, number = match.group(1), match.group(2)
+        index = int(number) + 1 if number else 1
+        while '{}{}'.format(base, index) in self.nodes:
+            index += 1
+        return '{}{}'.format(base, index)
+
+    def _create(self, ntype, name=None, parent=None):
+        node = Node(self._unique(name or '{}1'.format(ntype)), ntype)
+        self.nodes[node.name] = node
+        if parent is not None:
+            self._reparent(node, parent)
+        return node
+
+    def _shape(self, ntype, transform, name=None):
+        return self._create(
+            ntype, name or '{}Shape'.format(transform.name), transform)
+
+    def _get(self, name):
+        name = name.split('|')[-1] if isinstance(name, str) else name
+        if isinstance(name, Node):
+            return name
+        try:
+            return self.nodes[name]
+        except KeyError:
+            raise ValueError('No object matches name: {}'.format(name))
+
+    def _split(self, plug):
+        node, attr = plug.split('.', 1)
+        return self._get(node), attr
+
+    def _resolve(self, node, attr):
+        """
+        :return: tuple. long attribute name and vector axis index (or None)
+        """
+        attr = node.aliases.get(attr, attr)
+        attr = ALIASES.get(attr, attr)
+        for long_name in VECTORS:
+            if attr.startswith(long_name) and attr[len(long_name):] in 'XYZ' \
+                    and len(attr) == len(long_name) + 1:
+                return long_name, 'XYZ'.index(attr[-1])
+        return attr, None
+
+    def _current(self, node, attr):
+        """
+        :return: float. current value of a numeric attribute, 0 when unset
+        """
+        name, axis = self._resolve(node, attr)
+        value = node.attrs.get(name, 0.0)
+        return value[axis] if axis is not None else value
+
+    def _reparent(self, node, parent, relative=True):
+        world = None if relative else node.world_matrix
+        if node.parent:
+            node.parent.children.remove(node)
+        node.parent = parent
+        if parent:
+            parent.children.append(node)
+        node.invalidate()
+        if world is not None and node.is_transform:
+            self._set_world(node, world)
+
+    def _set_world(self, node, world):
+        local = mult(world, inverse(node.parent_matrix))
+        t, r, s = decompose(local)
+        if node.type == 'joint':
+            jo = euler_matrix(node.attrs['jointOrient'])
+            rot = compose(r=r)
+            r = matrix_euler(mult(rot, inverse(jo)))
+        node.attrs['translate'] = tuple(t)
+        node.attrs['rotate'] = tuple(r)
+        node.attrs['scale'] = tuple(s)
+
+    def _descendants(self, node):
+        out = list()
+        stack = list(reversed(node.children))
+        while stack:
+            child = stack.pop()
+            out.append(child)
+            stack.extend(reversed(child.children))
+        return out
+
+    def _shapes(self, node):
+        return [c for c in node.children if c.type in SHAPE_TYPES]
+
+    def _curve_shape(self, name):
+        node = self._get(name)
+        if node.type == 'nurbsCurve':
+            return node
+        shapes = [s for s in self._shapes(node) if s.type == 'nurbsCurve']
+        if not shapes:
+            raise RuntimeError('{} is not a nurbs curve'.format(name))
+        return shapes[0]
+
+    def _remove(self, node):
+        for child in reversed(self._descendants(node)):
+            self._remove_node(child)
+        self._remove_node(node)
+
+    def _remove_node(self, node):
+        for attr, (src, src_attr) in list(node.inputs.items()):
+            self._disconnect(src, src_attr, node, attr)
+        for src_attr, dst, dst_attr in list(node.outputs):
+            self._disconnect(node, src_attr, dst, dst_attr)
+        if node.parent:
+            node.parent.children.remove(node)
+        if node in self.selection:
+            self.selection.remove(node)
+        self.nodes.pop(node.name, None)
+
+    def _connect(self, src, src_attr, dst, dst_attr, force=False):
+        if dst_attr in dst.inputs:
+            if not force:
+                raise RuntimeError('{}.{} is already connected'.format(
+                    dst.name, dst_attr))
+            old, old_attr = dst.inputs[dst_attr]
+            self._disconnect(old, old_attr, dst, dst_attr)
+        dst.inputs[dst_attr] = (src, src_attr)
+        src.outputs.append((src_attr, dst, dst_attr))
+
+    def _disconnect(self, src, src_attr, dst, dst_attr):
+        dst.inputs.pop(dst_attr, None)
+        if (src_attr, dst, dst_attr) in src.outputs:
+            src.outputs.remove((src_attr, dst, dst_attr))
+
+    def _targets(self, args):
+        """
+        :return: list. nodes from arguments, falling back to selection
+        """
+        names = _flat_args(args)
+        if not names:
+            return list(self.selection)
+        return [self._get(n) for n in names]
+
+    def _curve_cvs(self, shape):
+        return [list(p) for p in shape.attrs.get('cvs', [])]
+
+    def _components(self, pattern):
+        """
+        Expand 'curve.cv[0:3]' style component strings
+
+        :return: list. (shape, index) tuples
+        """
+        name, comp = pattern.split('.', 1)
+        shape = self._curve_shape(name)
+        count = len(shape.attrs.get('cvs', []))
+        match = PLUG_INDEX.match(comp.replace('*', ''))
+        if not match:
+            raise ValueError('unsupported component: {}'.format(pattern))
+        start, end = match.group(2), match.group(3)
+        if start == '':
+            indices = range(count)
+        elif end is None and ':' not in comp:
+            indices = [int(start)]
+        else:
+            indices = range(int(start or 0),
+                            int(end) + 1 if end else count)
+        return [(shape, i) for i in indices]
+
+    # -- creation --
+
+    def createNode(self, ntype, n=None, name=None, p=None, parent=None,
+                   ss=False, skipSelect=False):
+        parent = p or parent
+        node = self._create(
+            ntype, n or name, self._get(parent) if parent else None)
+        if ntype == 'locator':
+            node.attrs['localPosition'] = (0.0, 0.0, 0.0)
+            node.attrs['worldPosition'] = tuple(
+                transform_point((0, 0, 0), node.world_matrix))
+        return node.name
+
+    def shadingNode(self, ntype, asUtility=False, asShader=False,
+                    asTexture=False, n=None, name=None, **kwargs):
+        return self.createNode(ntype, n=n or name)
+
+    def spaceLocator(self, n=None, name=None, p=None, position=None,
+                     **kwargs):
+        node = self._create('transform', n or name or 'locator1')
+        shape = self._shape('locator', node)
+        shape.attrs['localPosition'] = tuple(p or position or (0, 0, 0))
+        shape.attrs['worldPosition'] = tuple(
+            transform_point(shape.attrs['localPosition'], node.world_matrix))
+        self.selection = [node]
+        return [node.name]
+
+    def group(self, *args, **kwargs):
+        name = _flag(kwargs, 'n', 'name', default='group1')
+        parent = _flag(kwargs, 'p', 'parent')
+        node = self._create(
+            'transform', name, self._get(parent) if parent else None)
+
+        if not _flag(kwargs, 'em', 'empty'):
+            for child in self._targets(args):
+                self._reparent(child, node, relative=False)
+
+        self.selection = [node]
+        return node.name
+
+    def joint(self, *args, **kwargs):
+        if _flag(kwargs, 'e', 'edit'):
+            return self._edit_joint(args, kwargs)
+        if _flag(kwargs, 'q', 'query'):
+            node = self._get(args[0])
+            if _flag(kwargs, 'p', 'position'):
+                return transform_point([0, 0, 0], node.world_matrix)
+            raise RuntimeError('unsupported joint query')
+
+        parent = None
+        for sel in self.selection:
+            if sel.is_transform:
+                parent = sel
+        node = self._create(
+            'joint', _flag(kwargs, 'n', 'name', default='joint1'), parent)
+
+        position = _flag(kwargs, 'p', 'position')
+        if position:
+            if _flag(kwargs, 'r', 'relative'):
+                node.attrs['translate'] = tuple(position)
+            else:
+                world = node.world_matrix
+                world[3][:3] = list(position)
+                self._set_world(node, world)
+        radius = _flag(kwargs, 'rad', 'radius')
+        if radius is not None:
+            node.attrs['radius'] = radius
+
+        self.selection = [node]
+        return node.name
+
+    def _edit_joint(self, args, kwargs):
+        nodes = self._targets(args)
+        orient = _flag(kwargs, 'oj', 'orientJoint')
+        if orient == 'none':
+            for node in nodes:
+                world = node.world_matrix
+                node.attrs['jointOrient'] = (0.0, 0.0, 0.0)
+                self._set_world(node, world)
+            return
+        if not orient:
+            return
+
+        if _flag(kwargs, 'ch', 'children'):
+            chain = list()
+            for node in nodes:
+                chain.append(node)
+                chain.extend(d for d in self._descendants(node)
+                             if d.type == 'joint')
+            nodes = chain
+
+        for node in nodes:
+            self._orient(node)
+
+    def _orient(self, node):
+        """
+        Aim the joint X axis down to its first child joint, Y up
+        """
+        children = [c for c in node.children if c.type == 'joint']
+        child_worlds = [(c, c.world_matrix) for c in node.children
+                        if c.is_transform]
+
+        if children:
+            start = node.world_matrix[3][:3]
+            end = children[0].world_matrix[3][:3]
+            aim = [e - s for s, e in zip(start, end)]
+            rot = _aim_matrix(aim, [0, 1, 0])
+            local = mult(rot, inverse(node.parent_matrix))
+            local[3] = [0.0, 0.0, 0.0, 1.0]
+            _, jo, _ = decompose(local)
+            node.attrs['jointOrient'] = tuple(jo)
+        else:
+            node.attrs['jointOrient'] = (0.0, 0.0, 0.0)
+        node.attrs['rotate'] = (0.0, 0.0, 0.0)
+
+        for child, world in child_worlds:
+            self._set_world(child, world)
+
+    def duplicate(self, *args, **kwargs):
+        name = _flag(kwargs, 'n', 'name')
+        out = list()
+        for node in self._targets(args):
+            copied = self._copy(node, node.parent, name)
+            out.append(copied.name)
+            name = None
+        self.selection = [self._get(n) for n in out]
+        return out
+
+    def _copy(self, node, parent, name=None):
+        new = self._create(node.type, name or node.name, parent)
+        new.attrs = copy.deepcopy(node.attrs)
+        new.aliases = dict(node.aliases)
+        for child in node.children:
+            child_name = None
+            if name and child.name.startswith(node.name):
+                child_name = name + child.name[len(node.name):]
+            self._copy(child, new, child_name)
+        return new
+
+    def circle(self, nr=(0, 0, 1), normal=None, c=(0, 0, 0), center=None,
+               s=8, sections=None, r=1.0, radius=None, n=None, name=None,
+               d=3, degree=None, ch=True, constructionHistory=None,
+               **kwargs):
+        normal = normal or nr
+        center = center or c
+        sections = sections or s
+        radius = r if radius is None else radius
+
+        node = self._create('transform', n or name or 'nurbsCircle1')
+        shape = self._shape('nurbsCurve', node)
+        # periodic cubic CVs whose curve passes through the given radius
+        step = 2 * math.pi / sections
+        dist = 6.0 * radius / (4 + 2 * math.cos(step))
+        u, v = _plane(normal)
+        cvs = list()
+        for i in range(sections):
+            a = step * (i + 1)
+            cvs.append([center[k] + dist * (math.cos(a) * u[k]
+                                            + math.sin(a) * v[k])
+                        for k in range(3)])
+        cvs.extend(copy.deepcopy(cvs[:3]))
+        shape.attrs.update({
+            'cvs': cvs, 'degree': 3, 'form': 2, 'spans': sections,
+            'knots': [float(k) for k in range(-2, len(cvs) + 2 - 2)],
+        })
+
+        make = self._create('makeNurbCircle')
+        make.attrs.update({'radius': radius, 'sections': sections})
+        self._connect(make, 'outputCurve', shape, 'create')
+        self.selection = [node]
+        return [node.name, make.name]
+
+    def curve(self, *args, **kwargs):
+        points = [list(p) for p in _flag(kwargs, 'p', 'point', default=[])]
+        degree = _flag(kwargs, 'd', 'degree', default=3)
+        periodic = _flag(kwargs, 'per', 'periodic', default=False)
+        knots = _flag(kwargs, 'k', 'knot')
+        if len(points) < degree + 1:
+            raise RuntimeError('curve needs at least {} points'.format(
+                degree + 1))
+
+        if not knots:
+            knots = _open_knots(len(points), degree)
+
+        node = self._create(
+            'transform', _flag(kwargs, 'n', 'name', default='curve1'))
+        shape = self._shape('nurbsCurve', node)
+        shape.attrs.update({
+            'cvs': points, 'degree': degree, 'form': 2 if periodic else 0,
+            'spans': len(points) - degree,
+            'knots': [float(k) for k in knots],
+        })
+        self.selection = [node]
+        return node.name
+
+    def textCurves(self, t='', text=None, n=None, name=None, f=None,
+                   font=None, **kwargs):
+        text = text or t
+        node = self._create('transform', (n or name or 'Text') + 'Shape')
+        offset = 0.0
+        for char in text:
+            if char.strip():
+                letter = self._create('transform', 'Char_{}_1'.format(
+                    char if char.isalnum() else 'sym'), node)
+                shape = self._shape('nurbsCurve', letter, 'curveShape1')
+                box = [[offset, 0, 0], [offset + 0.6, 0, 0],
+                       [offset + 0.6, 1, 0], [offset, 1, 0], [offset, 0, 0]]
+                shape.attrs.update({
+                    'cvs': box, 'degree': 1, 'form': 1, 'spans': 4,
+                    'knots': [0.0, 1.0, 2.0, 3.0, 4.0]})
+            offset += 0.7
+        make = self._create('makeTextCurves')
+        make.attrs['text'] = text
+        self.selection = [node]
+        return [node.name, make.name]
+
+    # -- hierarchy --
+
+    def parent(self, *args, **kwargs):
+        nodes = _flat_args(args)
+        relative = _flag(kwargs, 'r', 'relative', default=False)
+        if _flag(kwargs, 'w', 'world'):
+            target = None
+        else:
+            if len(nodes) < 2:
+                nodes = [n.name for n in self.selection] + nodes
+            target = self._get(nodes.pop())
+
+        out = list()
+        for node in [self._get(n) for n in nodes]:
+            if node.parent is target:
+                # like Maya, only warn and leave the object in place
+                LOG.warning('%s is already a child of %s', node.name,
+                            target.name if target else 'the world')
+                continue
+            if target is not None and (
+                    target is node or target in self._descendants(node)):
+                raise RuntimeError('cannot parent {} under {}'.format(
+                    node.name, target.name))
+            self._reparent(node, target, relative=relative)
+            out.append(node.name)
+        return out
+
+    def listRelatives(self, *args, **kwargs):
+        nodes = self._targets(args)
+        ntype = _flag(kwargs, 'type')
+        out = list()
+        for node in nodes:
+            if _flag(kwargs, 'p', 'parent'):
+                found = [node.parent] if node.parent else []
+            elif _flag(kwargs, 'ad', 'allDescendents'):
+                found = list(reversed(self._descendants(node)))
+            elif _flag(kwargs, 's', 'shapes'):
+                found = self._shapes(node)
+            else:
+                found = list(node.children)
+            if ntype:
+                types = ntype if isinstance(ntype, (list, tuple)) else [ntype]
+                found = [f for f in found if f.type in types]
+            out.extend(f.name for f in found)
+        return out or None
+
+    def delete(self, *args, **kwargs):
+        names = _flat_args(args)
+        if not names:
+            if not self.selection:
+                raise RuntimeError('Not enough objects or values.')
+            names = [n.name for n in self.selection]
+
+        # shapes and children may go away along with an earlier node
+        nodes = [self._get(n) for n in names if '.' not in n]
+        for node in nodes:
+            if self.nodes.get(node.name) is node:
+                self._remove(node)
+
+    def rename(self, *args, **kwargs):
+        if len(args) == 1:
+            old, new = self.selection[0], args[0]
+        else:
+            old, new = self._get(_flat_args([args[0]])[0]), args[1]
+        new = self._unique(new) if new != old.name else new
+        self.nodes.pop(old.name)
+        old.name = new
+        self.nodes[new] = old
+        return new
+
+    # -- selection and listing --
+
+    def select(self, *args, **kwargs):
+        if _flag(kwargs, 'cl', 'clear'):
+            self.selection = list()
+            return
+        nodes = [self._get(n) for n in _flat_args(args)]
+        if _flag(kwargs, 'd', 'deselect'):
+            self.selection = [n for n in self.selection if n not in nodes]
+        elif _flag(kwargs, 'add', 'tgl', 'toggle'):
+            self.selection.extend(n for n in nodes if n not in self.selection)
+        else:
+            self.selection = nodes
+
+    def ls(self, *args, **kwargs):
+        patterns = _flat_args(args)
+        if _flag(kwargs, 'sl', 'selection'):
+            found = list(self.selection)
+            if patterns:
+                found = [n for n in found if any(
+                    fnmatch.fnmatchcase(n.name, p) for p in patterns)]
+        elif patterns:
+            found = list()
+            for pattern in patterns:
+                if '.' in pattern:
+                    comps = self._components(pattern)
+                    if _flag(kwargs, 'fl', 'flatten'):
+                        return ['{}.cv[{}]'.format(s.parent.name, i)
+                                for s, i in comps]
+                    return [pattern] if comps else []
+                pattern = pattern.split('|')[-1]
+                if any(c in pattern for c in '*?['):
+                    found.extend(n for name, n in sorted(self.nodes.items())
+                                 if fnmatch.fnmatchcase(name, pattern))
+                elif pattern in self.nodes:
+                    found.append(self.nodes[pattern])
+        else:
+            found = list(self.nodes.values())
+
+        ntype = _flag(kwargs, 'type', 'typ')
+        if ntype:
+            types = ntype if isinstance(ntype, (list, tuple)) else [ntype]
+            found = [n for n in found if n.type in types]
+        if _flag(kwargs, 'transforms', 'tr'):
+            found = [n for n in found if n.is_transform]
+        if _flag(kwargs, 'shapes', 's'):
+            found = [n for n in found if n.type in SHAPE_TYPES]
+        return [n.name for n in found]
+
+    def objExists(self, name):
+        node, _, attr = name.split('|')[-1].partition('.')
+        if node not in self.nodes:
+            return False
+        return not attr or self.attributeQuery(attr, node=node, exists=True)
+
+    def nodeType(self, name, **kwargs):
+        return self._get(name.split('.')[0]).type
+
+    objectType = nodeType
+
+    # -- transforms --
+
+    def xform(self, *args, **kwargs):
+        query = _flag(kwargs, 'q', 'query')
+        world = _flag(kwargs, 'ws', 'worldSpace')
+        relative = _flag(kwargs, 'r', 'relative')
+        names = _flat_args(args)
+        if not names:
+            names = [n.name for n in self.selection]
+
+        if names and '.' in names[0] and '[' in names[0]:
+            return self._xform_components(names, query, world, kwargs)
+
+        if query:
+            node = self._get(names[0])
+            return self._xform_query(node, world, kwargs)
+
+        for name in names:
+            self._xform_edit(self._get(name), world, relative, kwargs)
+
+    def _xform_query(self, node, world, kwargs):
+        if _flag(kwargs, 'm', 'matrix'):
+            return flatten(node.world_matrix if world else node.local_matrix)
+        if _flag(kwargs, 't', 'translation'):
+            if world:
+                return list(node.world_matrix[3][:3])
+            return list(node.attrs['translate'])
+        if _flag(kwargs, 'ro', 'rotation'):
+            if world:
+                return decompose(node.world_matrix)[1]
+            return list(node.attrs['rotate'])
+        if _flag(kwargs, 's', 'scale'):
+            if world:
+                return decompose(node.world_matrix)[2]
+            return list(node.attrs['scale'])
+        for flag, attr in [('rp', 'rotatePivot'), ('sp', 'scalePivot'),
+                           ('piv', 'rotatePivot')]:
+            if kwargs.get(flag):
+                pivot = list(node.attrs[attr])
+                if world:
+                    pivot = transform_point(pivot, node.world_matrix)
+                return pivot + pivot if flag == 'piv' else pivot
+        raise RuntimeError('unsupported xform query: {}'.format(kwargs))
+
+    def _xform_edit(self, node, world, relative, kwargs):
+        matrix = _flag(kwargs, 'm', 'matrix')
+        if matrix:
+            matrix = unflatten(matrix)
+            if world:
+                self._set_world(node, matrix)
+            else:
+                self._set_world(node, mult(matrix, node.parent_matrix))
+            return
+
+        translate = _flag(kwargs, 't', 'translation')
+        if translate is not None:
+            if world:
+                target = node.world_matrix
+                if relative:
+                    translate = [a + b for a, b in
+                                 zip(target[3][:3], translate)]
+                target[3][:3] = list(translate)
+                self._set_world(node, target)
+            elif relative:
+                node.attrs['translate'] = tuple(
+                    a + b for a, b in zip(node.attrs['translate'], translate))
+            else:
+                node.attrs['translate'] = tuple(translate)
+
+        rotate = _flag(kwargs, 'ro', 'rotation')
+        if rotate is not None:
+            if world:
+                current = node.world_matrix
+                t, _, s = decompose(current)
+                self._set_world(node, compose(t, rotate, s))
+            elif relative:
+                node.attrs['rotate'] = tuple(
+                    a + b for a, b in zip(node.attrs['rotate'], rotate))
+            else:
+                node.attrs['rotate'] = tuple(rotate)
+
+        scale = _flag(kwargs, 's', 'scale')
+        if scale is not None:
+            if relative:
+                scale = [a * b for a, b in zip(node.attrs['scale'], scale)]
+            node.attrs['scale'] = tuple(scale)
+
+        for flag, attrs in [('rp', ['rotatePivot']), ('sp', ['scalePivot']),
+                            ('piv', ['rotatePivot', 'scalePivot'])]:
+            pivot = kwargs.get(flag)
+            if pivot is not None:
+                if world:
+                    pivot = transform_point(pivot, inverse(node.world_matrix))
+                for attr in attrs:
+                    node.attrs[attr] = tuple(pivot)
+
+    def _xform_components(self, names, query, world, kwargs):
+        comps = list()
+        for name in names:
+            comps.extend(self._components(name))
+
+        if query:
+            out = list()
+            for shape, index in comps:
+                point = shape.attrs['cvs'][index]
+                if world:
+                    point = transform_point(point, shape.parent.world_matrix)
+                out.extend(point)
+            return out
+
+        translate = _flag(kwargs, 't', 'translation')
+        for shape, index in comps:
+            point = list(translate)
+            if world:
+                point = transform_point(
+                    point, inverse(shape.parent.world_matrix))
+            shape.attrs['cvs'][index] = point
+
+    def move(self, *args, **kwargs):
+        values, names = _split_values(args)
+        relative = _flag(kwargs, 'r', 'relative', default=False)
+        for name in names or [n.name for n in self.selection]:
+            if '.' in name:
+                node, attr = self._split(name)
+                if attr in ('sp', 'rp', 'scalePivot', 'rotatePivot'):
+                    flag = 'sp' if attr in ('sp', 'scalePivot') else 'rp'
+                    self._xform_edit(node, True, False, {flag: values})
+                    continue
+                self.xform(name, t=values, ws=1, r=relative)
+                continue
+
+            node = self._get(name)
+            target = node.world_matrix
+            if relative:
+                target[3][:3] = [a + b for a, b in
+                                 zip(target[3][:3], values)]
+            else:
+                target[3][:3] = list(values)
+            self._set_world(node, target)
+
+    def rotate(self, *args, **kwargs):
+        values, names = _split_values(args)
+        relative = _flag(kwargs, 'r', 'relative', default=False)
+        for node in self._targets(names):
+            if relative:
+                rot = mult(euler_matrix(node.attrs['rotate']),
+                           euler_matrix(values))
+                node.attrs['rotate'] = tuple(matrix_euler(rot))
+            else:
+                node.attrs['rotate'] = tuple(values)
+
+    def scale(self, *args, **kwargs):
+        values, names = _split_values(args)
+        relative = _flag(kwargs, 'r', 'relative', default=False)
+        for node in self._targets(names):
+            if relative:
+                values = [a * b for a, b in zip(node.attrs['scale'], values)]
+            node.attrs['scale'] = tuple(values)
+
+    def makeIdentity(self, *args, **kwargs):
+        apply = _flag(kwargs, 'a', 'apply')
+        do_all = not any(kwargs.get(f) for f in ('t', 'r', 's', 'translate',
+                                                  'rotate', 'scale'))
+        parts = dict(
+            translate=do_all or _flag(kwargs, 't', 'translate'),
+            rotate=do_all or _flag(kwargs, 'r', 'rotate'),
+            scale=do_all or _flag(kwargs, 's', 'scale'))
+
+        for node in self._targets(args):
+            frozen = compose(
+                node.attrs['translate'] if parts['translate'] else None,
+                node.attrs['rotate'] if parts['rotate'] else None,
+                node.attrs['scale'] if parts['scale'] else None)
+
+            if apply:
+                if node.type == 'joint' and parts['rotate']:
+                    jo = mult(euler_matrix(node.attrs['rotate']),
+                              euler_matrix(node.attrs['jointOrient']))
+                    node.attrs['jointOrient'] = tuple(matrix_euler(jo))
+                for shape in self._shapes(node):
+                    if 'cvs' in shape.attrs:
+                        shape.attrs['cvs'] = [transform_point(p, frozen)
+                                              for p in shape.attrs['cvs']]
+
+            for attr, default in [('translate', (0.0, 0.0, 0.0)),
+                                  ('rotate', (0.0, 0.0, 0.0)),
+                                  ('scale', (1.0, 1.0, 1.0))]:
+                if parts[attr]:
+                    node.attrs[attr] = default
+
+    def matchTransform(self, *args, **kwargs):
+        names = _flat_args(args)
+        target = self._get(names[-1]).world_matrix
+        do_all = not any(kwargs.get(f) for f in ('pos', 'rot', 'scl',
+                                                  'position', 'rotation',
+                                                  'scale'))
+        for node in [self._get(n) for n in names[:-1]]:
+            t, r, s = decompose(node.world_matrix)
+            tt, tr, ts = decompose(target)
+            if do_all or _flag(kwargs, 'pos', 'position'):
+                t = tt
+            if do_all or _flag(kwargs, 'rot', 'rotation'):
+                r = tr
+            if do_all or _flag(kwargs, 'scl', 'scale'):
+                s = ts
+            self._set_world(node, compose(t, r, s))
+
+    def inheritTransform(self, *args, **kwargs):
+        state = not _flag(kwargs, 'off')
+        if _flag(kwargs, 'on'):
+            state = True
+        for node in self._targets(args):
+            node.attrs['inheritsTransform'] = state
+
+    # -- attributes --
+
+    def addAttr(self, *args, **kwargs):
+        node = self._targets(args)[0]
+        long_name = _flag(kwargs, 'ln', 'longName')
+        short_name = _flag(kwargs, 'sn', 'shortName')
+        long_name = long_name or short_name
+        if long_name in node.attrs:
+            raise RuntimeError('Found a attribute named: {}'.format(
+                long_name))
+        if short_name and short_name != long_name:
+            node.aliases[short_name] = long_name
+
+        data_type = _flag(kwargs, 'dt', 'dataType')
+        default = _flag(kwargs, 'dv', 'defaultValue', default=0.0)
+        node.attrs[long_name] = None if data_type else default
+        meta = node.attrs.setdefault('__dynamic__', dict())
+        meta[long_name] = {
+            'type': _flag(kwargs, 'at', 'attributeType') or data_type,
+            'min': _flag(kwargs, 'min', 'minValue'),
+            'max': _flag(kwargs, 'max', 'maxValue'),
+            'keyable': bool(_flag(kwargs, 'k', 'keyable')),
+        }
+
+    def attributeQuery(self, attr, node=None, n=None, exists=False,
+                       ex=False, **kwargs):
+        node = self._get(node or n)
+        name, _ = self._resolve(node, attr)
+        return name in node.attrs or name in node.inputs
+
+    def listAttr(self, *args, **kwargs):
+        node = self._targets(args)[0]
+        if _flag(kwargs, 'ud', 'userDefined'):
+            return list(node.attrs.get('__dynamic__', dict())) or None
+        return [a for a in node.attrs if not a.startswith('__')]
+
+    def getAttr(self, plug, **kwargs):
+        node, attr = self._split(plug)
+        name, axis = self._resolve(node, attr)
+
+        if name in ('worldMatrix', 'worldMatrix[0]'):
+            return flatten(node.world_matrix)
+        if name in ('matrix',):
+            return flatten(node.local_matrix)
+        if name in ('parentMatrix', 'parentMatrix[0]'):
+            return flatten(node.parent_matrix)
+        if name in ('parentInverseMatrix', 'parentInverseMatrix[0]'):
+            return flatten(inverse(node.parent_matrix))
+        if name == 'arcLength':
+            return self._arc_length(node)
+        if name == 'distance':
+            return self._distance(node)
+        if name in ('degree', 'spans', 'form') and node.type != 'nurbsCurve':
+            return self._curve_shape(node.name).attrs[name]
+        if name.startswith('cv['):
+            return [tuple(s.attrs['cvs'][i])
+                    for s, i in self._components(plug)]
+
+        if name not in node.attrs:
+            raise ValueError('No object matches name: {}'.format(plug))
+        value = node.attrs[name]
+        if axis is not None:
+            return value[axis]
+        if isinstance(value, tuple):
+            return [value]
+        return value
+
+    def setAttr(self, plug, *values, **kwargs):
+        node, attr = self._split(plug)
+        name, axis = self._resolve(node, attr)
+
+        lock = _flag(kwargs, 'l', 'lock')
+        if values and name in node.locked:
+            raise RuntimeError(
+                'The attribute \'{}\' is locked or connected and cannot '
+                'be modified.'.format(plug))
+
+        data_type = kwargs.get('type')
+        if data_type == 'nurbsCurve':
+            node.attrs.update(_parse_curve(values))
+        elif data_type == 'matrix':
+            node.attrs[name] = tuple(_flat_args(values))
+        elif values:
+            if axis is not None:
+                vector = list(node.attrs.get(name, DEFAULTS.get(
+                    name, (0.0, 0.0, 0.0))))
+                vector[axis] = values[0]
+                node.attrs[name] = tuple(vector)
+            elif len(values) == 1 and not isinstance(values[0], (list, tuple)):
+                node.attrs[name] = values[0]
+            else:
+                node.attrs[name] = tuple(_flat_args(values))
+
+        if lock is not None:
+            (node.locked.add if lock else node.locked.discard)(name)
+        keyable = _flag(kwargs, 'k', 'keyable')
+        if keyable is not None:
+            node.attrs.setdefault('__keyable__', dict())[name] = keyable
+
+    def connectAttr(self, src, dst, f=False, force=False, **kwargs):
+        src_node, src_attr = self._split(src)
+        dst_node, dst_attr = self._split(dst)
+        self._connect(
+            src_node, self._plug_name(src_node, src_attr),
+            dst_node, self._plug_name(dst_node, dst_attr), f or force)
+
+    def disconnectAttr(self, src, dst, **kwargs):
+        src_node, src_attr = self._split(src)
+        dst_node, dst_attr = self._split(dst)
+        self._disconnect(src_node, src_attr, dst_node,
+                         self._plug_name(dst_node, dst_attr))
+
+    def _plug_name(self, node, attr):
+        name, axis = self._resolve(node, attr)
+        if axis is None:
+            return name
+        return name + 'XYZ'[axis]
+
+    def listConnections(self, *args, **kwargs):
+        source = _flag(kwargs, 's', 'source', default=True)
+        dest = _flag(kwargs, 'd', 'destination', default=True)
+        plugs = _flag(kwargs, 'p', 'plugs')
+        ntype = _flag(kwargs, 'type', 't')
+
+        out = list()
+        for name in _flat_args(args):
+            attr = None
+            if '.' in name:
+                node, attr = self._split(name)
+                attr = self._plug_name(node, attr)
+            else:
+                node = self._get(name)
+            found = list()
+            if source:
+                found.extend((src, src_attr)
+                             for dst_attr, (src, src_attr) in
+                             node.inputs.items()
+                             if attr is None or dst_attr == attr)
+            if dest:
+                found.extend((dst, dst_attr)
+                             for src_attr, dst, dst_attr in node.outputs
+                             if attr is None or src_attr == attr)
+            for other, other_attr in found:
+                if ntype and other.type != ntype:
+                    continue
+                # like Maya, report the transform of a connected shape
+                if other.type in SHAPE_TYPES and not plugs and \
+                        not _flag(kwargs, 'sh', 'shapes'):
+                    other = other.parent
+                out.append('{}.{}'.format(other.name, other_attr)
+                           if plugs else other.name)
+        return out or None
+
+    def listHistory(self, *args, **kwargs):
+        out = list()
+        stack = self._targets(args)
+        while stack:
+            node = stack.pop(0)
+            if node in out:
+                continue
+            out.append(node)
+            stack.extend(src for src, _ in node.inputs.values())
+            stack.extend(self._shapes(node))
+        return [n.name for n in out]
+
+    # -- rigging --
+
+    def _constraint(self, ctype, args, kwargs):
+        names = _flat_args(args)
+        drivers, driven = names[:-1], self._get(names[-1])
+        weight = _flag(kwargs, 'w', 'weight', default=1.0)
+
+        cons = [c for c in driven.children if c.type == ctype]
+        if cons:
+            cons = cons[0]
+        else:
+            cons = self._create(ctype, _flag(
+                kwargs, 'n', 'name',
+                default='{}_{}1'.format(driven.name, ctype)), driven)
+            skipped = {
+                'rotate': _flag(kwargs, 'sr', 'skipRotate'),
+                'translate': _flag(kwargs, 'st', 'skipTranslate'),
+            }
+            for out_attr, driven_attr in CONSTRAINTS[ctype]:
+                # only a fully skipped channel is left unconnected
+                skip = skipped.get(driven_attr) or ''
+                if set(_flat_args([skip])) >= {'x', 'y', 'z'} \
+                        or skip == 'xyz':
+                    continue
+                self._connect(cons, out_attr, driven, driven_attr, True)
+            cons.attrs['maintainOffset'] = bool(
+                _flag(kwargs, 'mo', 'maintainOffset'))
+
+        for driver in [self._get(d) for d in drivers]:
+            index = len([a for a in cons.inputs
+                         if a.endswith('.targetParentMatrix')])
+            weight_attr = '{}W{}'.format(driver.name, index)
+            cons.attrs[weight_attr] = weight
+            cons.aliases['w{}'.format(index)] = weight_attr
+            self._connect(
+                driver, 'parentMatrix[0]', cons,
+                'target[{}].targetParentMatrix'.format(index))
+            self._connect(
+                driver, 'translate', cons,
+                'target[{}].targetTranslate'.format(index))
+            self._connect(
+                cons, weight_attr, cons,
+                'target[{}].targetWeight'.format(index))
+        return [cons.name]
+
+    def pointConstraint(self, *args, **kwargs):
+        return self._constraint('pointConstraint', args, kwargs)
+
+    def orientConstraint(self, *args, **kwargs):
+        return self._constraint('orientConstraint', args, kwargs)
+
+    def parentConstraint(self, *args, **kwargs):
+        return self._constraint('parentConstraint', args, kwargs)
+
+    def aimConstraint(self, *args, **kwargs):
+        return self._constraint('aimConstraint', args, kwargs)
+
+    def scaleConstraint(self, *args, **kwargs):
+        return self._constraint('scaleConstraint', args, kwargs)
+
+    def poleVectorConstraint(self, *args, **kwargs):
+        return self._constraint('poleVectorConstraint', args, kwargs)
+
+    def ikHandle(self, *args, **kwargs):
+        start = self._get(_flag(kwargs, 'sj', 'startJoint'))
+        end = self._get(_flag(kwargs, 'ee', 'endEffector'))
+        solver = _flag(kwargs, 'sol', 'solver', default='ikRPsolver')
+
+        handle = self._create(
+            'ikHandle', _flag(kwargs, 'n', 'name', default='ikHandle1'))
+        handle.attrs.update({
+            'poleVector': (0.0, 0.0, 0.0),
+            'dTwistControlEnable': False,
+            'dWorldUpType': 0,
+            'solver': solver,
+        })
+        handle.attrs['translate'] = tuple(end.world_matrix[3][:3])
+
+        effector = self._create('ikEffector', 'effector1', end.parent)
+        effector.attrs['translate'] = end.attrs['translate']
+        self._connect(start, 'message', handle, 'startJoint')
+        self._connect(effector, 'handlePath[0]', handle, 'endEffector')
+        self._connect(end, 'translate', effector, 'translate')
+
+        out = [handle.name, effector.name]
+        if solver == 'ikSplineSolver':
+            curve = _flag(kwargs, 'c', 'curve')
+            if not curve and _flag(kwargs, 'ccv', 'createCurve',
+                                   default=True):
+                joints = [start]
+                while joints[-1] is not end and [
+                        c for c in joints[-1].children if c.type == 'joint']:
+                    joints.append([c for c in joints[-1].children
+                                   if c.type == 'joint'][0])
+                curve = self.curve(p=[j.world_matrix[3][:3] for j in joints],
+                                   d=min(3, len(joints) - 1))
+                out.append(curve)
+            shape = self._curve_shape(curve)
+            self._connect(shape, 'worldSpace[0]', handle, 'inCurve')
+
+        self.selection = [handle]
+        return out
+
+    def cluster(self, *args, **kwargs):
+        points = list()
+        for name in _flat_args(args):
+            points.extend(self._components(name) if '[' in name else
+                          [(self._curve_shape(name), i) for i in range(
+                              len(self._curve_shape(name).attrs['cvs']))])
+
+        name = _flag(kwargs, 'n', 'name', default='cluster1')
+        deformer = self._create('cluster', name)
+        handle = self._create('transform', '{}Handle'.format(deformer.name))
+        self._shape('clusterHandle', handle)
+        centroid = [sum(s.attrs['cvs'][i][k] for s, i in points) /
+                    max(1, len(points)) for k in range(3)]
+        handle.attrs['rotatePivot'] = tuple(centroid)
+        handle.attrs['scalePivot'] = tuple(centroid)
+        deformer.attrs['points'] = [i for _, i in points]
+        self._connect(handle, 'worldMatrix[0]', deformer, 'matrix')
+
+        # stack the deformer on the existing history of the shape
+        for shape in {s for s, _ in points}:
+            if 'create' in shape.inputs:
+                src, src_attr = shape.inputs['create']
+                self._connect(src, src_attr, deformer,
+                              'input[0].inputGeometry')
+            self._connect(deformer, 'outputGeometry[0]', shape, 'create',
+                          True)
+
+        self.selection = [handle]
+        return [deformer.name, handle.name]
+
+    def setDrivenKeyframe(self, *args, **kwargs):
+        driver = _flag(kwargs, 'cd', 'currentDriver')
+        driver_node, driver_attr = self._split(driver)
+        driver_attr = self._plug_name(driver_node, driver_attr)
+        value = _flag(kwargs, 'v', 'value')
+        driver_value = _flag(kwargs, 'dv', 'driverValue')
+        if driver_value is None:
+            driver_value = self._current(driver_node, driver_attr)
+
+        for plug in _flat_args(args):
+            node, attr = self._split(plug)
+            attr = self._plug_name(node, attr)
+            if attr in node.inputs and \
+                    node.inputs[attr][0].type.startswith('animCurve'):
+                curve = node.inputs[attr][0]
+            else:
+                kind = 'UU'
+                if attr.startswith('translate'):
+                    kind = 'UL'
+                elif attr.startswith('rotate'):
+                    kind = 'UA'
+                curve = self._create('animCurve' + kind, '{}_{}'.format(
+                    node.name, attr))
+                curve.attrs['keys'] = dict()
+                self._connect(driver_node, driver_attr, curve, 'input')
+                self._connect(curve, 'output', node, attr, True)
+
+            # without a value, each plug keys its own current value
+            key_value = self._current(node, attr) if value is None else value
+            curve.attrs['keys'][driver_value] = key_value
+
+    def arclen(self, *args, **kwargs):
+        shape = self._curve_shape(_flat_args(args)[0])
+        if not _flag(kwargs, 'ch', 'constructionHistory'):
+            return self._arc_length(shape)
+
+        info = self._create('curveInfo')
+        self._connect(shape, 'worldSpace[0]', info, 'inputCurve')
+        return info.name
+
+    def _arc_length(self, node):
+        if node.type == 'curveInfo':
+            node = node.inputs['inputCurve'][0]
+        # control polygon length, an upper bound of the true arc length
+        points = [transform_point(p, node.parent.world_matrix)
+                  for p in node.attrs['cvs']]
+        return sum(math.sqrt(sum((a - b) ** 2 for a, b in zip(p, q)))
+                   for p, q in zip(points, points[1:]))
+
+    def distanceDimension(self, sp=None, startPoint=None, ep=None,
+                          endPoint=None, **kwargs):
+        locs = list()
+        for point in (sp or startPoint, ep or endPoint):
+            loc = self._get(self.spaceLocator()[0])
+            loc.attrs['translate'] = tuple(point)
+            locs.append(loc)
+
+        node = self._create('transform', 'distanceDimension1')
+        shape = self._shape('distanceDimShape', node)
+        self._connect(self._shapes(locs[0])[0], 'worldPosition[0]',
+                      shape, 'startPoint')
+        self._connect(self._shapes(locs[1])[0], 'worldPosition[0]',
+                      shape, 'endPoint')
+        return shape.name
+
+    def _distance(self, shape):
+        if shape.type != 'distanceDimShape':
+            shape = self._shapes(shape)[0]
+        start = shape.inputs['startPoint'][0].parent.world_matrix[3][:3]
+        end = shape.inputs['endPoint'][0].parent.world_matrix[3][:3]
+        return math.sqrt(sum((a - b) ** 2 for a, b in zip(start, end)))
+
+    # -- undo and file --
+
+    def undoInfo(self, *args, **kwargs):
+        if _flag(kwargs, 'q', 'query'):
+            return True
+        if _flag(kwargs, 'ock', 'openChunk'):
+            self._chunks.append(self._state())
+        elif _flag(kwargs, 'cck', 'closeChunk') and self._chunks:
+            self._undo.append(self._chunks.pop())
+
+    def undo(self, *args, **kwargs):
+        if self._undo:
+            self._restore(self._undo.pop())
+
+    def _state(self):
+        """
+        :return: tuple. copy of the node table and selection, made without
+                 recursing along the hierarchy
+        """
+        nodes = dict()
+        for name, node in self.nodes.items():
+            new = Node(node.name, node.type)
+            new.attrs = copy.deepcopy(node.attrs)
+            for key, value in vars(node).items():
+                if key not in ('parent', 'children', 'inputs', 'outputs',
+                               '_attrs', '_world'):
+                    setattr(new, key, copy.deepcopy(value))
+            nodes[name] = new
+
+        copies = dict((id(node), nodes[name])
+                      for name, node in self.nodes.items())
+        for name, node in self.nodes.items():
+            new = nodes[name]
+            new.parent = copies[id(node.parent)] if node.parent else None
+            new.children = [copies[id(c)] for c in node.children]
+            new.inputs = dict((attr, (copies[id(src)], src_attr))
+                              for attr, (src, src_attr) in
+                              node.inputs.items())
+            new.outputs = [(src_attr, copies[id(dst)], dst_attr)
+                           for src_attr, dst, dst_attr in node.outputs]
+        return nodes, [copies[id(node)] for node in self.selection]
+
+    def _restore(self, state):
+        self.nodes, self.selection = state
+
+    def file(self, *args, **kwargs):
+        if _flag(kwargs, 'new', 'newFile'):
+            self.reset()
+        rename = _flag(kwargs, 'rn', 'rename')
+        if rename:
+            self.path = rename
+        if _flag(kwargs, 'q', 'query') and _flag(kwargs, 'sn', 'sceneName'):
+            return self.path or ''
+        if _flag(kwargs, 's', 'save'):
+            with open(self.path, 'w') as f:
+                json.dump(self.dump(), f, indent=1, sort_keys=True)
+            return self.path
+        if _flag(kwargs, 'o', 'open'):
+            with open(args[0]) as f:
+                self.load(json.load(f))
+            self.path = args[0]
+            return self.path
+
+    def dump(self):
+        """
+        :return: dict. JSON serializable description of the scene
+        """
+        data = dict()
+        for name, node in self.nodes.items():
+            data[name] = {
+                'type': node.type,
+                'parent': node.parent.name if node.parent else None,
+                'attrs': {k: v for k, v in node.attrs.items()
+                          if not k.startswith('__')},
+                'inputs': {a: '{}.{}'.format(s.name, sa)
+                           for a, (s, sa) in node.inputs.items()},
+            }
+        return data
+
+    def load(self, data):
+        """
+        :param data: dict. description produced by dump()
+        """
+        self.reset()
+        for name, info in data.items():
+            node = Node(name, info['type'])
+            node.attrs.update({k: tuple(v) if isinstance(v, list) and
+                               k not in ('cvs', 'knots') else v
+                               for k, v in info['attrs'].items()})
+            self.nodes[name] = node
+        for name, info in data.items():
+            node = self.nodes[name]
+            if info['parent']:
+                self._reparent(node, self.nodes[info['parent']])
+            for attr, src in info['inputs'].items():
+                src_node, src_attr = src.split('.', 1)
+                self._connect(self.nodes[src_node], src_attr, node, attr)
+
+
+def _split_values(args):
+    values = [a for a in args if isinstance(a, (int, float))]
+    names = _flat_args([a for a in args if not isinstance(a, (int, float))])
+    return values, names
+
+
+def _plane(normal):
+    """
+    :return: tuple. two unit vectors spanning the plane of the normal
+    """
+    length = math.sqrt(sum(v * v for v in normal))
+    n = [v / length for v in normal]
+    ref = [1.0, 0.0, 0.0] if abs(n[0]) < 0.9 else [0.0, 1.0, 0.0]
+    u = _cross(n, ref)
+    u_len = math.sqrt(sum(v * v for v in u))
+    u = [v / u_len for v in u]
+    return u, _cross(n, u)
+
+
+def _cross(a, b):
+    return [a[1] * b[2] - a[2] * b[1],
+            a[2] * b[0] - a[0] * b[2],
+            a[0] * b[1] - a[1] * b[0]]
+
+
+def _aim_matrix(aim, up):
+    """
+    :return: list. 4x4 rotation matrix with X along aim and Y towards up
+    """
+    length = math.sqrt(sum(v * v for v in aim)) or 1.0
+    x = [v / length for v in aim]
+    z = _cross(x, up)
+    if sum(v * v for v in z) < 1e-12:
+        z = _cross(x, [0, 0, 1])
+    z_len = math.sqrt(sum(v * v for v in z))
+    z = [v / z_len for v in z]
+    y = _cross(z, x)
+    m = identity()
+    m[0][:3], m[1][:3], m[2][:3] = x, y, z
+    return m
+
+
+def _open_knots(count, degree):
+    """
+    :return: list. Maya style knot vector of an open uniform curve
+    """
+    spans = count - degree
+    return [0] * (degree - 1) + list(range(spans + 1)) + [spans] * (degree - 1)
+
+
+def _parse_curve(values):
+    """
+    Parse the flat value list of a nurbsCurve typed setAttr call
+    """
+    values = list(values)
+    degree, spans, form = int(values[0]), int(values[1]), int(values[2])
+    dim = int(values[4])
+    knot_count = int(values[5])
+    knots = [float(k) for k in values[6:6 + knot_count]]
+    cv_count = int(values[6 + knot_count])
+    flat = [float(v) for v in values[7 + knot_count:]]
+    cvs = [flat[i*dim:i*dim+3] + [0.0] * (3 - dim) for i in range(cv_count)]
+    return {'degree': degree, 'spans': spans, 'form': form,
+            'knots': knots, 'cvs': cvs}
+
+
+SCENE = Scene()
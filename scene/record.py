@@ -0,0 +1,280 @@
+"""
+Record the scene commands issued by a build into an operation log and
+replay the log in coalesced batches
+
+A typical use is to run build_rig against the in-memory scene while
+recording, then replay the log inside Maya as a single undo chunk:
+
+    with record.recording() as log:
+        rig.build_rig()
+    record.replay(log)
+"""
+
+import json
+from collections import OrderedDict, namedtuple
+from contextlib import contextmanager
+
+from . import Layer, cmds, use
+
+
+# commands that never change the scene
+QUERIES = {
+    'ls', 'getAttr', 'objExists', 'nodeType', 'objectType', 'listRelatives',
+    'listConnections', 'listHistory', 'listAttr', 'attributeQuery',
+}
+
+KINDS = {
+    'spaceLocator': 'create', 'joint': 'create', 'group': 'create',
+    'createNode': 'create', 'shadingNode': 'create', 'duplicate': 'create',
+    'circle': 'create', 'curve': 'create', 'textCurves': 'create',
+    'cluster': 'create', 'ikHandle': 'create', 'arclen': 'create',
+    'distanceDimension': 'create',
+    'parent': 'parent',
+    'setAttr': 'setAttr', 'addAttr': 'setAttr',
+    'connectAttr': 'connect', 'disconnectAttr': 'connect',
+    'setDrivenKeyframe': 'connect',
+    'pointConstraint': 'constraint', 'orientConstraint': 'constraint',
+    'parentConstraint': 'constraint', 'aimConstraint': 'constraint',
+    'scaleConstraint': 'constraint', 'poleVectorConstraint': 'constraint',
+    'delete': 'delete',
+}
+
+
+class Operation(namedtuple(
+        'Operation', ['kind', 'command', 'args', 'kwargs', 'result'])):
+    """
+    A single recorded scene mutation
+
+    kind is one of create, parent, setAttr, connect, constraint, delete
+    or edit (any other mutation such as xform, move or select)
+    """
+
+    def to_dict(self):
+        return self._asdict()
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
+
+
+class Recorder(Layer):
+    """
+    Scene layer which keeps every mutating command in an operation log
+    """
+
+    def __init__(self, inner=None):
+        super(Recorder, self).__init__(inner)
+        self.log = list()
+
+    def call(self, name, func, args, kwargs):
+        """Override"""
+        result = func(*args, **kwargs)
+        if not is_query(name, kwargs):
+            self.log.append(Operation(
+                KINDS.get(name, 'edit'), name,
+                _freeze(args), _freeze(kwargs), _freeze(result)))
+        return result
+
+
+def is_query(name, kwargs):
+    """
+    :param name: str. command name
+    :param kwargs: dict. command flags
+    :return: bool. whether the command only reads the scene
+    """
+    if name in QUERIES:
+        return True
+    return bool(kwargs.get('q') or kwargs.get('query'))
+
+
+@contextmanager
+def recording(backend=None):
+    """
+    Record every scene mutation issued inside the block
+
+    :param backend: object. backend to execute on, defaults to the active one
+    :return: list. the operation log, filled as the block runs
+    """
+    recorder = Recorder(backend)
+    with use(recorder):
+        yield recorder.log
+
+
+def save(log, path):
+    """
+    Write an operation log to a JSON file
+
+    :param log: list. Operation records
+    :param path: str. output file path
+    """
+    with open(path, 'w') as f:
+        json.dump([op.to_dict() for op in log], f)
+
+
+def load(path):
+    """
+    :param path: str. JSON file written by save()
+    :return: list. Operation records
+    """
+    with open(path) as f:
+        return [Operation.from_dict(op) for op in json.load(f)]
+
+
+def coalesce(log):
+    """
+    Group consecutive operations that can be issued together: parents to
+    the same target and deletes run as a single command, writes to the
+    attributes of one node run once per attribute (see replay())
+
+    :param log: list. Operation records
+    :return: list. batches, each a list of Operation records
+    """
+    batches = list()
+    for op in log:
+        last = batches[-1] if batches else None
+        if last and _mergeable(last[-1], op):
+            last.append(op)
+        else:
+            batches.append([op])
+    return batches
+
+
+def _mergeable(prev, op):
+    if prev.command != op.command:
+        return False
+    if op.command == 'parent':
+        if prev.kwargs != op.kwargs:
+            return False
+        if _to_world(op):
+            return True
+        return len(prev.args) > 1 and len(op.args) > 1 and \
+            prev.args[-1] == op.args[-1]
+    if op.command == 'delete':
+        return not op.kwargs and not prev.kwargs
+    if op.command == 'setAttr':
+        return prev.args[0].partition('.')[0] == \
+            op.args[0].partition('.')[0]
+    return False
+
+
+def replay(log, backend=None, chunk='autoRigger', undo=True):
+    """
+    Apply an operation log to a scene in coalesced batches
+
+    Parents and deletes of a batch are issued as one command; of the writes
+    to a node, only the last one to each attribute (with the same flags)
+    is issued. Node names returned during replay are mapped back onto the
+    recorded ones, so later operations still find auto-named nodes
+
+    :param log: list. Operation records
+    :param backend: object. target backend, defaults to the active one
+    :param chunk: str. name of the undo chunk wrapping the replay, None to
+                  replay inside the caller's open chunk
+    :param undo: bool. whether the replay is undoable at all
+    :return: dict. recorded node name to replayed node name
+    """
+    target = backend or cmds
+    names = dict()
+
+    if not undo:
+        target.undoInfo(stateWithoutFlush=0)
+    elif chunk:
+        target.undoInfo(openChunk=1, chunkName=chunk)
+
+    try:
+        for batch in coalesce(log):
+            op = batch[-1]
+            if op.command == 'setAttr' and len(batch) > 1:
+                for write in _last_writes(batch):
+                    target.setAttr(*_rename(write.args, names),
+                                   **_rename(write.kwargs, names))
+                continue
+
+            if op.command == 'parent' and len(batch) > 1:
+                children = _flatten([o.args if _to_world(o) else o.args[:-1]
+                                     for o in batch])
+                args = children + ([] if _to_world(op) else [op.args[-1]])
+            elif op.command == 'delete' and len(batch) > 1:
+                args = _flatten([o.args for o in batch])
+            else:
+                args = op.args
+
+            result = getattr(target, op.command)(
+                *_rename(args, names), **_rename(op.kwargs, names))
+            if len(batch) == 1:
+                _map_names(op.result, result, names)
+            else:
+                # a merged command returns the results of its parts in order
+                _map_names(_flatten([o.result for o in batch
+                                     if o.result is not None]),
+                           result, names)
+    finally:
+        if not undo:
+            target.undoInfo(stateWithoutFlush=1)
+        elif chunk:
+            target.undoInfo(closeChunk=1)
+
+    return names
+
+
+def _last_writes(batch):
+    """
+    :param batch: list. setAttr Operation records
+    :return: list. the last write to each plug with the same flags, in the
+             order of those last writes
+    """
+    writes = OrderedDict()
+    for op in batch:
+        key = (op.args[0], json.dumps(op.kwargs, sort_keys=True))
+        writes.pop(key, None)
+        writes[key] = op
+    return list(writes.values())
+
+
+def _to_world(op):
+    return bool(op.kwargs.get('w') or op.kwargs.get('world'))
+
+
+def _flatten(values):
+    out = list()
+    for value in values:
+        if isinstance(value, (list, tuple)):
+            out.extend(_flatten(value))
+        else:
+            out.append(value)
+    return out
+
+
+def _freeze(value):
+    """
+    Copy arguments into plain lists, dicts and scalars
+    """
+    if isinstance(value, dict):
+        return {k: _freeze(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_freeze(v) for v in value]
+    if hasattr(value, 'as_list'):
+        return list(value.as_list)
+    return value
+
+
+def _rename(value, names):
+    if not names:
+        return value
+    if isinstance(value, dict):
+        return {k: _rename(v, names) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_rename(v, names) for v in value]
+    if isinstance(value, str):
+        node, dot, attr = value.partition('.')
+        return names.get(node, node) + dot + attr
+    return value
+
+
+def _map_names(recorded, result, names):
+    if isinstance(recorded, str) and isinstance(result, str):
+        if recorded != result:
+            names[recorded] = result
+    elif isinstance(recorded, list) and isinstance(result, (list, tuple)):
+        for old, new in zip(recorded, result):
+            _map_names(old, new, names)
@@ -0,0 +1,318 @@
+"""
+Persistent build server keeping the package imported between builds
+
+The server imports every rig component once, then accepts build jobs
+(see batch.make_job) from local clients over a multiprocessing connection
+and answers each with the job result and timings, so small jobs don't pay
+for interpreter startup and package import every time:
+
+    python -m autoRigger.server                      # start, e.g. via mayapy
+    python -m autoRigger.server --submit wolf.json   # from another shell
+
+or from Python:
+
+    results = server.build([batch.make_job('wolf.json')])
+
+Connections authenticate with AUTORIGGER_AUTHKEY, or else with a random key
+generated once in ~/.autoRigger/authkey, readable by its owner only.
+"""
+
+import argparse
+import binascii
+import os
+import sys
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener
+from timeit import default_timer
+
+from . import batch
+
+
+ADDRESS = ('localhost', 6061)
+
+# shared secret of the connection: the env var, or else a random key
+# generated once per user in a file only they can read
+AUTHKEY_ENV = 'AUTORIGGER_AUTHKEY'
+AUTHKEY_FILE = os.path.join(os.path.expanduser('~'), '.autoRigger',
+                            'authkey')
+
+# job entries a build request must hold
+JOB_KEYS = ('name', 'description', 'output')
+
+
+class BuildServer(object):
+    """
+    Serve build jobs to local clients, one connection at a time
+    """
+
+    def __init__(self, address=ADDRESS, authkey=None, log=None):
+        """
+        Initialization
+
+        :param address: tuple or str. (host, port) or a socket file path
+        :param authkey: str. shared secret, defaults to get_authkey()
+        :param log: file. stream receiving a line per request
+        """
+        self.address = address
+        self.authkey = get_authkey(authkey)
+        self.log = log
+        self.started = None
+        self.jobs = 0
+        self.load_time = 0.0
+
+    def preload(self):
+        """
+        Import every rig component type ahead of the first job
+        """
+        from .template import description
+
+        start = default_timer()
+        for name in description.TYPES:
+            description.resolve(name)
+        self.load_time = default_timer() - start
+
+    def serve(self):
+        """
+        Accept connections until a client asks for a shutdown
+        """
+        self.started = default_timer()
+        self.preload()
+
+        listener = Listener(self.address, authkey=self.authkey)
+        self._write('serving on {} (preload {:.3f}s)'.format(
+            listener.address, self.load_time))
+        try:
+            running = True
+            while running:
+                try:
+                    conn = listener.accept()
+                except (AuthenticationError, EOFError, IOError) as e:
+                    self._write('refused a connection: {}'.format(e))
+                    continue
+                try:
+                    running = self.handle(conn)
+                finally:
+                    conn.close()
+        finally:
+            listener.close()
+
+    def handle(self, conn):
+        """
+        Answer the requests of one connection
+
+        :param conn: Connection.
+        :return: bool. False once a shutdown was requested
+        """
+        while True:
+            try:
+                request = conn.recv()
+            except (EOFError, IOError):
+                return True
+            except Exception as e:
+                # e.g. a message which can't be unpickled here
+                conn.send(_failure('Invalid request: {}'.format(e)))
+                continue
+
+            error = check_request(request)
+            if error:
+                self._write(error)
+                conn.send(_failure(error))
+                continue
+
+            command = request['command']
+            if command == 'build':
+                received = default_timer()
+                result = batch.build_job(request['job'])
+                result['server'] = default_timer() - received
+                self.jobs += 1
+                self._write('{} {} {:.3f}s'.format(
+                    result['name'], result['status'], result['time']))
+                conn.send(result)
+            elif command == 'ping':
+                conn.send(self.status())
+            elif command == 'shutdown':
+                conn.send(self.status())
+                return False
+            else:
+                conn.send(_failure('Unknown command: {}'.format(command)))
+
+    def status(self):
+        """
+        :return: dict. server process info
+        """
+        return {
+            'status': 'ok',
+            'pid': os.getpid(),
+            'uptime': default_timer() - self.started,
+            'jobs': self.jobs,
+            'preload': self.load_time,
+        }
+
+    def _write(self, line):
+        if self.log:
+            self.log.write(line + '\n')
+            self.log.flush()
+
+
+def get_authkey(authkey=None, path=AUTHKEY_FILE):
+    """
+    Get the shared secret of the connection: the given one, the env var,
+    or the per-user key file, generated on first use
+
+    :param authkey: str. shared secret
+    :param path: str. key file path
+    :return: bytes.
+    """
+    authkey = authkey or os.environ.get(AUTHKEY_ENV)
+    if authkey:
+        return authkey.encode('utf-8')
+
+    if not os.path.isfile(path):
+        directory = os.path.dirname(path)
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        try:
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        except OSError:
+            # created by another process meanwhile
+            pass
+        else:
+            with os.fdopen(fd, 'w') as f:
+                f.write(binascii.hexlify(os.urandom(32)).decode('ascii'))
+
+    if os.name == 'posix' and os.stat(path).st_mode & 0o077:
+        raise RuntimeError('{} is accessible by other users, restrict it '
+                           'with chmod 600'.format(path))
+    with open(path) as f:
+        authkey = f.read().strip()
+    if not authkey:
+        raise RuntimeError('{} holds no key'.format(path))
+    return authkey.encode('utf-8')
+
+
+def check_request(request):
+    """
+    :param request: dict. received request
+    :return: str. why the request is malformed, None when it is valid
+    """
+    if not isinstance(request, dict):
+        return 'Invalid request: expected a dict, got {}'.format(
+            type(request).__name__)
+    if 'command' not in request:
+        return 'Invalid request: missing command'
+    if request['command'] == 'build':
+        job = request.get('job')
+        if not isinstance(job, dict):
+            return 'Invalid build request: missing job'
+        missing = [key for key in JOB_KEYS if not job.get(key)]
+        if missing:
+            return 'Invalid build request: job without {}'.format(
+                ', '.join(missing))
+    return None
+
+
+def _failure(error):
+    return {'status': 'failed', 'error': error}
+
+
+def request(requests, address=ADDRESS, authkey=None):
+    """
+    Send requests over a single connection
+
+    :param requests: list. request dicts
+    :param address: tuple or str. server address
+    :param authkey: str. shared secret, defaults to get_authkey()
+    :return: list. answers, with the round trip time of each
+    """
+    answers = list()
+    conn = Client(address, authkey=get_authkey(authkey))
+    try:
+        for item in requests:
+            start = default_timer()
+            conn.send(item)
+            answer = conn.recv()
+            answer['roundtrip'] = default_timer() - start
+            answers.append(answer)
+    finally:
+        conn.close()
+    return answers
+
+
+def build(jobs, address=ADDRESS, authkey=None):
+    """
+    Build jobs on a running server
+
+    :param jobs: list. jobs, see batch.make_job()
+    :return: list. job results
+    """
+    return request([{'command': 'build', 'job': job} for job in jobs],
+                   address, authkey)
+
+
+def ping(address=ADDRESS, authkey=None):
+    """
+    :return: dict. server status
+    """
+    return request([{'command': 'ping'}], address, authkey)[0]
+
+
+def shutdown(address=ADDRESS, authkey=None):
+    """
+    :return: dict. server status before stopping
+    """
+    return request([{'command': 'shutdown'}], address, authkey)[0]
+
+
+def parse_address(text):
+    """
+    :param text: str. 'host:port' or a socket file path
+    :return: tuple or str.
+    """
+    host, sep, port = text.rpartition(':')
+    if sep and port.isdigit():
+        return host or ADDRESS[0], int(port)
+    return text
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Persistent rig build server')
+    parser.add_argument('--address', default='{}:{}'.format(*ADDRESS),
+                        help='host:port or socket file path')
+    parser.add_argument('--submit', nargs='+', metavar='DESCRIPTION',
+                        help='build descriptions on a running server')
+    parser.add_argument('--output-dir', default=os.getcwd(),
+                        help='directory of the saved scenes')
+    parser.add_argument('--ping', action='store_true',
+                        help='print the status of a running server')
+    parser.add_argument('--shutdown', action='store_true',
+                        help='stop a running server')
+    args = parser.parse_args(argv)
+    address = parse_address(args.address)
+
+    if args.submit:
+        jobs = [batch.make_job(path, output_dir=args.output_dir)
+                for path in args.submit]
+        results = build(jobs, address)
+        for result in results:
+            sys.stdout.write(
+                '{} {} build {:.3f}s round trip {:.3f}s\n'.format(
+                    result.get('name'), result['status'],
+                    result.get('time', 0.0), result['roundtrip']))
+            if result['error']:
+                sys.stdout.write(result['error'] + '\n')
+        return int(any(r['status'] != 'ok' for r in results))
+
+    if args.ping or args.shutdown:
+        status = shutdown(address) if args.shutdown else ping(address)
+        sys.stdout.write('pid {pid} up {uptime:.1f}s, {jobs} jobs\n'.format(
+            **status))
+        return 0
+
+    batch.init_worker()
+    BuildServer(address, log=sys.stdout).serve()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,84 +1,111 @@
-import maya.cmds as cmds
-
 from . import util
+from .scene import cmds
+from .shapeLib import LIBRARY
 from .utility import nurbs
 from .utility.useful import strGenerator
 
 
-NAMER = strGenerator.StrGenerator(prefix='tmp_')
+NAMER = strGenerator.StrGenerator(prefix=util.TMP_PREFIX)
+
+
+class ShapeCache(object):
+    """
+    Build-scoped cache of controller shape templates
+
+    Each kind of shape (by kind, scale and text) is generated once per build,
+    every request afterwards gets a duplicate of the template; the templates
+    are temporary nodes and the cache is cleared once the build finishes
+    """
+
+    def __init__(self):
+        self.templates = dict()
+
+    def get(self, key, make, name):
+        """
+        Duplicate the template of a shape, making the template when missing
+
+        :param key: tuple. (kind, scale, text) of the shape
+        :param make: function. template builder taking a name argument
+        :param name: str. name of the duplicated shape
+        :return: str. transform node of the shape curve
+        """
+        template = self.templates.get(key)
+        if template is None or not cmds.objExists(template):
+            template = make(NAMER.tmp)
+            util.TEMP.add(template)
+            self.templates[key] = template
+        return cmds.duplicate(template, n=name)[0]
+
+    def clear(self):
+        self.templates = dict()
+
+
+CACHE = ShapeCache()
+
+
+def _instance(key, make, name):
+    """
+    Get a shape from the build cache, registering it as temporary
+    when it doesn't have a name of its own
+    """
+    if name:
+        return CACHE.get(key, make, name)
+
+    shape = CACHE.get(key, make, NAMER.tmp)
+    util.TEMP.add(shape)
+    return shape
 
 
 def make_circle(scale=1, name=None):
     """
     Make a circle nurbs curve
     """
-    if not name:
-        name = NAMER.tmp
+    def make(name):
+        return LIBRARY.create('circle', name, scale)
 
-    return cmds.circle(
-        nr=(0, 1, 0),
-        c=(0, 0, 0),
-        s=8,
-        radius=scale,
-        name=name)[0]
+    return _instance(('circle', scale, None), make, name)
 
 
 def make_arrow(scale=1, name=None):
     """
     Make a four-directional arrow nurbs curve
     """
-    if not name:
-        name = NAMER.tmp
-
-    arrow_pts = [
-        [2.0, 0.0, 2.0], [2.0, 0.0, 1.0], [3.0, 0.0, 1.0], [3.0, 0.0, 2.0],
-        [5.0, 0.0, 0.0], [3.0, 0.0, -2.0], [3.0, 0.0, -1.0],
-        [2.0, 0.0, -1.0],
-        [2.0, 0.0, -2.0], [1.0, 0.0, -2.0], [1.0, 0.0, -3.0],
-        [2.0, 0.0, -3.0], [0.0, 0.0, -5.0], [-2.0, 0.0, -3.0],
-        [-1.0, 0.0, -3.0], [-1.0, 0.0, -2.0],
-        [-2.0, 0.0, -2.0], [-2.0, 0.0, -1.0], [-3.0, 0.0, -1.0],
-        [-3.0, 0.0, -2.0], [-5.0, 0.0, 0.0], [-3.0, 0.0, 2.0],
-        [-3.0, 0.0, 1.0], [-2.0, 0.0, 1.0],
-        [-2.0, 0.0, 2.0], [-1.0, 0.0, 2.0], [-1.0, 0.0, 3.0],
-        [-2.0, 0.0, 3.0], [0.0, 0.0, 5.0], [2.0, 0.0, 3.0],
-        [1.0, 0.0, 3.0], [1.0, 0.0, 2.0], [2.0, 0.0, 2.0]
-    ]
-
-    arrow = cmds.curve(p=arrow_pts, degree=1, name=name)
-    util.uniform_scale(arrow, scale * 0.5)
-    cmds.makeIdentity(arrow, apply=1, s=1)
-    return arrow
+    def make(name):
+        return LIBRARY.create('arrow', name, scale)
+
+    return _instance(('arrow', scale, None), make, name)
 
 
 def make_sphere(scale=1, name=None):
     """
     Make a sphere nurbs curve
     """
-    if not name:
-        name = NAMER.tmp
+    def make(name):
+        return LIBRARY.create('sphere', name, scale)
 
-    c1 = cmds.circle(nr=(0, 1, 0), c=(0, 0, 0), s=8, radius=scale)[0]
-    c2 = cmds.circle(nr=(1, 0, 0), c=(0, 0, 0), s=8, radius=scale)[0]
-    c3 = cmds.circle(nr=(0, 0, 1), c=(0, 0, 0), s=8, radius=scale)[0]
-
-    sphere = nurbs.util.merge_curves(name=name, curves=[c1, c2, c3])
-    return sphere
+    return _instance(('sphere', scale, None), make, name)
 
 
 def make_text(text, scale=1, name=None):
     """
     Make a nurbs curve with text
 
+    Captured texts are read from the shape library ('text_<text>'),
+    others get generated from the font outlines
+
     :param text: str. text for display
     :return: str. transform node of the shape curve
     """
-    if not name:
-        name = NAMER.tmp
-
-    curve = nurbs.util.make_curve_by_text(text=text, name=name)
-    util.uniform_scale(curve, scale)
-    cmds.makeIdentity(curve, apply=1, r=1, t=1, s=1)
-    # make it align on the ground plane
-    cmds.rotate(-90, 0, 0, curve, r=1)
-    return curve
+    def make(name):
+        key = 'text_{}'.format(text)
+        if key in LIBRARY:
+            curve = LIBRARY.create(key, name, scale)
+        else:
+            curve = nurbs.util.make_curve_by_text(text=text, name=name)
+            util.uniform_scale(curve, scale)
+            cmds.makeIdentity(curve, apply=1, r=1, t=1, s=1)
+        # make it align on the ground plane
+        cmds.rotate(-90, 0, 0, curve, r=1)
+        return curve
+
+    return _instance(('text', scale, text), make, name)
@@ -0,0 +1,288 @@
+"""
+Controller shape library stored as CV data in a compact npz file
+
+Every shape is a list of nurbs curves, each saved as three float arrays
+keyed '<index>:<field>:<shape name>': 'info' (degree and form), 'knots' and
+'cvs' (one row per control vertex). The file is a standard numpy npz
+archive; when numpy isn't available a minimal reader and writer for
+float64 .npy entries is used instead.
+
+Use capture() inside Maya to add existing curves to the library:
+
+    lib = shapeLib.ShapeLibrary()
+    shapeLib.capture('star', ['star_crv'], lib)
+    lib.save()
+"""
+
+import ast
+import io
+import struct
+import zipfile
+from collections import namedtuple, OrderedDict
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from .constant import SHAPE_LIB
+from .scene import cmds
+
+
+FIELDS = ('info', 'knots', 'cvs')
+NPY_MAGIC = b'\x93NUMPY'
+
+
+class Curve(namedtuple('Curve', ['degree', 'form', 'knots', 'cvs'])):
+    """
+    A single nurbs curve of a library shape
+
+    form is 0 for open, 1 for closed and 2 for periodic curves
+    """
+
+    @property
+    def spans(self):
+        return len(self.cvs) - self.degree
+
+    def as_attr(self, scale=1):
+        """
+        :param scale: float. uniform scale applied to the CVs
+        :return: list. flat value list of a nurbsCurve typed setAttr
+        """
+        values = [self.degree, self.spans, self.form, 0, 3, len(self.knots)]
+        values.extend(self.knots)
+        values.append(len(self.cvs))
+        for cv in self.cvs:
+            values.extend(v * scale for v in cv)
+        return values
+
+
+class ShapeLibrary(object):
+    """
+    Named controller shapes, read from disk on first use
+    """
+
+    def __init__(self, path=SHAPE_LIB):
+        """
+        Initialization
+
+        :param path: str. npz file of the library
+        """
+        self.path = path
+        self._shapes = None
+
+    @property
+    def shapes(self):
+        if self._shapes is None:
+            self._shapes = read(self.path)
+        return self._shapes
+
+    def __contains__(self, name):
+        return name in self.shapes
+
+    def names(self):
+        return list(self.shapes)
+
+    def add(self, name, curves):
+        """
+        Add or replace a shape
+
+        :param name: str. shape name
+        :param curves: list. Curve objects
+        """
+        self.shapes[name] = list(curves)
+
+    def save(self, path=None):
+        """
+        :param path: str. output npz file, defaults to the library file
+        """
+        write(path or self.path, self.shapes)
+
+    def create(self, name, node, scale=1):
+        """
+        Create a shape in the scene, one curve shape per library curve
+        with no construction history or intermediate nodes
+
+        :param name: str. shape name
+        :param node: str. name of the transform to create
+        :param scale: float. uniform scale applied to the CVs
+        :return: str. transform node of the shape curve
+        """
+        node = cmds.createNode('transform', n=node)
+        for index, curve in enumerate(self.shapes[name]):
+            shape = cmds.createNode(
+                'nurbsCurve', p=node,
+                n='{}Shape{}'.format(node, index or ''))
+            cmds.setAttr('{}.cc'.format(shape), *curve.as_attr(scale),
+                         type='nurbsCurve')
+        return node
+
+
+LIBRARY = ShapeLibrary()
+
+
+def capture(name, nodes, library=LIBRARY):
+    """
+    Capture the nurbs curves of existing scene nodes as a library shape,
+    with CVs in object space
+
+    :param name: str. shape name
+    :param nodes: list. curve transforms or shapes making up the shape
+    :param library: ShapeLibrary. library to add the shape to
+    :return: list. captured Curve objects
+    """
+    curves = list()
+    for node in nodes:
+        if cmds.nodeType(node) == 'nurbsCurve':
+            shapes = [node]
+        else:
+            shapes = cmds.listRelatives(node, s=1, type='nurbsCurve') or []
+
+        for shape in shapes:
+            degree = cmds.getAttr('{}.degree'.format(shape))
+            form = cmds.getAttr('{}.form'.format(shape))
+            spans = cmds.getAttr('{}.spans'.format(shape))
+            cvs = cmds.getAttr('{}.cv[0:{}]'.format(
+                shape, spans + degree - 1))
+            curves.append(Curve(
+                degree, form, get_knots(shape, degree, form, spans),
+                [list(cv) for cv in cvs]))
+
+    library.add(name, curves)
+    return curves
+
+
+def get_knots(shape, degree, form, spans):
+    """
+    Get the knot vector of a curve, falling back to the uniform knots
+    Maya uses for new curves when the API isn't available
+
+    :return: list. knot values
+    """
+    try:
+        from maya.api import OpenMaya
+    except ImportError:
+        pass
+    else:
+        selection = OpenMaya.MSelectionList()
+        selection.add(shape)
+        curve = OpenMaya.MFnNurbsCurve(selection.getDagPath(0))
+        return list(curve.knots())
+
+    if form == 2:
+        return [float(k) for k in range(1 - degree, spans + degree)]
+    return [0.0] * (degree - 1) + [float(k) for k in range(spans + 1)] + \
+        [float(spans)] * (degree - 1)
+
+
+def read(path):
+    """
+    :param path: str. npz file
+    :return: OrderedDict. shape name to list of Curve objects
+    """
+    if numpy is not None:
+        with numpy.load(path) as data:
+            arrays = dict((key, data[key].tolist()) for key in data.files)
+    else:
+        arrays = dict()
+        with zipfile.ZipFile(path) as archive:
+            for entry in archive.namelist():
+                key = entry[:-len('.npy')]
+                arrays[key] = read_npy(archive.read(entry))
+
+    parts = dict()
+    for key, value in arrays.items():
+        index, field, name = key.split(':', 2)
+        parts.setdefault(name, dict()).setdefault(int(index), dict())[
+            field] = value
+
+    shapes = OrderedDict()
+    for name in sorted(parts):
+        shapes[name] = list()
+        for index in sorted(parts[name]):
+            data = parts[name][index]
+            degree, form = [int(v) for v in data['info']]
+            shapes[name].append(
+                Curve(degree, form, data['knots'], data['cvs']))
+    return shapes
+
+
+def write(path, shapes):
+    """
+    :param path: str. output npz file
+    :param shapes: dict. shape name to list of Curve objects
+    """
+    arrays = OrderedDict()
+    for name, curves in shapes.items():
+        for index, curve in enumerate(curves):
+            values = {
+                'info': [curve.degree, curve.form],
+                'knots': curve.knots,
+                'cvs': [list(cv) for cv in curve.cvs],
+            }
+            for field in FIELDS:
+                arrays['{}:{}:{}'.format(index, field, name)] = values[field]
+
+    if numpy is not None:
+        numpy.savez_compressed(path, **dict(
+            (key, numpy.asarray(value, dtype=float))
+            for key, value in arrays.items()))
+        return
+
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for key, value in arrays.items():
+            archive.writestr('{}.npy'.format(key), write_npy(value))
+
+
+def read_npy(data):
+    """
+    Read a float64 .npy entry (format version 1 or 2)
+
+    :return: list. nested list of floats
+    """
+    if not data.startswith(NPY_MAGIC):
+        raise ValueError('Not a .npy entry')
+    if data[6:7] == b'\x01':
+        size, start = struct.unpack('<H', data[8:10])[0], 10
+    else:
+        size, start = struct.unpack('<I', data[8:12])[0], 12
+
+    header = ast.literal_eval(data[start:start+size].decode('latin1'))
+    if header['descr'] != '<f8' or header['fortran_order']:
+        raise ValueError('Unsupported .npy entry, numpy is needed: {}'.format(
+            header))
+
+    shape = header['shape']
+    count = 1
+    for dim in shape:
+        count *= dim
+    flat = list(struct.unpack(
+        '<{}d'.format(count), data[start+size:start+size+8*count]))
+    if len(shape) == 2:
+        return [flat[i*shape[1]:(i+1)*shape[1]] for i in range(shape[0])]
+    return flat
+
+
+def write_npy(value):
+    """
+    :param value: list. flat or nested (2d) list of numbers
+    :return: bytes. .npy entry (format version 1)
+    """
+    if value and isinstance(value[0], (list, tuple)):
+        shape = (len(value), len(value[0]))
+        flat = [float(v) for row in value for v in row]
+    else:
+        shape = (len(value),)
+        flat = [float(v) for v in value]
+
+    header = "{{'descr': '<f8', 'fortran_order': False, 'shape': {}, }}"
+    header = header.format(repr(shape))
+    # magic, version and header size take 10 bytes, pad to 64 bytes
+    header += ' ' * (63 - (10 + len(header)) % 64) + '\n'
+
+    out = io.BytesIO()
+    out.write(NPY_MAGIC + b'\x01\x00')
+    out.write(struct.pack('<H', len(header)))
+    out.write(header.encode('latin1'))
+    out.write(struct.pack('<{}d'.format(len(flat)), *flat))
+    return out.getvalue()
@@ -1,11 +1,10 @@
-import maya.cmds as cmds
-
 from .. import util
 from ..base import base, bone
 from ..chain.limb.arm import arm
 from ..chain.limb.leg import leg
 from ..chain.spine import spine
 from ..constant import Side
+from ..scene import cmds
 
 
 class BipedItem(base.BaseItem):
@@ -25,9 +24,12 @@ class Biped(bone.Bone):
     head and head tip
     """
 
-    def __init__(self, side, name):
+    def __init__(self, side, name, is_blend=0):
         """
         Override: initialize with multiple rig components
+
+        :param is_blend: bool. connect the FK/IK switches through reverse
+                         nodes instead of driven keys
         """
         super(Biped, self).__init__(side, name)
         self._rtype = 'biped'
@@ -35,11 +37,11 @@ class Biped(bone.Bone):
         self.pos = [0, 8.4, 0]
         self.s_len = 5
 
-        self.l_arm = arm.Arm(Side.LEFT, 'arm')
-        self.r_arm = arm.Arm(Side.RIGHT, 'arm')
+        self.l_arm = arm.Arm(Side.LEFT, 'arm', is_blend=is_blend)
+        self.r_arm = arm.Arm(Side.RIGHT, 'arm', is_blend=is_blend)
 
-        self.l_leg = leg.Leg(Side.LEFT, 'leg')
-        self.r_leg = leg.Leg(Side.RIGHT, 'leg')
+        self.l_leg = leg.Leg(Side.LEFT, 'leg', is_blend=is_blend)
+        self.r_leg = leg.Leg(Side.RIGHT, 'leg', is_blend=is_blend)
         self.spine = spine.Spine(Side.MIDDLE, 'spine', length=self.s_len)
         self.neck = base.Base(Side.MIDDLE, 'neck')
         self.head = base.Base(Side.MIDDLE, 'head')
@@ -0,0 +1,433 @@
+"""
+Declarative rig descriptions compiled into rig trees
+
+A description is a JSON file listing rig components by id, with their
+type, side, constructor parameters, guide placement and how they attach
+to another component:
+
+    {
+        "name": "wolf",
+        "components": [
+            {"id": "spine", "type": "spineQuad", "side": "m",
+             "position": [0, 6, -3], "rotation": [90, 0, 0]},
+            {"id": "l_front", "type": "legFront", "side": "l",
+             "name": "front", "position": [1, 6, 3],
+             "attach": {"to": "spine", "joint": -1, "control": -1}}
+        ]
+    }
+
+attach.joint and attach.control are indices into the parent component's
+joints and controllers, the root joint and root offset of the component
+get parented under them (null to skip either); with attach.constraint the
+component's root controller is parent constrained instead. attach.root
+names the sub-component to attach through (e.g. 'limb' for an arm).
+
+Validating a description, normalizing it and importing its component
+classes is done once per file content in a process, the resolved result is
+cached keyed by the file hash:
+
+    rig = description.load('wolf.json')
+    rig.build_guide()
+    rig.build_rig()
+"""
+
+import hashlib
+import importlib
+import inspect
+import json
+
+from .. import util
+from ..base import bone
+from ..constant import Side
+from ..scene import cmds
+
+
+VERSION = 1
+
+# file content hash to resolved description, see load_compiled()
+_CACHE = dict()
+
+# component type name to (module path, class name), imported when used
+TYPES = {
+    'base': ('..base.base', 'Base'),
+    'chainFK': ('..chain.chainFK', 'ChainFK'),
+    'chainIK': ('..chain.chainIK', 'ChainIK'),
+    'chainFKIK': ('..chain.chainFKIK', 'ChainFKIK'),
+    'finger': ('..chain.finger', 'Finger'),
+    'tail': ('..chain.tail', 'Tail'),
+    'spine': ('..chain.spine.spine', 'Spine'),
+    'spineQuad': ('..chain.spine.spineQuad', 'SpineQuad'),
+    'limb': ('..chain.limb.limbFKIK', 'LimbFKIK'),
+    'arm': ('..chain.limb.arm.arm', 'Arm'),
+    'leg': ('..chain.limb.leg.leg', 'Leg'),
+    'legFront': ('..chain.limb.leg.legFront', 'LegFront'),
+    'legBack': ('..chain.limb.leg.legBack', 'LegBack'),
+    'hand': ('..module.hand', 'Hand'),
+    'foot': ('..module.foot', 'Foot'),
+}
+
+# sub-component a type is placed and attached through by default
+ROOTS = {
+    'arm': 'limb',
+    'leg': 'limb',
+    'hand': 'wrist',
+}
+
+COMPONENT_KEYS = ('id', 'type', 'side', 'name', 'params', 'root',
+                  'position', 'rotation', 'attach')
+ATTACH_KEYS = ('to', 'joint', 'control', 'constraint', 'root')
+
+# constructor arguments given by the component keys rather than params
+FIXED_ARGS = ('self', 'side', 'name')
+
+
+class Rig(bone.Bone):
+    """
+    Create a rig system from a compiled description
+
+    The components are built as usual, then placed and stitched together
+    following their attach relationships
+    """
+
+    def __init__(self, compiled):
+        """
+        Override: initialize the components of a compiled description
+
+        :param compiled: dict. output of compile_description() or
+                         load_compiled()
+        """
+        super(Rig, self).__init__(Side(compiled['side']), compiled['name'])
+        self._rtype = 'rig'
+
+        self.description = compiled
+        self.parts = dict()
+        for item in compiled['components']:
+            cls = item.get('class') or resolve(item['type'])
+            self.parts[item['id']] = cls(
+                Side(item['side']), item['name'], **item['params'])
+            self._comps.append(self.parts[item['id']])
+
+    def root(self, item, attr=None):
+        """
+        :param item: dict. compiled component
+        :param attr: str. sub-component attribute, defaults to the item's
+        :return: Bone. the (sub-)component placed and attached
+        """
+        comp = self.parts[item['id']]
+        attr = item['root'] if attr is None else attr
+        for name in attr.split('.') if attr else []:
+            comp = getattr(comp, name)
+        return comp
+
+    def create_locator(self):
+        """
+        Extend: create and then move all locators
+        """
+        super(Rig, self).create_locator()
+        self.move_locator()
+
+    def move_locator(self):
+        """
+        Move the root locator of each component to its description
+        """
+        for item in self.description['components']:
+            loc = self.root(item).locs[0]
+            if item['position'] is not None:
+                util.move(loc, pos=item['position'])
+            if item['rotation'] is not None:
+                cmds.rotate(*item['rotation'] + [loc])
+
+    def create_joint(self):
+        """
+        Extend: parent each component's root joint to its attach joint
+        """
+        super(Rig, self).create_joint()
+
+        for item, target, attach in self._attachments():
+            if attach['joint'] is not None:
+                cmds.parent(self.root(item).jnts[0],
+                            target.jnts[attach['joint']])
+
+    def add_constraint(self):
+        """
+        Extend: drive each component's root by its attach controller
+        """
+        super(Rig, self).add_constraint()
+
+        for item, target, attach in self._attachments():
+            if attach['control'] is None:
+                continue
+            comp = self.root(item)
+            driver = target.ctrls[attach['control']]
+            if attach['constraint']:
+                cmds.parentConstraint(driver, comp.ctrls[0], mo=1)
+            else:
+                cmds.parent(comp.offsets[0], driver)
+
+    def _attachments(self):
+        """
+        :return: list. (item, target component, attach) of attached items
+        """
+        items = dict((item['id'], item)
+                     for item in self.description['components'])
+        return [(item, self.root(items[item['attach']['to']],
+                                 item['attach']['root']), item['attach'])
+                for item in self.description['components']
+                if item['attach']]
+
+
+def resolve(name):
+    """
+    Import the class of a component type
+
+    :param name: str. type name in TYPES
+    :return: class. Bone subclass
+    """
+    module, cls = TYPES[name]
+    return getattr(importlib.import_module(module, __package__), cls)
+
+
+def validate(data):
+    """
+    Check a description, collecting every problem found
+
+    :param data: dict. parsed description
+    :return: list. error messages, empty when valid
+    """
+    if not isinstance(data, dict):
+        return ['Description must be an object']
+
+    errors = list()
+    sides = [side.value for side in Side]
+    if data.get('side', Side.MIDDLE.value) not in sides:
+        errors.append('Unknown rig side: {}'.format(data['side']))
+
+    components = data.get('components')
+    if not isinstance(components, list) or not components:
+        return errors + ['Description needs a list of components']
+
+    ids = set()
+    for index, item in enumerate(components):
+        label = 'Component {}'.format(item.get('id', index)
+                                      if isinstance(item, dict) else index)
+        if not isinstance(item, dict):
+            errors.append('{} must be an object'.format(label))
+            continue
+
+        unknown = set(item) - set(COMPONENT_KEYS)
+        if unknown:
+            errors.append('{} has unknown keys: {}'.format(
+                label, ', '.join(sorted(unknown))))
+        if not item.get('id'):
+            errors.append('{} needs an id'.format(label))
+        elif item['id'] in ids:
+            errors.append('{} is defined twice'.format(label))
+        ids.add(item.get('id'))
+
+        if item.get('type') not in TYPES:
+            errors.append('{} has unknown type: {}'.format(
+                label, item.get('type')))
+        if item.get('side', Side.MIDDLE.value) not in sides:
+            errors.append('{} has unknown side: {}'.format(
+                label, item['side']))
+        if not isinstance(item.get('params', {}), dict):
+            errors.append('{} params must be an object'.format(label))
+        elif item.get('type') in TYPES:
+            errors.extend(_check_params(label, resolve(item['type']),
+                                        item.get('params', {})))
+        for key in ('position', 'rotation'):
+            value = item.get(key)
+            if value is not None and not _is_vector(value):
+                errors.append('{} {} must be 3 numbers'.format(label, key))
+
+        attach = item.get('attach')
+        if attach is None:
+            continue
+        if not isinstance(attach, dict) or 'to' not in attach:
+            errors.append('{} attach needs a component to attach to'.format(
+                label))
+            continue
+        unknown = set(attach) - set(ATTACH_KEYS)
+        if unknown:
+            errors.append('{} attach has unknown keys: {}'.format(
+                label, ', '.join(sorted(unknown))))
+        for key in ('joint', 'control'):
+            value = attach.get(key, -1)
+            if value is not None and not isinstance(value, int):
+                errors.append('{} attach {} must be an index'.format(
+                    label, key))
+
+    for item in components:
+        if isinstance(item, dict) and isinstance(item.get('attach'), dict) \
+                and item['attach'].get('to') not in ids:
+            errors.append('Component {} attaches to unknown component: {}'
+                          .format(item.get('id'), item['attach'].get('to')))
+
+    if not errors:
+        cycle = _find_cycle(components)
+        if cycle:
+            errors.append('Attach cycle: {}'.format(' -> '.join(cycle)))
+    return errors
+
+
+def compile_description(data):
+    """
+    Validate and normalize a description: every default filled in and the
+    components ordered with parents before the components attached to them
+
+    :param data: dict. parsed description
+    :return: dict. compiled description
+    """
+    errors = validate(data)
+    if errors:
+        raise ValueError('Invalid rig description:\n  {}'.format(
+            '\n  '.join(errors)))
+
+    components = list()
+    for item in data['components']:
+        attach = item.get('attach')
+        if attach is not None:
+            attach = {
+                'to': attach['to'],
+                'joint': attach.get('joint', -1),
+                'control': attach.get('control', -1),
+                'constraint': int(bool(attach.get('constraint', 0))),
+                'root': attach.get('root'),
+            }
+        components.append({
+            'id': item['id'],
+            'type': item['type'],
+            'side': item.get('side', Side.MIDDLE.value),
+            'name': item.get('name', item['id']),
+            'params': item.get('params', {}),
+            'root': item.get('root', ROOTS.get(item['type'])),
+            'position': item.get('position'),
+            'rotation': item.get('rotation'),
+            'attach': attach,
+        })
+
+    # an attach target's root defaults to its own placement root
+    roots = dict((item['id'], item['root']) for item in components)
+    for item in components:
+        if item['attach'] and item['attach']['root'] is None:
+            item['attach']['root'] = roots[item['attach']['to']]
+
+    return {
+        'version': VERSION,
+        'name': data.get('name', 'rig'),
+        'side': data.get('side', Side.MIDDLE.value),
+        'components': _parents_first(components),
+    }
+
+
+def load(path, cache=True):
+    """
+    Load a description file as a rig, reusing its resolved form from the
+    cache when the file content didn't change
+
+    :param path: str. description JSON file path
+    :param cache: bool. read and write the in-process cache
+    :return: Rig.
+    """
+    return Rig(load_compiled(path, cache))
+
+
+def load_compiled(path, cache=True):
+    """
+    Compile a description file and resolve the class of every component,
+    once per file content
+
+    :param path: str. description JSON file path
+    :param cache: bool. read and write the in-process cache
+    :return: dict. compiled description, each component with its 'class'
+    """
+    with open(path, 'rb') as f:
+        content = f.read()
+
+    digest = hashlib.sha1(content).hexdigest()
+    if cache and digest in _CACHE:
+        return _CACHE[digest]
+
+    resolved = compile_description(json.loads(content.decode('utf-8')))
+    for item in resolved['components']:
+        item['class'] = resolve(item['type'])
+    if cache:
+        _CACHE[digest] = resolved
+    return resolved
+
+
+def clear_cache():
+    """
+    Forget the resolved descriptions, e.g. after reloading component modules
+    """
+    _CACHE.clear()
+
+
+def _check_params(label, cls, params):
+    """
+    Check component parameters against the constructor of its class
+
+    :param label: str. component label of the error messages
+    :param cls: class. component class
+    :param params: dict. constructor parameters of the description
+    :return: list. error messages
+    """
+    arguments = [arg for name, arg in
+                 inspect.signature(cls.__init__).parameters.items()
+                 if name not in FIXED_ARGS]
+    errors = list()
+    if not any(arg.kind == arg.VAR_KEYWORD for arg in arguments):
+        accepted = [arg.name for arg in arguments
+                    if arg.kind in (arg.POSITIONAL_OR_KEYWORD,
+                                    arg.KEYWORD_ONLY)]
+        unknown = sorted(set(params) - set(accepted))
+        if unknown:
+            errors.append('{} has unknown params for {}: {}'.format(
+                label, cls.__name__, ', '.join(unknown)))
+    missing = [arg.name for arg in arguments
+               if arg.default is arg.empty and arg.name not in params and
+               arg.kind not in (arg.VAR_POSITIONAL, arg.VAR_KEYWORD)]
+    if missing:
+        errors.append('{} misses params for {}: {}'.format(
+            label, cls.__name__, ', '.join(missing)))
+    return errors
+
+
+def _is_vector(value):
+    return isinstance(value, list) and len(value) == 3 and \
+        all(isinstance(v, (int, float)) for v in value)
+
+
+def _find_cycle(components):
+    """
+    :return: list. ids forming an attach cycle, empty when there is none
+    """
+    parent_of = dict((item['id'], (item.get('attach') or {}).get('to'))
+                     for item in components)
+    for start in parent_of:
+        path = [start]
+        current = parent_of[start]
+        while current is not None:
+            if current in path:
+                return path[path.index(current):] + [current]
+            path.append(current)
+            current = parent_of.get(current)
+    return []
+
+
+def _parents_first(components):
+    """
+    Order components so each one comes after the one it attaches to,
+    keeping the description order otherwise
+    """
+    ordered = list()
+    done = set()
+    items = dict((item['id'], item) for item in components)
+    for item in components:
+        chain = list()
+        while item is not None and item['id'] not in done:
+            chain.append(item)
+            done.add(item['id'])
+            item = items.get((item['attach'] or {}).get('to'))
+        ordered.extend(reversed(chain))
+    return ordered
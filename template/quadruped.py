@@ -1,5 +1,3 @@
-import maya.cmds as cmds
-
 from .. import util
 from ..base import base, bone
 from ..chain import tail
@@ -7,6 +5,7 @@ from ..chain.limb.leg import legFront
 from ..chain.limb.leg import legBack
 from ..chain.spine import spineQuad
 from ..constant import Side, ATTRS
+from ..scene import cmds
 from ..utility.common import hierarchy
 
 
@@ -27,9 +26,12 @@ class Quadruped(bone.Bone):
     head and head tip
     """
 
-    def __init__(self, side, name='standard'):
+    def __init__(self, side, name='standard', is_blend=0):
         """
         Override: initialize with multiple rig components
+
+        :param is_blend: bool. connect the FK/IK switches through reverse
+                         nodes instead of driven keys
         """
         super(Quadruped, self).__init__(side, name)
         self._rtype = 'quad'
@@ -41,7 +43,7 @@ class Quadruped(bone.Bone):
         self.r_leg = legBack.LegBack(Side.RIGHT, 'standard')
 
         self.spine = spineQuad.SpineQuad(Side.MIDDLE, 'spine')
-        self.tail = tail.Tail(Side.MIDDLE, 'tail')
+        self.tail = tail.Tail(Side.MIDDLE, 'tail', is_blend=is_blend)
 
         self.neck = base.Base(Side.MIDDLE, 'neck')
         self.head = base.Base(Side.MIDDLE, 'head')
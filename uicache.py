@@ -0,0 +1,151 @@
+"""
+Load .ui files through Python code compiled once per file change
+
+Parsing Designer XML on every widget creation is slow, so each .ui file is
+compiled to Python with the binding's uic compiler and the result is kept
+in the user cache directory, invalidated when the .ui file changes:
+
+    uicache.load_ui(os.path.join(UI_DIR, 'base.ui'), widget)
+
+Like _loadUi, the child widgets end up as attributes of the given widget;
+when no compiler is available for the binding it falls back to _loadUi.
+"""
+
+import hashlib
+import os
+
+import Qt
+from Qt import _loadUi
+
+from .constant import CACHE_DIR
+
+
+# cache sub-directory holding the compiled .ui files
+CACHE_NAME = 'ui'
+
+# binding name to module providing compileUi(uifile, pyfile)
+COMPILERS = {
+    'PySide2': 'pyside2uic',
+    'PySide': 'pysideuic',
+    'PyQt5': 'PyQt5.uic',
+    'PyQt4': 'PyQt4.uic',
+}
+
+# first line of compiled files, holding the .ui modification time
+HEADER = '# compiled from a .ui file modified at {!r}'
+
+# .ui path to (mtime, setup class) of the compiled files loaded so far
+_LOADED = dict()
+
+
+def load_ui(path, widget):
+    """
+    Build the user interface of a .ui file into a widget
+
+    :param path: str. .ui file path
+    :param widget: QWidget. instance to build the interface in
+    :return: QWidget. the given widget
+    """
+    setup = get_setup(path)
+    if setup is None:
+        return _loadUi(path, widget)
+
+    ui = setup()
+    ui.setupUi(widget)
+    for name, value in vars(ui).items():
+        setattr(widget, name, value)
+    return widget
+
+
+def get_setup(path):
+    """
+    :param path: str. .ui file path
+    :return: class. Ui_ class generated for the .ui file, None when it
+             can't be compiled
+    """
+    mtime = os.path.getmtime(path)
+    loaded = _LOADED.get(path)
+    if loaded and loaded[0] == mtime:
+        return loaded[1]
+
+    cached = cache_path(path)
+    source = read_cache(cached, mtime)
+    if source is None:
+        if not compile_ui(path, cached, mtime):
+            return None
+        source = read_cache(cached, mtime)
+
+    namespace = dict()
+    exec(compile(source, cached, 'exec'), namespace)
+    setup = [value for name, value in namespace.items()
+             if name.startswith('Ui_') and isinstance(value, type)][0]
+    _LOADED[path] = (mtime, setup)
+    return setup
+
+
+def read_cache(cached, mtime):
+    """
+    :param cached: str. compiled file path
+    :param mtime: float. modification time of the .ui file
+    :return: str. compiled source, None when missing or out of date
+    """
+    if not os.path.isfile(cached):
+        return None
+    with open(cached) as f:
+        source = f.read()
+    if source.partition('\n')[0] != HEADER.format(mtime):
+        return None
+    return source
+
+
+def compile_ui(path, output, mtime):
+    """
+    Compile a .ui file to Python with the binding's compiler
+
+    :param path: str. .ui file path
+    :param output: str. Python file path
+    :param mtime: float. modification time of the .ui file, kept in the
+                  first line of the output to detect changes
+    :return: bool. whether the file got compiled
+    """
+    compiler = get_compiler()
+    if compiler is None:
+        return False
+
+    directory = os.path.dirname(output)
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+
+    # write then rename so other sessions never read a partial file
+    temp = '{}.{}.tmp'.format(output, os.getpid())
+    with open(temp, 'w') as f:
+        f.write(HEADER.format(mtime) + '\n')
+        compiler.compileUi(path, f)
+    os.rename(temp, output)
+    return True
+
+
+def get_compiler():
+    """
+    :return: module. uic compiler of the current binding, None if missing
+    """
+    name = COMPILERS.get(Qt.__binding__)
+    if not name:
+        return None
+    try:
+        module = __import__(name, fromlist=['compileUi'])
+    except ImportError:
+        return None
+    return module if hasattr(module, 'compileUi') else None
+
+
+def cache_path(path):
+    """
+    :param path: str. .ui file path
+    :return: str. path of the compiled file, per binding as the generated
+             code imports it
+    """
+    name = os.path.splitext(os.path.basename(path))[0]
+    digest = hashlib.sha1(os.path.abspath(path).encode('utf-8')).hexdigest()
+    return os.path.join(CACHE_DIR, CACHE_NAME, Qt.__binding__,
+                        '{}_{}.py'.format(name, digest[:8]))
@@ -1,17 +1,95 @@
-import maya.cmds as cmds
+import logging
+import math
+import os
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from .scene import cmds
 from .utility.nurbs import util
 
 
+TMP_PREFIX = 'tmp_'
+DEBUG_TEMP_ENV = 'AUTORIGGER_DEBUG_TEMP'
+
 G_LOC_GRP = '_Locators'
 G_CTRL_GRP = '_Controllers'
 G_JNT_GRP = '_Joints'
 G_MESH_GRP = '_Meshes'
 
+LOG = logging.getLogger(__name__)
+
+
+class TempNodes(object):
+    """
+    Registry of the temporary nodes created during a build (e.g. controller
+    shape templates) so they get deleted together once the build is done
+
+    In debug mode, flushing also reports temporary nodes which were never
+    registered and so are left behind in the scene
+    """
+
+    def __init__(self, debug=False):
+        """
+        Initialization
+
+        :param debug: bool. report leaked temporary nodes on flush
+        """
+        self.nodes = list()
+        self.debug = debug
+
+    def add(self, *nodes):
+        """
+        Register temporary nodes
+
+        :param nodes: str or list. node names
+        :return: list. registered node names
+        """
+        added = list()
+        for node in nodes:
+            if isinstance(node, (list, tuple)):
+                added.extend(self.add(*node))
+            elif node not in self.nodes:
+                self.nodes.append(node)
+                added.append(node)
+        return added
+
+    def flush(self):
+        """
+        Delete every registered node still in the scene, in a single call
+
+        :return: list. names of the deleted nodes
+        """
+        nodes = cmds.ls(self.nodes) if self.nodes else list()
+        if nodes:
+            cmds.delete(nodes)
+        self.nodes = list()
+
+        if self.debug:
+            self.report()
+        return nodes
+
+    def report(self):
+        """
+        Log the temporary nodes left in the scene
+
+        :return: list. names of the leaked nodes
+        """
+        leaks = cmds.ls('{}*'.format(TMP_PREFIX), transforms=1)
+        if leaks:
+            LOG.warning('Leaked temporary nodes: %s', ', '.join(leaks))
+        return leaks
+
+
+TEMP = TempNodes(debug=bool(os.environ.get(DEBUG_TEMP_ENV)))
+
 
 def create_locators_on_curve(curve, sample):
     """
-    Create locators uniformly spread on curve
+    Create locators uniformly spread on curve, each aimed down the curve
+    (x-axis along the tangent) with rotation-minimising frames
 
     :param curve: str. single nurbsCurve node
     :param sample: int. number of sample points
@@ -19,25 +97,306 @@ def create_locators_on_curve(curve, sample):
     """
     locs = list()
     points, tangents = util.get_point_on_curve(curve, sample)
-    for index in range(len(points)):
-        point = points[index]
-        tangent = tangents[index]
+    points = [[p.x, p.y, p.z] for p in points]
+    tangents = [[t.x, t.y, t.z] for t in tangents]
 
+    rotations = get_curve_rotations(points, tangents)
+    for point, rotation in zip(points, rotations):
         loc = cmds.spaceLocator()
+        cmds.xform(loc, t=point, ro=rotation)
         locs.append(loc)
-        temp_node = cmds.createNode('transform')
-
-        cmds.xform(
-            temp_node,
-            t=[point.x+tangent.x, point.y+tangent.y, point.z+tangent.z]
-        )
-        cmds.xform(loc, t=[point.x, point.y, point.z])
-        constraint = cmds.aimConstraint(temp_node, loc)[0]
-        cmds.delete([temp_node, constraint])
 
     return locs
 
 
+def get_curve_rotations(points, tangents, up=(0, 1, 0)):
+    """
+    Get the rotations of frames travelling along sampled curve points,
+    using the double reflection method for rotation-minimising frames
+
+    The first frame matches an aim constraint with x-axis aimed along the
+    tangent and y-axis towards the world up vector, the following frames
+    are propagated from it so the frames don't flip or twist
+
+    :param points: list. sample positions, each a list of x, y and z
+    :param tangents: list. curve tangents at the sample positions
+    :param up: list. world up vector x, y and z
+    :return: list. euler rotations in degrees, xyz rotate order
+    """
+    tangents = [_normalize(t) for t in tangents]
+    if not tangents:
+        return list()
+
+    first = tangents[0]
+    if abs(_dot(first, _normalize(up))) > 1 - 1e-6:
+        up = (0, 0, 1) if abs(first[2]) < 1 - 1e-6 else (1, 0, 0)
+    normal = _normalize(_cross(_cross(first, up), first))
+
+    normals = [normal]
+    for index in range(len(points) - 1):
+        tangent = tangents[index]
+        step = [b - a for a, b in zip(points[index], points[index+1])]
+        length = _dot(step, step)
+        if length > 1e-12:
+            normal = _reflect(normal, step, length)
+            tangent = _reflect(tangent, step, length)
+
+        step = [b - a for a, b in zip(tangent, tangents[index+1])]
+        length = _dot(step, step)
+        if length > 1e-12:
+            normal = _reflect(normal, step, length)
+
+        # remove any drift so the frame stays orthonormal
+        tangent = tangents[index+1]
+        normal = _normalize(
+            [n - _dot(normal, tangent) * t for n, t in zip(normal, tangent)])
+        normals.append(normal)
+
+    rotations = list()
+    for x_axis, y_axis in zip(tangents, normals):
+        z_axis = _cross(x_axis, y_axis)
+        ry = math.asin(max(-1.0, min(1.0, -x_axis[2])))
+        if abs(x_axis[2]) < 1 - 1e-9:
+            rx = math.atan2(y_axis[2], z_axis[2])
+            rz = math.atan2(x_axis[1], x_axis[0])
+        else:
+            rx = math.atan2(-z_axis[1], y_axis[1])
+            rz = 0.0
+        rotations.append([math.degrees(a) for a in (rx, ry, rz)])
+    return rotations
+
+
+def _dot(a, b):
+    return a[0] * b[0] + a[1] * b[1] + a[2] * b[2]
+
+
+def _cross(a, b):
+    return [a[1] * b[2] - a[2] * b[1],
+            a[2] * b[0] - a[0] * b[2],
+            a[0] * b[1] - a[1] * b[0]]
+
+
+def _normalize(a):
+    length = math.sqrt(_dot(a, a)) or 1.0
+    return [v / length for v in a]
+
+
+def _reflect(a, normal, length):
+    """
+    Reflect a vector on the plane perpendicular to normal
+
+    :param length: float. squared length of the normal
+    """
+    factor = 2.0 * _dot(normal, a) / length
+    return [v - factor * n for v, n in zip(a, normal)]
+
+
+def get_chain_positions(count, interval, direction, start=(0, 0, 0)):
+    """
+    Get evenly spaced positions along a direction, in a single pass
+
+    :param count: int. number of positions
+    :param interval: float. distance between two neighbouring positions
+    :param direction: list. unit direction x, y and z
+    :param start: list. position x, y and z of the first one
+    :return: list. positions, each a list of x, y and z
+    """
+    if numpy is not None:
+        steps = numpy.arange(count, dtype=float)[:, None] * interval
+        positions = numpy.asarray(start, dtype=float) + \
+            steps * numpy.asarray(direction, dtype=float)
+        return positions.tolist()
+
+    return [[start[axis] + index * interval * direction[axis]
+             for axis in range(3)] for index in range(count)]
+
+
+def get_falloff_weights(cvs, count):
+    """
+    Get the linear fall-off weights of a chain's joints between its control
+    vertices, as a sparse joint by control weight matrix
+
+    :param cvs: list. increasing joint indices of the control vertices
+    :param count: int. number of joints
+    :return: list. per joint, (control index in cvs, weight) of its non-zero
+             weights
+    """
+    if numpy is not None:
+        points = numpy.asarray(cvs, dtype=float)
+        joints = numpy.arange(count, dtype=float)
+        span = numpy.clip(numpy.searchsorted(points, joints, 'right') - 1,
+                          0, len(cvs) - 2)
+        tail = (joints - points[span]) / (points[span + 1] - points[span])
+        pairs = numpy.stack([1.0 - tail, tail], axis=1).tolist()
+        return [[(k, w) for k, w in zip((s, s + 1), pair) if w]
+                for s, pair in zip(span.tolist(), pairs)]
+
+    weights = list()
+    span = 0
+    for index in range(count):
+        while span < len(cvs) - 2 and index >= cvs[span + 1]:
+            span += 1
+        tail = float(index - cvs[span]) / (cvs[span + 1] - cvs[span])
+        weights.append([(k, w) for k, w in ((span, 1.0 - tail),
+                                            (span + 1, tail)) if w])
+    return weights
+
+
+def fit_curve(points, count=0, tolerance=0.0, degree=3):
+    """
+    Least-squares fit an open uniform B-spline to points, with its end
+    control vertices on the end points
+
+    :param points: list. positions to fit, each a list of x, y and z
+    :param count: int. number of control vertices, when 0 the smallest
+                  count fitting within tolerance is used
+    :param tolerance: float. largest distance allowed between a point and
+                      the curve when searching for the count
+    :param degree: int. curve degree, lowered for very few vertices
+    :return: tuple. (control vertices, Maya knot vector, error) where error
+             is a dict with the 'max' and 'rms' point distance
+    """
+    if count:
+        return _fit_curve(points, min(count, len(points)), degree)
+
+    # bisect the count, the error mostly shrinks as vertices are added
+    low, high = min(degree + 1, len(points)), len(points)
+    best = _fit_curve(points, high, degree)
+    while low < high:
+        middle = (low + high) // 2
+        result = _fit_curve(points, middle, degree)
+        if result[2]['max'] <= tolerance:
+            best, high = result, middle
+        else:
+            low = middle + 1
+    return best
+
+
+def _fit_curve(points, count, degree):
+    degree = min(degree, count - 1)
+    spans = count - degree
+    knots = [0.0] * degree + [float(k) for k in range(spans + 1)] + \
+        [float(spans)] * degree
+
+    # chord length parameters spread over the knot range
+    lengths = [0.0]
+    for a, b in zip(points, points[1:]):
+        lengths.append(lengths[-1] + math.sqrt(
+            sum((b[axis] - a[axis]) ** 2 for axis in range(3))))
+    params = [spans * length / (lengths[-1] or 1.0) for length in lengths]
+    basis = [_basis(u, degree, knots, count) for u in params]
+
+    # end vertices are fixed, the inner ones solved for
+    first, last = points[0], points[-1]
+    targets = [[p[axis] - row[0] * first[axis] - row[-1] * last[axis]
+                for axis in range(3)] for p, row in zip(points, basis)]
+    inner = [row[1:-1] for row in basis]
+
+    if count <= 2:
+        cvs = [list(first), list(last)][:count]
+    elif numpy is not None:
+        solved = numpy.linalg.lstsq(
+            numpy.asarray(inner), numpy.asarray(targets), rcond=None)[0]
+        cvs = [list(first)] + solved.tolist() + [list(last)]
+    else:
+        cvs = [list(first)] + _least_squares(inner, targets) + [list(last)]
+
+    distances = list()
+    for p, row in zip(points, basis):
+        fitted = [sum(w * cv[axis] for w, cv in zip(row, cvs))
+                  for axis in range(3)]
+        distances.append(math.sqrt(
+            sum((fitted[axis] - p[axis]) ** 2 for axis in range(3))))
+    error = {
+        'max': max(distances),
+        'rms': math.sqrt(sum(d * d for d in distances) / len(distances)),
+    }
+    # Maya leaves out the first and last knot
+    return cvs, knots[1:-1], error
+
+
+def _basis(u, degree, knots, count):
+    """
+    :return: list. value of every B-spline basis function at u
+    """
+    span = degree
+    while span < count - 1 and u >= knots[span + 1]:
+        span += 1
+
+    # triangular evaluation of the degree + 1 non-zero functions
+    values = [1.0]
+    left = [0.0] * (degree + 1)
+    right = [0.0] * (degree + 1)
+    for j in range(1, degree + 1):
+        left[j] = u - knots[span + 1 - j]
+        right[j] = knots[span + j] - u
+        saved = 0.0
+        for r in range(j):
+            temp = values[r] / (right[r + 1] + left[j - r])
+            values[r] = saved + right[r + 1] * temp
+            saved = left[j - r] * temp
+        values.append(saved)
+
+    row = [0.0] * count
+    row[span - degree:span + 1] = values
+    return row
+
+
+def _least_squares(rows, targets):
+    """
+    Solve rows * x = targets in the least-squares sense via the normal
+    equations, for each target column
+
+    :return: list. solution rows
+    """
+    size = len(rows[0])
+    normal = [[sum(row[i] * row[j] for row in rows) for j in range(size)] +
+              [sum(row[i] * t[axis] for row, t in zip(rows, targets))
+               for axis in range(3)] for i in range(size)]
+
+    for col in range(size):
+        pivot = max(range(col, size), key=lambda r: abs(normal[r][col]))
+        normal[col], normal[pivot] = normal[pivot], normal[col]
+        scale = normal[col][col]
+        if not scale:
+            raise ValueError('Not enough points to fit the curve')
+        normal[col] = [v / scale for v in normal[col]]
+        for r in range(size):
+            if r != col and normal[r][col]:
+                factor = normal[r][col]
+                normal[r] = [a - factor * b
+                             for a, b in zip(normal[r], normal[col])]
+    return [row[size:] for row in normal]
+
+
+def inverse_matrix(matrix):
+    """
+    Invert a 4x4 transform matrix
+
+    :param matrix: list. 16 values, row by row as xform returns them
+    :return: list. 16 values
+    """
+    if numpy is not None:
+        array = numpy.asarray(matrix, dtype=float).reshape(4, 4)
+        return numpy.linalg.inv(array).flatten().tolist()
+
+    # gauss-jordan elimination with partial pivoting
+    rows = [[float(v) for v in matrix[i*4:i*4+4]] +
+            [1.0 if i == j else 0.0 for j in range(4)] for i in range(4)]
+    for col in range(4):
+        pivot = max(range(col, 4), key=lambda r: abs(rows[r][col]))
+        rows[col], rows[pivot] = rows[pivot], rows[col]
+        scale = rows[col][col]
+        if not scale:
+            raise ValueError('Matrix is not invertible')
+        rows[col] = [v / scale for v in rows[col]]
+        for r in range(4):
+            if r != col and rows[r][col]:
+                factor = rows[r][col]
+                rows[r] = [a - factor * b for a, b in zip(rows[r], rows[col])]
+    return [v for row in rows for v in row[4:]]
+
+
 def create_outliner_grp():
     """
     Create different groups in the outliner
@@ -79,3 +438,23 @@ def uniform_scale(obj, scale):
         return cmds.setAttr('{}.radius'.format(obj), scale * default)
 
     return cmds.scale(scale, scale, scale, obj)
+
+
+def connect_switch(switch, name, on=(), off=()):
+    """
+    Drive attributes by a 0-1 switch and its reverse through direct
+    connections, in place of a linear driven key per attribute
+
+    :param switch: str. switch attribute
+    :param name: str. name of the reverse node
+    :param on: list. attributes following the switch
+    :param off: list. attributes following the reverse of the switch
+    :return: str. reverse node
+    """
+    reverse = cmds.createNode('reverse', n=name)
+    cmds.connectAttr(switch, '{}.inputX'.format(reverse))
+    for attr in on:
+        cmds.connectAttr(switch, attr, f=1)
+    for attr in off:
+        cmds.connectAttr('{}.outputX'.format(reverse), attr, f=1)
+    return reverse